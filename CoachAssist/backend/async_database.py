@@ -0,0 +1,149 @@
+"""
+async_database.py
+
+Async PostgreSQL access for the hot read endpoints.
+
+The sync routers run in Starlette's threadpool (40 threads by default),
+which caps how many requests can wait on the database at once. Endpoints
+declared `async def` use this module instead and wait on the event loop.
+
+Provides:
+- A psycopg 3 AsyncConnectionPool, separate from the sync pool in database.py,
+  sized by ASYNC_DB_POOL_MIN / ASYNC_DB_POOL_MAX
+- Rows returned as plain dicts (dict_row), matching RealDictCursor
+- get_async_db(): yield-based FastAPI dependency
+- async_connection(): pooled connection for code outside a route's
+  dependencies (e.g. long-lived streaming responses)
+- open_dedicated_async_connection(): an unpooled connection (LISTEN)
+- open_async_pool() / close_async_pool(): called from the app lifespan
+- async_pool_stats(): pool counters for monitoring
+- Statements recorded for per-request query stats (see query_stats.py)
+"""
+
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from psycopg import AsyncConnection
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from backend.query_stats import InstrumentedAsyncCursor
+
+load_dotenv()
+
+
+def _conninfo() -> str:
+    """
+    Builds the connection string from the same environment variables
+    as database.py (DATABASE_URL, or PGHOST/PGDATABASE/... with SSL).
+    """
+
+    database_url = os.getenv("DATABASE_URL")
+
+    if database_url:
+        return database_url
+
+    params = {
+        "host": os.getenv("PGHOST"),
+        "dbname": os.getenv("PGDATABASE"),
+        "user": os.getenv("PGUSER"),
+        "password": os.getenv("PGPASSWORD"),
+        "sslmode": "require",
+    }
+    return " ".join(
+        f"{key}='{value}'" for key, value in params.items() if value is not None
+    )
+
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+async def open_async_pool() -> AsyncConnectionPool:
+    """
+    Creates and opens the shared async pool (idempotent).
+    """
+
+    global _pool
+
+    async with _pool_lock:
+        if _pool is None:
+            pool = AsyncConnectionPool(
+                _conninfo(),
+                min_size=int(os.getenv("ASYNC_DB_POOL_MIN", "1")),
+                max_size=int(os.getenv("ASYNC_DB_POOL_MAX", "20")),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+                max_idle=float(os.getenv("ASYNC_DB_POOL_MAX_IDLE", "600")),
+                check=AsyncConnectionPool.check_connection,
+                kwargs={
+                    "row_factory": dict_row,
+                    "cursor_factory": InstrumentedAsyncCursor,
+                    "autocommit": True,
+                },
+                open=False,
+            )
+            await pool.open()
+            _pool = pool
+
+    return _pool
+
+
+async def close_async_pool():
+    """Closes the shared async pool (called on application shutdown)."""
+
+    global _pool
+
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.close()
+            _pool = None
+
+
+def async_pool_stats() -> dict:
+    """Returns the async pool's counters, or an empty dict if it was never opened."""
+
+    return _pool.get_stats() if _pool is not None else {}
+
+
+async def get_async_db():
+    """
+    FastAPI dependency yielding an async connection for the current request.
+
+    Like get_db, it is cached per request, so require_user_async, the
+    *_async role checks and the handler all share one connection, and it is
+    always returned to the pool when the request is done.
+    """
+
+    pool = _pool or await open_async_pool()
+
+    try:
+        async with pool.connection() as conn:
+            yield conn
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Database is busy, please retry")
+
+
+@asynccontextmanager
+async def async_connection():
+    """
+    Borrows a pooled connection for as long as the block runs.
+
+    Streaming endpoints use it instead of get_async_db so they do not keep
+    a connection for the whole life of the response.
+    """
+
+    pool = _pool or await open_async_pool()
+
+    try:
+        async with pool.connection() as conn:
+            yield conn
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Database is busy, please retry")
+
+
+async def open_dedicated_async_connection() -> AsyncConnection:
+    """Opens an autocommit connection outside the pool; the caller closes it."""
+
+    return await AsyncConnection.connect(_conninfo(), autocommit=True, row_factory=dict_row)
@@ -0,0 +1,106 @@
+"""
+bench_async_db.py
+
+Compares request throughput of the sync database path against the async one.
+
+Sync path:  `def` handlers run in Starlette's threadpool (AnyIO's default
+            limiter of 40 threads) and block on psycopg2 via database.get_pool().
+Async path: `async def` handlers wait on the event loop using
+            async_database's AsyncConnectionPool.
+
+Each simulated request checks out a connection and runs
+`SELECT pg_sleep(latency)`, standing in for a read query with network latency.
+Both pools are pre-filled to the concurrency level, so the only difference
+is where requests wait. Keep the highest level below the server's
+max_connections (100 by default).
+
+Usage (from the CoachAssist directory):
+    DATABASE_URL=postgresql://... python -m backend.benchmarks.bench_async_db
+    python -m backend.benchmarks.bench_async_db --concurrency 20,100,200 --requests 1000 --latency 0.02
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import anyio
+import anyio.to_thread
+
+from backend import database, async_database
+
+
+def sync_request(latency):
+    with database.get_connection() as db:
+        cur = db.cursor()
+        cur.execute("SELECT pg_sleep(%s)", (latency,))
+        cur.fetchone()
+        cur.close()
+
+
+async def async_request(latency):
+    async with async_database._pool.connection() as db:
+        cur = await db.execute("SELECT pg_sleep(%s)", (latency,))
+        await cur.fetchone()
+
+
+async def run(concurrency, total, request):
+    """Runs `total` requests with at most `concurrency` in flight; returns req/s."""
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await request()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+async def bench(concurrency, total, latency):
+    for name in ("DB_POOL_MIN", "DB_POOL_MAX", "ASYNC_DB_POOL_MIN", "ASYNC_DB_POOL_MAX"):
+        os.environ[name] = str(concurrency)
+
+    # One pool at a time, so both fit under the server's max_connections.
+    # A warm-up round keeps connection setup out of the measurement.
+    try:
+        await run(concurrency, concurrency, lambda: anyio.to_thread.run_sync(sync_request, 0))
+        sync_rps = await run(
+            concurrency, total, lambda: anyio.to_thread.run_sync(sync_request, latency)
+        )
+    finally:
+        database.close_pool()
+
+    try:
+        pool = await async_database.open_async_pool()
+        await pool.wait()
+        await run(concurrency, concurrency, lambda: async_request(0))
+        async_rps = await run(concurrency, total, lambda: async_request(latency))
+    finally:
+        await async_database.close_async_pool()
+
+    return sync_rps, async_rps
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--concurrency", default="10,40,80",
+                        help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=600,
+                        help="requests per run")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="seconds each query sleeps in Postgres")
+    args = parser.parse_args()
+
+    threads = anyio.to_thread.current_default_thread_limiter().total_tokens
+    print(f"threadpool size: {threads}, query latency: {args.latency * 1000:.0f} ms, "
+          f"{args.requests} requests per run\n")
+    print(f"{'concurrency':>11} {'sync req/s':>11} {'async req/s':>12} {'speedup':>8}")
+
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        sync_rps, async_rps = await bench(level, args.requests, args.latency)
+        print(f"{level:>11} {sync_rps:>11.0f} {async_rps:>12.0f} {async_rps / sync_rps:>7.2f}x")
+
+
+if __name__ == "__main__":
+    anyio.run(main)
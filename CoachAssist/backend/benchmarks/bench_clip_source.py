@@ -0,0 +1,175 @@
+"""
+bench_clip_source.py
+
+Compares how the clip job reads its source: downloading the whole stored
+video and cutting it locally (the old path) against ffmpeg seeking in a
+signed URL with range requests (clip_engine.py).
+
+A local HTTP server stands in for storage:
+- serves one file with Range support (206 Partial Content), counting the
+  bytes and requests it answers
+- `--bandwidth` caps each response at that many MB/s and `--rtt` delays
+  every request, standing in for the network to the bucket
+
+The source is a generated faststart H.264 video of `--minutes` length
+(testsrc2 + tone, 720p), built once and kept in the temp directory, or
+any MP4 passed with `--source`.
+
+Usage (from the CoachAssist directory):
+    python -m backend.benchmarks.bench_clip_source
+    python -m backend.benchmarks.bench_clip_source --minutes 30 --clip 10 --bandwidth 50 --rtt 0.02
+"""
+
+import os
+import re
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.server
+import requests
+
+from backend.ingest_planner import FFMPEG_BIN, probe, run_ffmpeg
+from backend.clip_engine import cut_args
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class Counter:
+    def __init__(self):
+        self.bytes = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def make_server(path, counter, bandwidth, rtt):
+    size = os.path.getsize(path)
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(rtt)
+
+            start, end = 0, size - 1
+            match = _RANGE.match(self.headers.get("Range", ""))
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2) or size - 1), size - 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+
+            with counter.lock:
+                counter.requests += 1
+
+            chunk = 256 * 1024
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    data = f.read(min(chunk, remaining))
+                    try:
+                        self.wfile.write(data)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return      # ffmpeg stops reading once it has what it needs
+                    remaining -= len(data)
+                    with counter.lock:
+                        counter.bytes += len(data)
+                    if bandwidth:
+                        time.sleep(len(data) / (bandwidth * 1e6))
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_source(minutes):
+    path = os.path.join(tempfile.gettempdir(), f"bench_clip_source_{minutes}m.mp4")
+    if not os.path.exists(path):
+        print(f"Generating a {minutes} min test video (once)...")
+        subprocess.run([
+            FFMPEG_BIN, "-y", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={minutes * 60}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={minutes * 60}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "60", "-b:v", "4M",
+            "-c:a", "aac", "-movflags", "+faststart",
+            path,
+        ], check=True)
+    return path
+
+
+def download_then_cut(url, start, end, workdir):
+    """The old clip job: download_to_filename, then cut the local copy."""
+
+    input_path = os.path.join(workdir, "input.mp4")
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()
+        with open(input_path, "wb") as f:
+            for chunk in response.iter_content(1024 * 1024):
+                f.write(chunk)
+
+    run_ffmpeg(cut_args(input_path, start, end, os.path.join(workdir, "clip.mp4")))
+
+
+def ranged_cut(url, start, end, workdir):
+    run_ffmpeg(cut_args(url, start, end, os.path.join(workdir, "clip.mp4")))
+
+
+def run(name, cut, source, start, end, bandwidth, rtt):
+    counter = Counter()
+    server = make_server(source, counter, bandwidth, rtt)
+    url = f"http://127.0.0.1:{server.server_port}/source.mp4"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        cut(url, start, end, workdir)
+        elapsed = time.perf_counter() - started
+        clip_size = os.path.getsize(os.path.join(workdir, "clip.mp4"))
+
+    server.shutdown()
+
+    print(f"{name:<22} {counter.bytes / 1e6:>10.1f} MB {counter.requests:>9} {elapsed:>9.2f} s "
+          f"{clip_size / 1e6:>9.1f} MB")
+    return counter.bytes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--source", help="MP4 to clip (default: generated test video)")
+    parser.add_argument("--minutes", type=int, default=10, help="length of the generated video")
+    parser.add_argument("--clip", type=float, default=10, help="clip length in seconds")
+    parser.add_argument("--at", type=float, default=0.5, help="clip start, as a fraction of the video")
+    parser.add_argument("--bandwidth", type=float, default=100, help="MB/s per response (0 = unlimited)")
+    parser.add_argument("--rtt", type=float, default=0.01, help="seconds added to every request")
+    args = parser.parse_args()
+
+    source = args.source or make_source(args.minutes)
+    duration = float(probe(source)["format"]["duration"])
+
+    start = round(duration * args.at, 2)
+    end = min(start + args.clip, duration)
+
+    print(f"{os.path.getsize(source) / 1e6:.0f} MB source ({duration:.0f} s), clip {start:.1f}-{end:.1f} s, "
+          f"{args.bandwidth or 'unlimited'} MB/s, {args.rtt * 1000:.0f} ms per request\n")
+    print(f"{'source read':<22} {'transferred':>13} {'requests':>9} {'time':>11} {'clip':>12}")
+
+    full = run("full download + cut", download_then_cut, source, start, end, args.bandwidth, args.rtt)
+    ranged = run("ranged reads (URL)", ranged_cut, source, start, end, args.bandwidth, args.rtt)
+
+    print(f"\nranged reads: {full[0] / max(ranged[0], 1):.0f}x fewer bytes, "
+          f"{full[1] / max(ranged[1], 1e-6):.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
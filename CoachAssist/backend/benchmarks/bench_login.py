@@ -0,0 +1,109 @@
+"""
+bench_login.py
+
+Measures login throughput under concurrency, with bcrypt run inline versus
+in the bcrypt process pool (backend.password_hashing).
+
+Inline: the old `def login` path. bcrypt.checkpw runs in Starlette's
+        threadpool (AnyIO's default limiter of 40 threads) inside the
+        API process.
+Pool:   `async def login` awaits verify_password_async, which runs bcrypt
+        in BCRYPT_WORKERS separate processes.
+
+Each simulated login verifies a password against a hash made with
+BCRYPT_ROUNDS. While logins run, a probe coroutine ticks every 10 ms and
+records how late each tick is: that is the delay every other request on
+the same server would see. The database is left out so only bcrypt is
+measured.
+
+Usage (from the CoachAssist directory):
+    python -m backend.benchmarks.bench_login
+    BCRYPT_WORKERS=4 BCRYPT_ROUNDS=10 python -m backend.benchmarks.bench_login --concurrency 8,32,64 --requests 200
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+import anyio
+import anyio.to_thread
+
+from backend import password_hashing
+from backend.utils import hash_password, verify_password
+
+PASSWORD = "correct horse battery staple"
+
+
+async def run(concurrency, total, login):
+    """
+    Runs `total` logins with at most `concurrency` in flight.
+    Returns (logins/s, p50 event loop lag ms, p99 event loop lag ms).
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            lags.append(max(time.perf_counter() - expected, 0.0) * 1000)
+
+    async def one():
+        async with semaphore:
+            assert await login()
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    lags.sort()
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))] if lags else 0.0
+    return total / elapsed, statistics.median(lags) if lags else 0.0, p99
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--concurrency", default="4,16,64",
+                        help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100,
+                        help="logins per run")
+    args = parser.parse_args()
+
+    hashed = hash_password(PASSWORD)
+
+    def inline():
+        return anyio.to_thread.run_sync(verify_password, PASSWORD, hashed)
+
+    def pooled():
+        return password_hashing.verify_password_async(PASSWORD, hashed)
+
+    # Queue limit out of the way: the benchmark measures throughput, not rejections
+    password_hashing.BCRYPT_MAX_PENDING = max(
+        int(c) for c in args.concurrency.split(",")
+    )
+    await password_hashing.start_bcrypt_pool()
+
+    threads = anyio.to_thread.current_default_thread_limiter().total_tokens
+    print(f"bcrypt rounds: {password_hashing.BCRYPT_ROUNDS}, "
+          f"pool workers: {password_hashing.BCRYPT_WORKERS}, threadpool size: {threads}, "
+          f"{args.requests} logins per run\n")
+    print(f"{'concurrency':>11} {'mode':>7} {'logins/s':>9} {'loop lag p50':>13} {'loop lag p99':>13}")
+
+    try:
+        for level in [int(c) for c in args.concurrency.split(",")]:
+            for name, login in (("inline", inline), ("pool", pooled)):
+                rate, p50, p99 = await run(level, args.requests, login)
+                print(f"{level:>11} {name:>7} {rate:>9.1f} {p50:>10.2f} ms {p99:>10.2f} ms")
+    finally:
+        password_hashing.shutdown_bcrypt_pool()
+
+    print(f"\npool stats: {password_hashing.bcrypt_pool_stats()}")
+
+
+if __name__ == "__main__":
+    anyio.run(main)
@@ -0,0 +1,157 @@
+"""
+bench_resumable_upload.py
+
+Compares the old chunk uploader (a new connection and a 256 KB PUT per
+chunk) with ResumableUpload (keep-alive, adaptive chunk size, Range-aware
+resume, retries) against a local fake resumable-upload server.
+
+The fake server follows the GCS protocol closely enough for both clients:
+- 308 with `Range: bytes=0-N` for intermediate chunks, 200 when complete
+- `--rtt` adds a delay to every request, standing in for network latency
+- `--fail-every N` answers every Nth chunk with a 503 after committing only
+  part of it, so the client has to query the offset and resume
+  (the old uploader cannot, so it is only run without failures)
+
+Usage (from the CoachAssist directory):
+    python -m backend.benchmarks.bench_resumable_upload
+    python -m backend.benchmarks.bench_resumable_upload --size-mb 256 --rtt 0.03 --fail-every 7
+"""
+
+import os
+import re
+import time
+import argparse
+import threading
+import http.server
+import requests
+
+from backend.video_providers import resumable_upload
+from backend.video_providers.resumable_upload import ResumableUpload, CHUNK_ALIGNMENT
+
+_CONTENT_RANGE = re.compile(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+
+class FakeSession:
+    """State of one upload session on the fake server."""
+
+    def __init__(self):
+        self.committed = 0
+        self.complete = False
+        self.requests = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+
+
+def make_server(session, rtt, fail_every):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_PUT(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(rtt)
+
+            with session.lock:
+                session.requests += 1
+                session.connections.add(self.client_address)
+                start, end, total = _CONTENT_RANGE.match(self.headers["Content-Range"]).groups()
+
+                if start is not None and int(start) <= session.committed:
+                    accepted = body[session.committed - int(start):]
+                    fail = fail_every and session.requests % fail_every == 0
+                    if fail:
+                        # commit part of the chunk, then fail
+                        keep = len(accepted) // 2
+                        accepted = accepted[:keep - keep % CHUNK_ALIGNMENT]
+                    session.committed += len(accepted)
+                    if fail:
+                        return self._reply(503)
+
+                if total != "*" and session.committed == int(total):
+                    session.complete = True
+                    return self._reply(200)
+
+                headers = {"Range": f"bytes=0-{session.committed - 1}"} if session.committed else {}
+                return self._reply(308, headers)
+
+        def _reply(self, status, headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def legacy_upload(url, payload):
+    """The previous upload_video_with_progress loop."""
+
+    chunk_size = 256 * 1024
+    uploaded = 0
+    while uploaded < len(payload):
+        chunk = payload[uploaded:uploaded + chunk_size]
+        headers = {
+            "Content-Type": "video/mp4",
+            "Content-Range": f"bytes {uploaded}-{uploaded + len(chunk) - 1}/{len(payload)}",
+        }
+        response = requests.put(url, data=chunk, headers=headers)
+        if response.status_code not in (200, 201, 308):
+            raise Exception(f"Upload failed: {response.status_code}")
+        uploaded += len(chunk)
+
+
+def streaming_upload(url, payload):
+    """ResumableUpload fed in 64 KB pieces, like the streaming ingest path."""
+
+    upload = ResumableUpload(url)
+    for i in range(0, len(payload), 64 * 1024):
+        if upload.write(payload[i:i + 64 * 1024]):
+            upload.flush()
+    upload.finish()
+    return upload
+
+
+def run(name, upload, payload, rtt, fail_every=0):
+    session = FakeSession()
+    server = make_server(session, rtt, fail_every)
+    url = f"http://127.0.0.1:{server.server_port}/upload"
+
+    started = time.perf_counter()
+    result = upload(url, payload)
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    assert session.complete and session.committed == len(payload), "upload incomplete"
+
+    retries = getattr(result, "retries", 0)
+    print(f"{name:<28} {len(payload) / elapsed / 1e6:>8.1f} MB/s {elapsed:>8.2f} s "
+          f"{session.requests:>9} {len(session.connections):>12} {retries:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--size-mb", type=int, default=64, help="upload size")
+    parser.add_argument("--rtt", type=float, default=0.01, help="seconds added to every request")
+    parser.add_argument("--fail-every", type=int, default=4,
+                        help="every Nth chunk fails halfway in the retry run (0 = never)")
+    args = parser.parse_args()
+
+    resumable_upload.RETRY_BACKOFF = 0.01     # keep backoff sleeps out of the comparison
+
+    payload = os.urandom(args.size_mb * 1024 * 1024)
+    print(f"{args.size_mb} MB upload, {args.rtt * 1000:.0f} ms per request\n")
+    print(f"{'uploader':<28} {'throughput':>13} {'time':>10} {'requests':>9} {'connections':>12} {'retries':>8}")
+
+    run("old (256 KB, no keep-alive)", legacy_upload, payload, args.rtt)
+    run("ResumableUpload", streaming_upload, payload, args.rtt)
+    if args.fail_every:
+        run(f"ResumableUpload, 1/{args.fail_every} fail", streaming_upload, payload, args.rtt, args.fail_every)
+
+
+if __name__ == "__main__":
+    main()
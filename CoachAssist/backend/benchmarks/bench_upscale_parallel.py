@@ -0,0 +1,129 @@
+"""
+bench_upscale_parallel.py
+
+Measures the speedup of segment-parallel upscaling (upscale_pipeline.py):
+the same video is upscaled with 1, 2, 4 and 8 segments at once and the
+wall time of each run is compared with the single-pipeline run.
+
+- the source is split at its keyframes into segments of `--segment`
+  seconds, so there are enough segments for the largest pool
+- every run checks that the output is as long as the source, so the
+  segments were joined without losing or repeating frames
+- `--stand-in` replaces Real-ESRGAN with a CPU-bound ffmpeg lanczos 4x
+  scale of each batch (same file-in, file-out interface), for machines
+  without the binary or a GPU; the speedup then shows how the pipeline
+  uses the cores, not how the model scales
+
+The source is a generated H.264 video of `--minutes` length (testsrc2 +
+tone, `--height` tall, keyframe every 2 s), built once and kept in the
+temp directory, or any MP4 passed with `--source`.
+
+Usage (from the CoachAssist directory):
+    python -m backend.benchmarks.bench_upscale_parallel --stand-in
+    python -m backend.benchmarks.bench_upscale_parallel --workers 1,2,4,8 --minutes 4 --segment 15
+"""
+
+import os
+import stat
+import time
+import argparse
+import tempfile
+import subprocess
+
+from backend.ingest_planner import FFMPEG_BIN, probe
+from backend.clip_engine import keyframe_index
+from backend.upscaling_utils import realesrgan
+from backend.upscale_pipeline import upscale_video
+
+STAND_IN = """#!/bin/sh
+# realesrgan-ncnn-vulkan -i IN_DIR -o OUT_DIR ...: lanczos 4x of every frame
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -i) IN="$2"; shift ;;
+        -o) OUT="$2"; shift ;;
+    esac
+    shift
+done
+mkdir -p "$OUT"
+exec {ffmpeg} -v error -start_number 0 -i "$IN/%08d.png" \\
+    -vf scale=iw*4:ih*4:flags=lanczos -start_number 0 "$OUT/%08d.png"
+"""
+
+
+def use_stand_in(directory):
+    """Points Real-ESRGAN (here and in the pool processes) at the ffmpeg stand-in."""
+
+    path = os.path.join(directory, "realesrgan-stand-in")
+    with open(path, "w") as f:
+        f.write(STAND_IN.format(ffmpeg=FFMPEG_BIN))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+    # the pool processes are spawned and read these when they import realesrgan
+    os.environ["REALESRGAN_BIN"] = realesrgan.REALSRCAN_BIN = path
+    os.environ["REALESRGAN_DIR"] = realesrgan.REALSRCAN_DIR = directory
+
+
+def make_source(minutes, height):
+    path = os.path.join(tempfile.gettempdir(), f"bench_upscale_source_{minutes}m_{height}p.mp4")
+    if not os.path.exists(path):
+        print(f"Generating a {minutes} min test video (once)...")
+        subprocess.run([
+            FFMPEG_BIN, "-y", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={height * 16 // 9 // 2 * 2}x{height}:rate=30:duration={minutes * 60}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={minutes * 60}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "60",
+            "-c:a", "aac", "-movflags", "+faststart",
+            path,
+        ], check=True)
+    return path
+
+
+def run(source, keyframes, workers, segment):
+    with tempfile.TemporaryDirectory() as workdir:
+        output_path = os.path.join(workdir, "output.mp4")
+
+        started = time.perf_counter()
+        frames = upscale_video(
+            source, output_path, workdir,
+            keyframes=keyframes, parallelism=workers, segment_seconds=segment
+        )
+        elapsed = time.perf_counter() - started
+
+        duration = float(probe(output_path)["format"]["duration"])
+
+    return frames, elapsed, duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--source", help="MP4 to upscale (default: generated test video)")
+    parser.add_argument("--minutes", type=int, default=4, help="length of the generated video")
+    parser.add_argument("--height", type=int, default=144, help="height of the generated video")
+    parser.add_argument("--workers", default="1,2,4,8", help="segments at once, comma-separated")
+    parser.add_argument("--segment", type=float, default=15, help="minimum segment length in seconds")
+    parser.add_argument("--stand-in", action="store_true", help="ffmpeg lanczos 4x instead of Real-ESRGAN")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tools:
+        if args.stand_in:
+            use_stand_in(tools)
+
+        source = args.source or make_source(args.minutes, args.height)
+        source_duration = float(probe(source)["format"]["duration"])
+        keyframes = keyframe_index(source)
+
+        print(f"{source_duration:.0f} s source, {len(keyframes)} keyframes, segments of >= {args.segment:g} s, "
+              f"{os.cpu_count()} CPUs, {'stand-in' if args.stand_in else 'Real-ESRGAN'}\n")
+        print(f"{'workers':>7} {'frames':>8} {'time':>10} {'frames/s':>9} {'speedup':>8} {'output':>10}")
+
+        baseline = None
+        for workers in (int(n) for n in args.workers.split(",")):
+            frames, elapsed, duration = run(source, keyframes, workers, args.segment)
+            baseline = baseline or elapsed
+
+            print(f"{workers:>7} {frames:>8} {elapsed:>8.1f} s {frames / elapsed:>9.1f} "
+                  f"{baseline / elapsed:>7.2f}x {duration:>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+cache.py
+
+Small in-process caches for data read on every request.
+
+Provides:
+- TTLCache: thread-safe LRU cache whose entries also expire after `ttl`
+  seconds, with hit/miss/eviction counters
+- cache_stats(): counters of every named cache, for monitoring
+
+Caches are per process. Each uvicorn worker keeps its own copy, so writers
+invalidate locally and the TTL bounds how stale another worker can be.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+# name -> TTLCache, filled by TTLCache(name=...)
+CACHES = {}
+
+
+class TTLCache:
+    """
+    LRU cache with a per-entry time to live.
+
+    - get() returns `default` for missing or expired keys
+    - set() evicts the least recently used entry once `maxsize` is reached
+    - maxsize <= 0 or ttl <= 0 disables the cache (every get is a miss)
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()    # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+        if name:
+            CACHES[name] = self
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+
+            if entry is _MISSING:
+                self._stats["misses"] += 1
+                return default
+
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def pop(self, key):
+        """Removes `key` if cached. Safe to call for keys that are not."""
+
+        with self._lock:
+            if self._data.pop(key, _MISSING) is not _MISSING:
+                self._stats["invalidations"] += 1
+
+    def pop_where(self, predicate):
+        """Removes every key for which predicate(key) is true."""
+
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            })
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def cache_stats() -> dict:
+    """Returns {name: counters} for every named cache."""
+
+    return {name: cache.stats() for name, cache in CACHES.items()}
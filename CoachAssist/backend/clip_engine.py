@@ -0,0 +1,385 @@
+"""
+clip_engine.py
+
+Cuts [start, end] out of a stored video for the "clip" job (media_jobs.py).
+
+The source is read in place instead of being downloaded first:
+- ffmpeg opens a signed URL of the stored file and seeks in it over HTTP
+  range requests: it reads the moov atom (at the front, every stored
+  upload is faststart, see ingest_planner.py), looks up the byte offset of
+  `start` in the sample tables and then fetches only the mdat ranges of the
+  packets it copies, so a 10s clip of a 4 GB game reads a few MB
+- one keep-alive connection serves all the ranges (-multiple_requests)
+- if the ranged read fails (storage without range support, a file ffmpeg
+  cannot seek remotely), the source is downloaded and cut locally, as before
+
+CLIP_RANGED_READS=0 turns the ranged path off. A batch (cut_clips, run by
+the "clip_batch" job) runs CLIP_CUT_CONCURRENCY cuts at once against the
+same signed URL; cuts that fail share one download of the source.
+See backend/benchmarks/bench_clip_source.py for bytes read and wall time
+of both paths.
+
+Cuts are frame-accurate without a full re-encode (smart cut):
+- a stream copy can only start on a keyframe, so `-ss start -c copy`
+  started clips up to a GOP (several seconds) early
+- the keyframe times of every stored upload are indexed once with ffprobe
+  (keyframe_index, run by the "preview" job) into videos.keyframes; for
+  videos without an index, only the clip's own range is probed
+- only [start, first keyframe) and [last keyframe, end) are re-encoded;
+  the GOPs between the two keyframes are stream-copied, and the parts are
+  joined with the concat demuxer; every part carries its SPS/PPS in-band
+  (x264 repeat-headers, h264_mp4toannexb on the copy), so the copied part
+  still decodes with its own parameters between the encoded ones
+- with B-frames, packets are stored out of presentation order, and a
+  stream copy selects them by decode time: the copy of [k1, k2) would end
+  with frames shown after k2, and a copy rebased to its first decode time
+  starts a few frames late; the copied part therefore drops every packet
+  shown outside [k1, k2) (noise bitstream filter; GOPs are closed, so
+  nothing left refers to them), all parts keep the source timestamps
+  (-copyts), and the concat list gives each part its first presentation
+  time and exact duration, so each part starts where the previous one ends
+  (not where its primed AAC audio starts)
+- decode times must not go back at a join either, so the re-encoded parts
+  use the B-frame reorder delay of the source (ffprobe has_b_frames)
+- a clip with less than a GOP between its first and last keyframe, or a
+  source reordered deeper than x264 does, is encoded outright
+"""
+
+import os
+import bisect
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from backend.metrics import external_call
+from backend.ingest_planner import FFMPEG_BIN, FFPROBE_BIN, run_ffmpeg
+from backend.media_storage import sign_url
+
+logger = logging.getLogger(__name__)
+
+RANGED_READS = os.getenv("CLIP_RANGED_READS", "1") != "0"
+
+# input options for reading over HTTP(S): seek with range requests on one
+# keep-alive connection, and reconnect mid-read instead of failing the cut
+HTTP_INPUT_ARGS = [
+    "-seekable", "1",
+    "-multiple_requests", "1",
+    "-reconnect", "1",
+    "-reconnect_on_network_error", "1",
+    "-reconnect_delay_max", "5",
+]
+
+
+# a keyframe this close to start counts as "on" it; also the nudge past a
+# keyframe so seeking to it cannot land on the one before (pts_time is rounded)
+KEYFRAME_TOLERANCE = 0.001
+
+# parallel cuts of a batch; a smart cut encodes at most a GOP per clip
+CUT_CONCURRENCY = int(os.getenv("CLIP_CUT_CONCURRENCY", str(min(8, os.cpu_count() or 2))))
+
+# settings of the re-encoded head and tail of a smart cut (a GOP at most each)
+HEAD_CRF = os.getenv("CLIP_HEAD_CRF", "18")
+HEAD_PRESET = os.getenv("CLIP_HEAD_PRESET", "veryfast")
+
+# B-frame reorder delays (frames) the re-encoded parts can match: none,
+# B-frames, B-pyramid
+X264_REORDER_ARGS = {
+    0: ["-bf", "0"],
+    1: ["-b-pyramid", "none"],
+    2: [],
+}
+
+# added to the timestamps of every part, so the decode times of a first GOP
+# and primed audio stay positive (NUT has no negative timestamps)
+PART_TS_OFFSET = 1.0
+
+
+def _input_args(source: str) -> list:
+    return HTTP_INPUT_ARGS if source.startswith(("http://", "https://")) else []
+
+
+#=== KEYFRAME INDEX ===
+
+def keyframe_index(source: str, window: tuple = None) -> list:
+    """
+    Presentation times (seconds, ascending) of the video keyframes of source,
+    a local path or an http(s) URL. ffprobe only reads packet headers, no
+    decoding. window=(from, to) limits the read to that part of the video.
+    """
+
+    args = [FFPROBE_BIN, "-v", "error", *_input_args(source)]
+    if window:
+        args += ["-read_intervals", f"{max(window[0], 0):.3f}%{window[1]:.3f}"]
+
+    result = subprocess.run(args + [
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        source,
+    ], capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe could not index keyframes: {result.stderr[:200]}")
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(round(float(pts_time), 6))
+
+    # packets are listed in decode order
+    return sorted(set(keyframes))
+
+
+def reorder_delay(source: str) -> int:
+    """Frames the video of source is decoded ahead of display (B-frame reordering)."""
+
+    result = subprocess.run([
+        FFPROBE_BIN, "-v", "error", *_input_args(source),
+        "-select_streams", "v:0",
+        "-show_entries", "stream=has_b_frames",
+        "-of", "csv=p=0",
+        source,
+    ], capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe could not read the stream: {result.stderr[:200]}")
+
+    return int(result.stdout.strip() or 0)
+
+
+#=== CUTTING ===
+
+def cut_args(source: str, start: float, end: float, output_path: str) -> list:
+    """ffmpeg stream-copy cut of source (a local path or an http(s) URL)."""
+
+    return [
+        FFMPEG_BIN, "-y",
+        "-ss", str(start),
+        *_input_args(source),
+        "-i", source,
+        "-t", str(end - start),
+        "-c", "copy",
+        "-movflags", "+faststart",
+        "-progress", "pipe:1", "-nostats",
+        output_path,
+    ]
+
+
+def _part_args(source: str, start: float, end: float, output_path: str, delay: int = None) -> list:
+    """
+    One part of a smart cut, as NUT (the source time base, unlike Matroska's
+    milliseconds) with SPS/PPS in-band, keeping the source timestamps: the
+    frames shown in [start, end). delay=None stream-copies them, otherwise
+    they are re-encoded with that B-frame reorder delay.
+    """
+
+    # half a millisecond: keyframe times are printed rounded to the microsecond
+    edge = KEYFRAME_TOLERANCE / 2
+
+    seek = start
+
+    if delay is not None:
+        codec_args = [
+            "-to", f"{end - edge:.6f}",
+            "-c:v", "libx264", "-preset", HEAD_PRESET, "-crf", HEAD_CRF, "-pix_fmt", "yuv420p",
+            "-x264-params", "repeat-headers=1",
+            *X264_REORDER_ARGS[delay],
+            "-c:a", "aac",
+        ]
+    else:
+        # by presentation time, not the decode time a copy's -t/-to would use;
+        # audio packets must also end by end, the tail has its own audio
+        seek = start + edge
+        before = f"lt(pts*tb\\,{start - edge:.6f})"
+        codec_args = [
+            "-c", "copy",
+            "-bsf:v", f"h264_mp4toannexb,noise=drop={before}+gte(pts*tb\\,{end - edge:.6f})",
+            "-bsf:a", f"noise=drop={before}+gt((pts+duration)*tb\\,{end + edge:.6f})",
+        ]
+
+    return [
+        FFMPEG_BIN, "-y",
+        "-copyts",
+        "-ss", f"{seek:.6f}",
+        *_input_args(source),
+        "-i", source,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        *codec_args,
+        "-output_ts_offset", str(PART_TS_OFFSET),
+        "-f", "nut",
+        "-progress", "pipe:1", "-nostats",
+        output_path,
+    ]
+
+
+def _encode_args(source: str, start: float, end: float, output_path: str) -> list:
+    return [
+        FFMPEG_BIN, "-y",
+        "-ss", str(start),
+        *_input_args(source),
+        "-i", source,
+        "-t", str(end - start),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "libx264", "-preset", HEAD_PRESET, "-crf", HEAD_CRF, "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        "-movflags", "+faststart",
+        "-progress", "pipe:1", "-nostats",
+        output_path,
+    ]
+
+
+def smart_cut(source: str, start: float, end: float, output_path: str, keyframes: list, on_progress=None) -> str:
+    """
+    Frame-accurate cut of source, re-encoding only what lies before its
+    first and after its last keyframe. Returns the method used: "copy"
+    (both ends on keyframes), "smart" or "encode".
+    """
+
+    duration = end - start
+    report = on_progress or (lambda done: None)
+
+    inside = keyframes[bisect.bisect_left(keyframes, start - KEYFRAME_TOLERANCE):
+                       bisect.bisect_right(keyframes, end + KEYFRAME_TOLERANCE)]
+
+    delay = reorder_delay(source) if len(inside) >= 2 else None
+
+    # no whole GOP to copy, or B-frames reordered deeper than x264 does
+    if delay not in X264_REORDER_ARGS:
+        run_ffmpeg(_encode_args(source, start, end, output_path), duration, on_progress)
+        return "encode"
+
+    first, last = inside[0], inside[-1]
+
+    # (start, end, delay) of each part, None for the copied one; ends on a
+    # keyframe need no encoded part
+    parts = [(first, last, None)]
+    if first - start > KEYFRAME_TOLERANCE:
+        parts.insert(0, (start, first, delay))
+    if end - last > KEYFRAME_TOLERANCE:
+        parts.append((last, end, delay))
+    else:
+        parts[-1] = (parts[-1][0], end, None)
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or None) as workdir:
+        listing = os.path.join(workdir, "parts.txt")
+        entries = []
+        done = 0.0
+
+        for index, (part_start, part_end, part_delay) in enumerate(parts):
+            path = os.path.join(workdir, f"part_{index}.nut")
+            share = (part_end - part_start) / duration
+
+            run_ffmpeg(
+                _part_args(source, part_start, part_end, path, part_delay),
+                part_end - part_start, lambda fraction: report(done + fraction * share)
+            )
+            done += share
+            entries.append(f"file '{path}'\ninpoint {part_start + PART_TS_OFFSET:.6f}\nduration {part_end - part_start:.6f}\n")
+
+        with open(listing, "w") as f:
+            f.writelines(entries)
+
+        result = subprocess.run([
+            FFMPEG_BIN, "-y", "-v", "error",
+            "-f", "concat", "-safe", "0",
+            "-i", listing,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path,
+        ], capture_output=True)
+
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg concat failed: {result.stderr.decode()[-500:]}")
+
+    return "smart" if any(part_delay is not None for _, _, part_delay in parts) else "copy"
+
+
+def _cut(source: str, start: float, end: float, output_path: str, keyframes, on_progress) -> str:
+    if keyframes is None:
+        # not indexed (clip of an older upload, upscaled copy): probe just this range
+        keyframes = keyframe_index(source, (start, end))
+
+    try:
+        return smart_cut(source, start, end, output_path, keyframes, on_progress)
+    except Exception as e:
+        logger.warning(f"[CLIP] Smart cut failed, cutting at the previous keyframe: {e}")
+        run_ffmpeg(cut_args(source, start, end, output_path), end - start, on_progress)
+        return "copy"
+
+
+def cut_clips(bucket, storage_path: str, ranges: list, output_paths: list,
+              keyframes: list = None, on_progress=None) -> list:
+    """
+    Cuts every (start, end) of ranges out of the stored video at storage_path
+    into the matching output path, CUT_CONCURRENCY cuts at a time.
+    on_progress(index, fraction) follows each cut.
+
+    The source is read at most once in full: the cuts read their ranges of
+    the signed URL, and only the cuts that fail that way share one download.
+    Returns one {"read", "method"} per range, or {"error"} for a cut that
+    failed both ways.
+    """
+
+    results = [None] * len(ranges)
+
+    def run_all(source, read, pending):
+        def cut(index):
+            start, end = ranges[index]
+            report = (lambda done: on_progress(index, done)) if on_progress else None
+            return _cut(source, start, end, output_paths[index], keyframes, report)
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=CUT_CONCURRENCY) as pool:
+            futures = {pool.submit(cut, index): index for index in pending}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = {"read": read, "method": future.result()}
+                except Exception as e:
+                    results[index] = {"error": str(e)[-300:]}
+                    failed.append(index)
+        return sorted(failed)
+
+    pending = list(range(len(ranges)))
+
+    if RANGED_READS:
+        try:
+            url = sign_url(bucket, storage_path)
+            with external_call("firebase", "ranged_read"):
+                pending = run_all(url, "ranged", pending)
+        except Exception as e:
+            logger.warning(f"[CLIP] Could not sign {storage_path}: {e}")
+
+        if pending:
+            logger.warning(f"[CLIP] Ranged reads of {storage_path} failed for {len(pending)} cut(s), downloading it")
+
+    if pending:
+        input_path = output_paths[pending[0]] + ".source.mp4"
+        try:
+            with external_call("firebase", "download"):
+                bucket.blob(storage_path).download_to_filename(input_path)
+
+            run_all(input_path, "download", pending)
+        finally:
+            if os.path.exists(input_path):
+                os.remove(input_path)
+
+    return results
+
+
+def cut_clip(bucket, storage_path: str, start: float, end: float, output_path: str,
+             keyframes: list = None, on_progress=None) -> dict:
+    """
+    Writes the clip of the stored video at storage_path to output_path.
+    keyframes is the video's keyframe index (videos.keyframes), if it has one.
+    Returns {"read": "ranged" | "download", "method": "copy" | "smart" | "encode"}.
+    """
+
+    report = (lambda index, done: on_progress(done)) if on_progress else None
+    result = cut_clips(bucket, storage_path, [(start, end)], [output_path], keyframes, report)[0]
+
+    if "error" in result:
+        raise RuntimeError(f"Clip failed: {result['error']}")
+    return result
@@ -1,15 +1,59 @@
+"""
+database.py
+
+PostgreSQL connection management for the CoachAssist backend.
+
+Provides:
+- A process-wide connection pool sized by DB_POOL_MIN / DB_POOL_MAX
+- Health checks for connections that sat idle, and max-lifetime recycling
+- get_db(): yield-based FastAPI dependency that always returns its connection
+- open_connection() / get_connection(): pooled connections for code outside
+  the request cycle (background tasks, scripts)
+- open_dedicated_connection(): an unpooled autocommit connection (LISTEN)
+- pool_stats(): counters describing the pool, for monitoring
+- Every connection records its statements for per-request query stats
+  (see query_stats.py)
+
+Connections are handed out wrapped in PooledConnection. Calling close() on
+one gives it back to the pool instead of closing the socket, so existing
+`db.close()` calls keep working.
+"""
+
 import psycopg2
 import psycopg2.extras
+import psycopg2.extensions
 import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from fastapi import HTTPException
+from backend.query_stats import InstrumentedConnection
 
 load_dotenv()
 
-def get_db():
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within DB_POOL_TIMEOUT seconds."""
+
+
+def _connect():
+    """
+    Opens a brand-new physical connection using the environment settings.
+    Rows are returned as dictionaries (RealDictCursor).
+    """
+
     database_url = os.getenv("DATABASE_URL")
 
     if database_url:
-        conn = psycopg2.connect(database_url, cursor_factory=psycopg2.extras.RealDictCursor)
+        conn = psycopg2.connect(
+            database_url,
+            connection_factory=InstrumentedConnection,
+            cursor_factory=psycopg2.extras.RealDictCursor
+        )
         conn.autocommit = True
         return conn
     else:
@@ -19,7 +63,351 @@ def get_db():
             user=os.getenv("PGUSER"),
             password=os.getenv("PGPASSWORD"),
             sslmode="require",
+            connection_factory=InstrumentedConnection,
             cursor_factory=psycopg2.extras.RealDictCursor
         )
 
     return conn
+
+
+class PooledConnection:
+    """
+    Thin proxy around a psycopg2 connection checked out of the pool.
+
+    Everything is delegated to the real connection except close(),
+    which returns the connection to the pool. close() is idempotent.
+    """
+
+    def __init__(self, pool, raw):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_raw", raw)
+
+    def __getattr__(self, name):
+        raw = object.__getattribute__(self, "_raw")
+        if raw is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw, name, value)
+
+    @property
+    def closed(self):
+        return self._raw is None or self._raw.closed
+
+    def close(self):
+        raw = self._raw
+        if raw is None:
+            return
+        object.__setattr__(self, "_raw", None)
+        self._pool.putconn(raw)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    - Blocks up to `timeout` seconds when all `maxconn` connections are busy
+    - Pings connections idle for longer than `healthcheck_after` seconds
+      before handing them out, and replaces dead ones
+    - Recycles connections older than `max_lifetime` seconds
+    - Rolls back any transaction left open when a connection is returned
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=10, timeout=30.0,
+                 max_lifetime=1800.0, healthcheck_after=30.0):
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.healthcheck_after = healthcheck_after
+
+        self._cond = threading.Condition()
+        self._idle = []         # [(conn, created_at, last_used)], most recent last
+        self._created_at = {}   # id(conn) -> creation time
+        self._size = 0          # open connections (idle + in use + being opened)
+        self._in_use = 0
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_recycled": 0,
+            "healthcheck_failures": 0,
+            "wait_time_total": 0.0,
+        }
+
+        for _ in range(minconn):
+            try:
+                conn = self._open()
+            except psycopg2.Error as e:
+                logger.warning(f"[DB POOL] Could not pre-open connection: {e}")
+                break
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, self._created_at[id(conn)], time.monotonic()))
+
+    # ---------- internals ----------
+
+    def _open(self):
+        conn = self._connect()
+        self._created_at[id(conn)] = time.monotonic()
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _discard(self, conn):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    # ---------- public API ----------
+
+    def getconn(self):
+        """
+        Returns a PooledConnection, opening a new physical connection
+        if the pool is below maxconn, otherwise waiting for one to be returned.
+        """
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        while True:
+            candidate = None
+            must_open = False
+
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+
+                while candidate is None and not must_open:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                    elif self._size < self.maxconn:
+                        self._size += 1
+                        must_open = True
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout(
+                                f"No database connection available after {self.timeout}s"
+                            )
+                        waited = True
+                        self._cond.wait(remaining)
+
+            if must_open:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                break
+
+            conn, created_at, last_used = candidate
+            now = time.monotonic()
+
+            if conn.closed or now - created_at > self.max_lifetime:
+                with self._cond:
+                    self._stats["connections_recycled"] += 1
+                self._discard(conn)
+                continue
+
+            if now - last_used > self.healthcheck_after and not self._is_healthy(conn):
+                logger.warning("[DB POOL] Dropping connection that failed its health check")
+                with self._cond:
+                    self._stats["healthcheck_failures"] += 1
+                self._discard(conn)
+                continue
+
+            break
+
+        with self._cond:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_time_total"] += time.monotonic() - started
+
+        return PooledConnection(self, conn)
+
+    def putconn(self, conn):
+        """
+        Takes a physical connection back.
+        Open transactions are rolled back; broken or expired connections are dropped.
+        """
+
+        with self._cond:
+            self._in_use -= 1
+
+        if self._closed or conn.closed:
+            self._discard(conn)
+            return
+
+        try:
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn)
+                return
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            self._discard(conn)
+            return
+
+        created_at = self._created_at.get(id(conn), 0)
+        if time.monotonic() - created_at > self.max_lifetime:
+            with self._cond:
+                self._stats["connections_recycled"] += 1
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        """Closes every idle connection and refuses further checkouts."""
+
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+            })
+        return stats
+
+
+#=== PROCESS-WIDE POOL ===
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the shared pool, creating it on first use so that
+    environment variables loaded by main.py are picked up.
+    """
+
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    minconn=int(os.getenv("DB_POOL_MIN", "1")),
+                    maxconn=int(os.getenv("DB_POOL_MAX", "10")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                    max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+                    healthcheck_after=float(os.getenv("DB_POOL_HEALTHCHECK_AFTER", "30")),
+                )
+
+    return _pool
+
+
+def close_pool():
+    """Closes the shared pool (called on application shutdown)."""
+
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def pool_stats() -> dict:
+    """Returns the shared pool's counters, or an empty dict if it was never used."""
+
+    return _pool.stats() if _pool is not None else {}
+
+
+def open_connection():
+    """
+    Checks a connection out of the pool for code that is not a route handler.
+    The caller must close() it to hand it back.
+    """
+
+    return get_pool().getconn()
+
+
+def open_dedicated_connection():
+    """
+    Opens a connection that is not part of the pool, in autocommit mode.
+    Meant for long-lived sessions such as LISTEN; the caller closes it.
+    """
+
+    conn = _connect()
+    conn.autocommit = True
+    return conn
+
+
+@contextmanager
+def get_connection():
+    """
+    Context-manager form of open_connection().
+
+    Usage:
+        with get_connection() as db:
+            cur = db.cursor()
+            ...
+    """
+
+    conn = open_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_db():
+    """
+    FastAPI dependency yielding a pooled connection for the current request.
+
+    The connection is always returned to the pool once the request is done,
+    even if the handler raised.
+    """
+
+    try:
+        conn = get_pool().getconn()
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Database is busy, please retry")
+
+    try:
+        yield conn
+    finally:
+        conn.close()
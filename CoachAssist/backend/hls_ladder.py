@@ -0,0 +1,168 @@
+"""
+hls_ladder.py
+
+Adaptive-bitrate HLS renditions of stored game film.
+
+Building (run by the "hls" job in media_jobs.py after an upload is stored):
+- one ffmpeg pass encodes every rendition of HLS_RENDITIONS that is not
+  taller than the source (always at least the smallest one)
+- keyframes are forced every HLS_SEGMENT_SECONDS in all renditions, so
+  segment boundaries line up and players can switch between them at any
+  segment
+- the ladder is stored next to the original, under "<file>_hls/":
+  master.m3u8, v0/index.m3u8, v0/seg_00000.ts, ...
+- videos.hls_path points at that prefix once every file is stored
+
+Serving:
+- storage objects are private, and a signed URL only covers one object,
+  so players cannot follow relative links in a manifest from storage
+- the API serves the playlists instead (GET .../videos/{id}/hls/...):
+  the master playlist links the renditions back to the API, and each
+  rendition playlist links its segments as signed storage URLs, so the
+  segments themselves never go through the API
+- native players (Safari, iOS) cannot send the Bearer header, so the
+  playlist URL carries a media token (media_storage.py) scoped to one video
+"""
+
+import os
+import re
+import logging
+
+from backend.metrics import external_call
+from backend.ingest_planner import FFMPEG_BIN, probe, run_ffmpeg
+from backend.media_storage import sign_url, cached
+
+logger = logging.getLogger(__name__)
+
+# "height:video bitrate", tallest first
+RENDITIONS = [
+    (int(height), bitrate)
+    for height, bitrate in (
+        entry.split(":") for entry in os.getenv("HLS_RENDITIONS", "720:2800k,480:1200k,360:600k").split(",")
+    )
+]
+SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "4"))
+AUDIO_BITRATE = os.getenv("HLS_AUDIO_BITRATE", "128k")
+
+MASTER = "master.m3u8"
+PLAYLIST_NAME = re.compile(r"^(master\.m3u8|v\d+/index\.m3u8)$")
+
+
+def hls_prefix(storage_path: str) -> str:
+    return os.path.splitext(storage_path)[0] + "_hls"
+
+
+#=== BUILD ===
+
+def ladder_for(source_height: int) -> list:
+    """Renditions no taller than the source; a small source gets one at its own height."""
+
+    ladder = [r for r in RENDITIONS if r[0] <= source_height]
+    if ladder:
+        return ladder
+
+    height, bitrate = min(RENDITIONS)
+    if source_height:
+        height = min(height, source_height - source_height % 2)   # x264 needs even sizes
+    return [(height, bitrate)]
+
+
+def _ffmpeg_args(input_path: str, output_dir: str, ladder: list, has_audio: bool) -> list:
+    count = len(ladder)
+
+    split = f"[0:v]split={count}" + "".join(f"[s{i}]" for i in range(count))
+    scales = [f"[s{i}]scale=-2:{height}[v{i}]" for i, (height, _) in enumerate(ladder)]
+
+    args = [
+        FFMPEG_BIN, "-y",
+        "-i", input_path,
+        "-progress", "pipe:1", "-nostats",
+        "-filter_complex", ";".join([split] + scales),
+    ]
+
+    for i, (_, bitrate) in enumerate(ladder):
+        rate = int(bitrate.rstrip("k"))
+        args += [
+            "-map", f"[v{i}]",
+            f"-b:v:{i}", bitrate,
+            f"-maxrate:v:{i}", f"{int(rate * 1.1)}k",
+            f"-bufsize:v:{i}", f"{rate * 2}k",
+        ]
+
+    if has_audio:
+        for _ in ladder:
+            args += ["-map", "0:a:0"]
+        args += ["-c:a", "aac", "-b:a", AUDIO_BITRATE, "-ac", "2"]
+
+    streams = " ".join(
+        f"v:{i},a:{i}" if has_audio else f"v:{i}" for i in range(count)
+    )
+
+    return args + [
+        "-c:v", "libx264",
+        "-preset", "veryfast",
+        "-pix_fmt", "yuv420p",
+        # same keyframes in every rendition -> aligned segments
+        "-force_key_frames", f"expr:gte(t,n_forced*{SEGMENT_SECONDS})",
+        "-sc_threshold", "0",
+        "-f", "hls",
+        "-hls_time", str(SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_flags", "independent_segments",
+        "-hls_segment_filename", os.path.join(output_dir, "v%v", "seg_%05d.ts"),
+        "-master_pl_name", MASTER,
+        "-var_stream_map", streams,
+        os.path.join(output_dir, "v%v", "index.m3u8"),
+    ]
+
+
+def build_ladder(input_path: str, output_dir: str, on_progress=None) -> list:
+    """
+    Encodes the ladder of input_path into output_dir.
+    on_progress(fraction) is called as the encode advances.
+    Returns the renditions built, as (height, bitrate).
+    """
+
+    info = probe(input_path)
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    has_audio = any(s.get("codec_type") == "audio" for s in streams)
+    duration = float(info.get("format", {}).get("duration") or 0)
+
+    if video is None:
+        raise ValueError("No video stream found")
+
+    ladder = ladder_for(int(video.get("height") or 0))
+    args = _ffmpeg_args(input_path, output_dir, ladder, has_audio)
+
+    run_ffmpeg(args, duration, on_progress)
+
+    return ladder
+
+
+#=== SERVE ===
+
+def render_playlist(bucket, prefix: str, name: str, token: str) -> str:
+    """
+    Reads a stored playlist and points its links where the player can
+    fetch them: renditions back at the API (with the token), segments at
+    signed storage URLs.
+    """
+
+    def build():
+        with external_call("firebase", "download"):
+            text = bucket.blob(f"{prefix}/{name}").download_as_text()
+
+        folder = os.path.dirname(name)
+        lines = []
+        for line in text.splitlines():
+            if line and not line.startswith("#"):
+                if name == MASTER:
+                    line = f"{line}?token={token}"
+                else:
+                    line = sign_url(bucket, f"{prefix}/{folder}/{line}")
+            lines.append(line)
+
+        return "\n".join(lines) + "\n"
+
+    return cached(("hls", prefix, name, token), build)
@@ -0,0 +1,276 @@
+"""
+ingest_planner.py
+
+Decides how little work an upload needs to become a browser-playable,
+streamable MP4 (H.264 video, AAC audio, moov atom before the media data).
+
+ffprobe reads the codecs, then plan_ingest() picks one of:
+- copy:   already an MP4 that browsers play and can start streaming at once;
+          stored as-is
+- remux:  codecs are fine, only the container is not (.mov, .mkv, ...) or the
+          MP4 keeps its index at the end; streams are copied into a new MP4
+          (-c copy -movflags +faststart), which takes seconds, not minutes
+- audio:  video is fine, audio is not (e.g. MP3 / PCM / AC-3); the video is
+          copied and only the audio is encoded to AAC
+- encode: full libx264 + AAC encode, only when the video itself is not
+          playable (HEVC, MPEG-4 Part 2, 10-bit, ...)
+
+The plan's step ("remuxing", "transcoding_audio", "encoding") is reported as
+the job step while it runs.
+
+Mp4BoxScanner finds out whether an MP4 is faststart while it is being
+streamed, so the API only hands such uploads to a worker when they need it.
+"""
+
+import os
+import json
+import struct
+import logging
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+
+# what every browser (including Safari / iOS) plays from an MP4
+BROWSER_VIDEO_CODECS = {"h264"}
+BROWSER_PIXEL_FORMATS = {"yuv420p", "yuvj420p"}
+BROWSER_AUDIO_CODECS = {"aac"}
+
+MP4_EXTENSIONS = {".mp4", ".m4v"}
+
+AUDIO_BITRATE = os.getenv("INGEST_AUDIO_BITRATE", "160k")
+
+STEPS = {
+    "copy": "storing",
+    "remux": "remuxing",
+    "audio": "transcoding_audio",
+    "encode": "encoding",
+}
+
+
+class NotAVideo(ValueError):
+    """The file has no video stream ffprobe can read."""
+
+
+#=== MP4 BOX LAYOUT ===
+
+class Mp4BoxScanner:
+    """
+    Walks the top-level MP4 boxes of a byte stream, chunk by chunk, until it
+    meets moov or mdat. moov_first is then True (faststart) or False; it
+    stays None if the stream ended first or is not an MP4.
+    Only box headers are looked at; nothing is buffered.
+    """
+
+    def __init__(self):
+        self.moov_first = None
+        self._seen = 0          # bytes fed so far
+        self._next = 0          # offset of the next box header
+        self._header = b""      # header bytes of that box collected so far
+        self._done = False
+
+    def feed(self, chunk: bytes):
+        if self._done:
+            return
+
+        start = self._seen
+        self._seen += len(chunk)
+
+        while self._next + len(self._header) < self._seen:
+            begin = self._next + len(self._header) - start
+            self._header += chunk[begin:begin + 16 - len(self._header)]
+            if len(self._header) < 8:
+                return
+
+            size, kind = struct.unpack(">I4s", self._header[:8])
+            if size == 1:
+                if len(self._header) < 16:
+                    return
+                size = struct.unpack(">Q", self._header[8:16])[0]
+
+            if kind in (b"moov", b"mdat"):
+                self.moov_first = kind == b"moov"
+                self._done = True
+                return
+
+            # size 0 = "box runs to the end of the file"; < 8 is corrupt
+            if size < 8:
+                self._done = True
+                return
+
+            self._next += size
+            self._header = b""
+
+
+def is_faststart(path: str) -> bool:
+    """True if the MP4 file at path has its moov box before mdat."""
+
+    offset = 0
+    with open(path, "rb") as f:
+        while True:
+            # read just the header, then jump over the box
+            f.seek(offset)
+            header = f.read(16)
+            if len(header) < 8:
+                return False
+
+            size, kind = struct.unpack(">I4s", header[:8])
+            if size == 1:
+                if len(header) < 16:
+                    return False
+                size = struct.unpack(">Q", header[8:16])[0]
+
+            if kind in (b"moov", b"mdat"):
+                return kind == b"moov"
+            if size < 8:
+                return False
+
+            offset += size
+
+
+#=== FFMPEG ===
+
+def run_ffmpeg(args: list, duration: float = 0, on_progress=None):
+    """
+    Runs an ffmpeg command that includes "-progress pipe:1 -nostats".
+    on_progress(fraction) follows the output time against duration.
+    """
+
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    # ffmpeg writes stderr continuously; drain it so the pipe never blocks it
+    stderr_tail = []
+    drain = threading.Thread(target=lambda: stderr_tail.extend(process.stderr.readlines()[-20:]), daemon=True)
+    drain.start()
+
+    for line in process.stdout:
+        # -progress reports out_time_us (older builds: out_time_ms, also in us)
+        key, _, value = line.strip().partition("=")
+        if key in ("out_time_us", "out_time_ms") and duration and on_progress and value.isdigit():
+            on_progress(min(int(value) / 1_000_000 / duration, 1.0))
+
+    process.wait()
+    drain.join()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"FFmpeg failed: {''.join(stderr_tail)}")
+
+
+#=== PROBE + PLAN ===
+
+def probe(path: str) -> dict:
+    result = subprocess.run([
+        FFPROBE_BIN,
+        "-v", "error",
+        "-show_streams",
+        "-show_format",
+        "-of", "json",
+        path
+    ], capture_output=True)
+
+    if result.returncode != 0:
+        raise NotAVideo(f"ffprobe could not read the file: {result.stderr.decode()[:200]}")
+
+    return json.loads(result.stdout or b"{}")
+
+
+def plan_ingest(path: str, ext: str) -> dict:
+    """
+    Returns {"action", "step", "reason"} for the upload at path, whose
+    original extension is ext.
+    """
+
+    info = probe(path)
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not s.get("disposition", {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    if video is None:
+        raise NotAVideo("No video stream found")
+
+    video_ok = (
+        video.get("codec_name") in BROWSER_VIDEO_CODECS
+        and video.get("pix_fmt") in BROWSER_PIXEL_FORMATS
+    )
+    audio_ok = audio is None or audio.get("codec_name") in BROWSER_AUDIO_CODECS
+
+    codecs = f"{video.get('codec_name')}/{video.get('pix_fmt')}"
+    if audio is not None:
+        codecs += f" + {audio.get('codec_name')}"
+
+    if not video_ok:
+        action, reason = "encode", f"{codecs}: video needs encoding"
+    elif not audio_ok:
+        action, reason = "audio", f"{codecs}: audio needs encoding"
+    elif ext not in MP4_EXTENSIONS:
+        action, reason = "remux", f"{codecs} in {ext}: container only"
+    elif not is_faststart(path):
+        action, reason = "remux", f"{codecs}: moov after mdat"
+    else:
+        action, reason = "copy", f"{codecs}: ready to stream"
+
+    return {"action": action, "step": STEPS[action], "reason": reason}
+
+
+#=== APPLY ===
+
+def _ffmpeg_args(action: str, input_path: str, output_path: str) -> list:
+    if action == "encode":
+        codec_args = [
+            "-c:v", "libx264",
+            "-preset", "fast",
+            "-crf", "23",
+            "-pix_fmt", "yuv420p",
+            "-c:a", "aac",
+        ]
+    elif action == "audio":
+        codec_args = ["-c:v", "copy", "-c:a", "aac", "-b:a", AUDIO_BITRATE]
+    else:
+        codec_args = ["-c", "copy"]
+
+    return [
+        FFMPEG_BIN,
+        "-y",  # overwrite if exists
+        "-i", input_path,
+        # first video + first audio only: subtitle / data tracks of .mkv / .mov
+        # cannot always be copied into MP4
+        "-map", "0:v:0",
+        "-map", "0:a:0?",
+        *codec_args,
+        "-movflags", "+faststart",
+        output_path
+    ]
+
+
+def apply_plan(input_path: str, plan: dict, on_step=None) -> str:
+    """
+    Produces the MP4 for a plan and returns its path (input_path itself for
+    "copy"). A failed stream copy falls back to a full encode, since some
+    containers carry streams ffmpeg cannot copy into MP4 as-is;
+    on_step(step), if given, is called with the encode's step when it does.
+    """
+
+    if plan["action"] == "copy":
+        return input_path
+
+    output_path = input_path + "_converted.mp4"
+    result = subprocess.run(_ffmpeg_args(plan["action"], input_path, output_path), capture_output=True)
+
+    if result.returncode != 0 and plan["action"] != "encode":
+        logger.warning(
+            f"[INGEST] {plan['action']} failed, falling back to a full encode: "
+            f"{result.stderr.decode()[-300:]}"
+        )
+        plan.update(action="encode", step=STEPS["encode"], reason=plan["reason"] + " (copy failed)")
+        if on_step:
+            on_step(plan["step"])
+        result = subprocess.run(_ffmpeg_args("encode", input_path, output_path), capture_output=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg conversion failed: {result.stderr.decode()}")
+
+    return output_path
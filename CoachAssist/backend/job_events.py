@@ -0,0 +1,164 @@
+"""
+job_events.py
+
+Server push of job progress (GET /jobs/events, routers/jobs.py).
+
+- A trigger on upload_jobs / upscale_jobs (migrations/create_job_events.py)
+  NOTIFYs the job_progress channel whenever a row's status, progress or
+  step changes, whichever process wrote it: the API (streamed uploads),
+  a worker, or the queue itself (claims, retries). Progress writes are
+  already coalesced by ProgressReporter, so that is at most every
+  JOB_PROGRESS_STEP points. Batch items are not in the payload (NOTIFY
+  payloads must be under 8000 bytes), only has_items; the stream reads them.
+- Each API process keeps ONE listening connection (JobEventHub) and fans
+  the notifications out to the open event streams of the job's owner.
+  No table polling: the database is only read when a stream opens and
+  when it has to resynchronise.
+
+A subscriber whose queue (JOB_EVENTS_QUEUE events) fills up, or that was
+connected while the listener reconnected, is flagged for a resync: the
+stream sends a fresh snapshot instead of the events it missed.
+"""
+
+import os
+import json
+import asyncio
+import logging
+
+from backend.async_database import open_dedicated_async_connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "job_progress"
+
+QUEUE_SIZE = int(os.getenv("JOB_EVENTS_QUEUE", "100"))
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+
+class Subscription:
+    """One open event stream."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.needs_resync = False
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.needs_resync = True
+
+    def resync(self):
+        """Drops queued events and wakes the stream up to send a snapshot."""
+
+        self.needs_resync = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class JobEventHub:
+    """
+    Listens on the job_progress channel and routes each event to the
+    subscriptions of its user.
+    """
+
+    def __init__(self):
+        self._subscriptions = {}    # user_id -> set of Subscription
+        self._task = None
+        self._connected = asyncio.Event()
+
+    #=== LIFECYCLE ===
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "listening": self._connected.is_set(),
+            "users": len(self._subscriptions),
+            "streams": sum(len(subs) for subs in self._subscriptions.values()),
+        }
+
+    #=== SUBSCRIPTIONS ===
+
+    def subscribe(self, user_id: int) -> Subscription:
+        self.start()
+        subscription = Subscription(user_id)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subs = self._subscriptions.get(subscription.user_id)
+        if subs is None:
+            return
+        subs.discard(subscription)
+        if not subs:
+            del self._subscriptions[subscription.user_id]
+
+    def publish(self, event: dict):
+        for subscription in list(self._subscriptions.get(event.get("user_id"), ())):
+            subscription.push(event)
+
+    #=== LISTENER ===
+
+    async def _listen(self):
+        delay = RECONNECT_DELAY
+        first = True
+
+        while True:
+            try:
+                conn = await open_dedicated_async_connection()
+            except Exception as e:
+                logger.warning(f"[JOB EVENTS] Could not connect, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                continue
+
+            try:
+                await conn.execute(f"LISTEN {CHANNEL}")
+                self._connected.set()
+                delay = RECONNECT_DELAY
+
+                # events sent while we were not listening are lost
+                if not first:
+                    for subs in self._subscriptions.values():
+                        for subscription in subs:
+                            subscription.resync()
+                first = False
+
+                async for notify in conn.notifies():
+                    try:
+                        event = json.loads(notify.payload)
+                    except ValueError:
+                        logger.warning(f"[JOB EVENTS] Ignoring malformed payload: {notify.payload[:200]}")
+                        continue
+                    self.publish(event)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[JOB EVENTS] Listener connection lost: {e}")
+            finally:
+                self._connected.clear()
+                try:
+                    await conn.close()
+                except Exception:
+                    pass
+
+            await asyncio.sleep(delay)
+
+
+hub = JobEventHub()
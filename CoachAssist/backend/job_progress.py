@@ -0,0 +1,242 @@
+"""
+job_progress.py
+
+Coalesced progress reporting for background jobs (upload_jobs, upscale_jobs).
+
+Pipelines report every change to a ProgressReporter, which keeps the latest
+status/progress/step in memory and writes to the database only when:
+- the status or step changes (stage change)
+- progress has moved JOB_PROGRESS_STEP points since the last write
+- progress has moved at all and JOB_PROGRESS_INTERVAL seconds have passed
+
+record() updates the in-memory state for changes written by someone else
+(the job queue marks retries and failures itself).
+
+A job handler's last write (status "done") is made with final=True: it is
+always written and raises on failure, so the worker retries the job instead
+of releasing it with the handler's work rolled back.
+
+Batch jobs (clip_batch) also report items: one {"status", "progress"} per
+item, stored in item_progress. An item changing status is a stage change;
+item progress is written along with the job's overall progress.
+
+Status endpoints call live_status() first: the in-memory value is never
+older than the row, so the database is only read for jobs running in
+another process (or finished a while ago).
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_STEP = int(os.getenv("JOB_PROGRESS_STEP", "5"))
+PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "2"))
+RETAIN_FINISHED = float(os.getenv("JOB_PROGRESS_RETAIN", "120"))    # seconds
+RETAIN_STALE = 3600.0
+
+TERMINAL = {"done", "failed"}
+
+_UPDATE_SQL = {
+    table: f"""
+        UPDATE {table}
+        SET status = COALESCE(%s, status),
+            progress = COALESCE(%s, progress),
+            step = COALESCE(%s, step),
+            item_progress = COALESCE(%s::jsonb, item_progress)
+        WHERE id = %s
+    """
+    for table in ("upload_jobs", "upscale_jobs")
+}
+
+# (table, job_id) -> {"user_id", "status", "progress", "step", "items", "updated_at"}
+_live = {}
+_lock = threading.Lock()
+
+
+def live_status(table: str, job_id: int, user_id: int):
+    """
+    Latest in-memory {"status", "progress", "step", "items"} of a job owned
+    by user_id, or None when this process is not tracking it.
+    """
+
+    with _lock:
+        entry = _live.get((table, job_id))
+        if entry is None or entry["user_id"] != user_id:
+            return None
+        return {
+            "status": entry["status"],
+            "progress": entry["progress"],
+            "step": entry["step"],
+            "items": entry["items"],
+        }
+
+
+def _item_statuses(items):
+    return [item.get("status") for item in items] if items else None
+
+
+def _purge(now):
+    for key, entry in list(_live.items()):
+        age = now - entry["updated_at"]
+        if (entry["status"] in TERMINAL and age > RETAIN_FINISHED) or age > RETAIN_STALE:
+            del _live[key]
+
+
+class ProgressReporter:
+    """
+    Reports one job's progress.
+
+    Sync pipelines (psycopg2):
+        progress = ProgressReporter("upload_jobs", job_id, user_id, cur, db)
+        progress.update(status="processing", progress=10, step="uploading")
+        progress.update(status="done", progress=100, step="completed", final=True)
+        progress.failed(str(e))
+
+    Async routes (psycopg 3):
+        progress = ProgressReporter("upload_jobs", job_id, user_id)
+        await progress.update_async(db, progress=40, step="uploading")
+        await progress.update_async(None, progress=45)    # borrows a connection if a write is due
+    """
+
+    def __init__(self, table: str, job_id: int, user_id: int, cur=None, db=None):
+        if table not in _UPDATE_SQL:
+            raise ValueError(f"Unknown job table: {table}")
+
+        self.table = table
+        self.job_id = job_id
+        self.user_id = user_id
+        self.cur = cur
+        self.db = db
+
+        self.status = None
+        self.progress = None
+        self.step = None
+        self.items = None
+        self.writes = 0
+
+        self._written = {"status": None, "progress": None, "step": None, "items": None}
+        self._written_at = 0.0
+
+    #=== STATE ===
+
+    def _apply(self, status, progress, step, items=None) -> bool:
+        """
+        Records the update in memory. Returns True when a database
+        write is due.
+        """
+
+        now = time.monotonic()
+
+        if status is not None:
+            self.status = status
+        if progress is not None:
+            self.progress = progress
+        if step is not None:
+            self.step = step
+        if items is not None:
+            self.items = [dict(item) for item in items]
+
+        with _lock:
+            _purge(now)
+            _live[(self.table, self.job_id)] = {
+                "user_id": self.user_id,
+                "status": self.status,
+                "progress": self.progress,
+                "step": self.step,
+                "items": self.items,
+                "updated_at": now,
+            }
+
+        written = self._written
+        stage_changed = (
+            self.status != written["status"]
+            or self.step != written["step"]
+            or _item_statuses(self.items) != _item_statuses(written["items"])
+        )
+        moved = (self.progress or 0) - (written["progress"] or 0)
+
+        due = (
+            stage_changed
+            or moved >= PROGRESS_STEP
+            or (moved > 0 and now - self._written_at >= PROGRESS_INTERVAL)
+        )
+        if not due:
+            return False
+
+        self._written = {"status": self.status, "progress": self.progress, "step": self.step, "items": self.items}
+        self._written_at = now
+        self.writes += 1
+        return True
+
+    def record(self, status=None, progress=None, step=None):
+        """
+        Records a state the caller already wrote to the row (e.g. the job
+        queue requeuing the job), so it is served and not written again.
+        """
+
+        self._written = {
+            "status": self.status if status is None else status,
+            "progress": self.progress if progress is None else progress,
+            "step": self.step if step is None else step,
+            "items": self.items,
+        }
+        self._written_at = time.monotonic()
+        self._apply(status, progress, step)
+
+    def _row(self):
+        # The full current state, so coalesced updates are not lost
+        items = json.dumps(self.items) if self.items is not None else None
+        return (self.status, self.progress, self.step, items, self.job_id)
+
+    #=== SYNC (psycopg2) ===
+
+    def update(self, status=None, progress=None, step=None, items=None, final=False):
+        """final=True: write even if not due, and raise if the write fails."""
+
+        if self._apply(status, progress, step, items) or final:
+            self._write_sync(final)
+
+    def failed(self, step: str):
+        """Marks the job failed, discarding the pipeline's open transaction."""
+
+        try:
+            self.db.rollback()
+        except Exception:
+            pass
+        self.update(status="failed", step=step[:100])
+
+    def _write_sync(self, final=False):
+        try:
+            self.cur.execute(_UPDATE_SQL[self.table], self._row())
+            self.db.commit()
+        except Exception as e:
+            if final:
+                raise
+            logger.error(f"[JOBS] Progress update failed for {self.table} job={self.job_id}: {e}", exc_info=True)
+            try:
+                self.db.rollback()
+            except Exception:
+                pass
+
+    #=== ASYNC (psycopg 3, autocommit) ===
+
+    async def update_async(self, db, status=None, progress=None, step=None, items=None):
+        """db=None borrows a pooled connection for the write only (long requests hold none)."""
+
+        if not self._apply(status, progress, step, items):
+            return
+
+        try:
+            if db is None:
+                from backend.async_database import async_connection
+
+                async with async_connection() as db:
+                    await db.execute(_UPDATE_SQL[self.table], self._row())
+            else:
+                await db.execute(_UPDATE_SQL[self.table], self._row())
+        except Exception as e:
+            logger.error(f"[JOBS] Progress update failed for {self.table} job={self.job_id}: {e}", exc_info=True)
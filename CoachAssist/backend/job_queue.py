@@ -0,0 +1,297 @@
+"""
+job_queue.py
+
+Postgres-backed queue for media jobs, stored in the existing job tables:
+- upload_jobs: "upload" (convert + store a staged original), "hls"
+  (streaming renditions of a stored upload), "preview" (its poster,
+  thumbnails and keyframe index), "clip" and "clip_batch" jobs
+- upscale_jobs: "upscale" jobs
+
+Each row is both the job and its progress record. Queue columns (see
+migrations/create_job_queue.py): job_type, payload, attempts, max_attempts,
+run_after, locked_by, lease_expires_at, heartbeat_at, last_error.
+
+Life of a job:
+- enqueue_job() / enqueue_job_async() insert it as 'queued' and NOTIFY
+  the media_jobs channel so idle workers wake up at once;
+  hand_off_job_async() queues a job the API had been running itself
+- claim_job() takes the oldest runnable job of one type with
+  SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never pick the
+  same row, and gives the worker a lease of JOB_LEASE_SECONDS
+- heartbeat() extends the leases of running jobs; a job whose lease ran
+  out (worker crashed or lost its connection) is claimed again
+- release_job() clears the lease once the handler finished the job
+- retry_or_fail() requeues a failed attempt with exponential backoff
+  (JOB_RETRY_BACKOFF * 2^(attempt-1) seconds) or marks the job failed
+  once it used max_attempts (JOB_MAX_ATTEMPTS)
+- reap_expired() fails jobs whose last allowed attempt lost its lease
+
+All functions take a psycopg2 cursor (RealDictCursor) and leave committing
+to the caller, except the async enqueue (psycopg 3, autocommit pool).
+"""
+
+import os
+import json
+
+CHANNEL = "media_jobs"
+
+JOB_TABLES = {
+    "upload": "upload_jobs",
+    "clip": "upload_jobs",
+    "clip_batch": "upload_jobs",
+    "hls": "upload_jobs",
+    "preview": "upload_jobs",
+    "upscale": "upscale_jobs",
+}
+
+# queued for every newly stored upload, cheapest first
+INGEST_FOLLOW_UPS = ("preview", "hls")
+
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "30"))   # seconds, doubled per attempt
+
+
+class JobFailed(Exception):
+    """Raised by a job handler for errors that retrying cannot fix."""
+
+
+def job_table(job_type: str) -> str:
+    if job_type not in JOB_TABLES:
+        raise ValueError(f"Unknown job type: {job_type}")
+    return JOB_TABLES[job_type]
+
+
+#=== ENQUEUE ===
+
+_INSERT_SQL = """
+    INSERT INTO {table} (
+        video_id, user_id, team_id, match_id,
+        status, progress, step,
+        job_type, payload, max_attempts
+    )
+    VALUES (%s, %s, %s, %s, 'queued', 0, 'queued', %s, %s::jsonb, %s)
+    RETURNING id
+"""
+
+_NOTIFY_SQL = "SELECT pg_notify(%s, %s)"
+
+
+def _insert_params(job_type, video_id, user_id, team_id, match_id, payload):
+    return (
+        video_id, user_id, team_id, match_id,
+        job_type, json.dumps(payload or {}), MAX_ATTEMPTS,
+    )
+
+
+def enqueue_job(cur, job_type: str, video_id: int, user_id: int, team_id: int,
+                match_id: int, payload: dict = None) -> int:
+    """
+    Queues a job and returns its id. Workers are notified when the
+    caller's transaction commits.
+    """
+
+    cur.execute(
+        _INSERT_SQL.format(table=job_table(job_type)),
+        _insert_params(job_type, video_id, user_id, team_id, match_id, payload)
+    )
+    job_id = cur.fetchone()["id"]
+    cur.execute(_NOTIFY_SQL, (CHANNEL, job_type))
+    return job_id
+
+
+async def enqueue_job_async(db, job_type: str, video_id: int, user_id: int, team_id: int,
+                            match_id: int, payload: dict = None) -> int:
+    """enqueue_job() for an async (psycopg 3) connection."""
+
+    cur = await db.execute(
+        _INSERT_SQL.format(table=job_table(job_type)),
+        _insert_params(job_type, video_id, user_id, team_id, match_id, payload)
+    )
+    job_id = (await cur.fetchone())["id"]
+    await db.execute(_NOTIFY_SQL, (CHANNEL, job_type))
+    return job_id
+
+
+_HAND_OFF_SQL = """
+    UPDATE {table}
+    SET status = 'queued',
+        progress = 0,
+        step = 'queued',
+        job_type = %s,
+        payload = %s::jsonb,
+        attempts = 0,
+        max_attempts = %s,
+        run_after = NOW()
+    WHERE id = %s
+"""
+
+
+async def hand_off_job_async(db, job_type: str, job_id: int, payload: dict):
+    """
+    Queues an existing job row (e.g. a streamed upload that turned out to
+    need processing) for a worker, with a fresh attempt budget.
+    """
+
+    await db.execute(
+        _HAND_OFF_SQL.format(table=job_table(job_type)),
+        (job_type, json.dumps(payload), MAX_ATTEMPTS, job_id)
+    )
+    await db.execute(_NOTIFY_SQL, (CHANNEL, job_type))
+
+
+#=== WORKER SIDE ===
+
+_CLAIM_SQL = """
+    UPDATE {table}
+    SET status = 'processing',
+        attempts = attempts + 1,
+        locked_by = %(worker)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease)s),
+        heartbeat_at = NOW()
+    WHERE id = (
+        SELECT id
+        FROM {table}
+        WHERE job_type = %(job_type)s
+          AND attempts < max_attempts
+          AND (
+                (status = 'queued' AND run_after <= NOW())
+             OR (status = 'processing' AND lease_expires_at < NOW())
+          )
+        ORDER BY run_after, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING *
+"""
+
+
+def claim_job(cur, job_type: str, worker_id: str, lease_seconds: float = LEASE_SECONDS):
+    """
+    Claims the next runnable job of `job_type` for worker_id.
+    Returns the job row (a dict), or None when there is nothing to do.
+    """
+
+    cur.execute(
+        _CLAIM_SQL.format(table=job_table(job_type)),
+        {"worker": worker_id, "lease": lease_seconds, "job_type": job_type}
+    )
+    return cur.fetchone()
+
+
+def heartbeat(cur, table: str, job_ids: list, worker_id: str,
+              lease_seconds: float = LEASE_SECONDS) -> set:
+    """
+    Extends the leases worker_id holds on job_ids.
+    Returns the ids still held (a job missing from it was reclaimed).
+    """
+
+    cur.execute(
+        f"""
+        UPDATE {table}
+        SET lease_expires_at = NOW() + make_interval(secs => %s),
+            heartbeat_at = NOW()
+        WHERE id = ANY(%s)
+          AND locked_by = %s
+          AND status = 'processing'
+        RETURNING id
+        """,
+        (lease_seconds, list(job_ids), worker_id)
+    )
+    return {row["id"] for row in cur.fetchall()}
+
+
+def release_job(cur, job: dict, worker_id: str):
+    """Drops the lease of a job its handler finished."""
+
+    cur.execute(
+        f"""
+        UPDATE {job_table(job["job_type"])}
+        SET locked_by = NULL,
+            lease_expires_at = NULL
+        WHERE id = %s AND locked_by = %s
+        """,
+        (job["id"], worker_id)
+    )
+
+
+def retry_or_fail(cur, job: dict, worker_id: str, error: str, permanent: bool = False):
+    """
+    Handles a failed attempt: requeues the job with backoff, or marks it
+    failed when `permanent` is set or no attempts are left.
+
+    Returns the row's new {"status", "progress", "step"}, or None when
+    the worker no longer held the lease.
+    """
+
+    cur.execute(
+        f"""
+        UPDATE {job_table(job["job_type"])}
+        SET status = CASE WHEN %(permanent)s OR attempts >= max_attempts
+                          THEN 'failed' ELSE 'queued' END,
+            step = CASE WHEN %(permanent)s OR attempts >= max_attempts
+                        THEN %(step)s
+                        ELSE 'retrying (attempt ' || (attempts + 1) || ' of ' || max_attempts || ')' END,
+            progress = CASE WHEN %(permanent)s OR attempts >= max_attempts
+                            THEN progress ELSE 0 END,
+            run_after = NOW() + make_interval(secs => %(backoff)s * power(2, GREATEST(attempts - 1, 0))),
+            last_error = %(error)s,
+            locked_by = NULL,
+            lease_expires_at = NULL
+        WHERE id = %(id)s AND locked_by = %(worker)s
+        RETURNING status, progress, step
+        """,
+        {
+            "permanent": permanent,
+            "step": error[:100],
+            "backoff": RETRY_BACKOFF,
+            "error": error,
+            "id": job["id"],
+            "worker": worker_id,
+        }
+    )
+    return cur.fetchone()
+
+
+def reap_expired(cur) -> int:
+    """
+    Fails jobs whose lease expired on their last allowed attempt.
+    Returns how many were failed.
+    """
+
+    failed = 0
+    for table in sorted(set(JOB_TABLES.values())):
+        cur.execute(
+            f"""
+            UPDATE {table}
+            SET status = 'failed',
+                step = 'worker stopped responding',
+                last_error = COALESCE(last_error, 'lease expired'),
+                locked_by = NULL,
+                lease_expires_at = NULL
+            WHERE status = 'processing'
+              AND lease_expires_at < NOW()
+              AND attempts >= max_attempts
+            """
+        )
+        failed += cur.rowcount
+    return failed
+
+
+def queue_depth(cur) -> dict:
+    """Queued (runnable or waiting out a backoff) jobs per type."""
+
+    depth = {job_type: 0 for job_type in JOB_TABLES}
+    for table in sorted(set(JOB_TABLES.values())):
+        cur.execute(
+            f"""
+            SELECT job_type, COUNT(*) AS queued
+            FROM {table}
+            WHERE status = 'queued'
+            GROUP BY job_type
+            """
+        )
+        for row in cur.fetchall():
+            if row["job_type"] in depth:
+                depth[row["job_type"]] = row["queued"]
+    return depth
@@ -8,6 +8,15 @@ Responsibilities:
 - Initialize FastAPI application
 - Register all routers
 - Provide base health-check endpoint
+- Record per-request SQL statistics (X-DB-Queries header, N+1 warnings)
+- Serve Prometheus metrics at /metrics (route latency, in-flight requests,
+  pools, background jobs, Firebase/Gemini latency)
+- Open the async database pool and the bcrypt process pool on startup,
+  expose pool and cache statistics and close the pools on shutdown
+- Listen for job progress notifications and push them to clients
+  (GET /jobs/events, see job_events.py)
+- Optionally run a media job worker thread in-process (JOB_WORKER_IN_API=1,
+  for development; production runs `python -m backend.worker` separately)
 
 This file wires together the entire backend API.
 """
@@ -19,9 +28,19 @@ import os
 # Ensures DB credentials, JWT secrets, email configs, etc. are available
 load_dotenv("backend/.env")
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.database import close_pool, pool_stats
+from backend.async_database import open_async_pool, close_async_pool, async_pool_stats
+from backend.query_stats import QueryStatsMiddleware
+from backend.cache import cache_stats
+from backend.metrics import MetricsMiddleware, render as render_metrics
+from backend.password_hashing import start_bcrypt_pool, shutdown_bcrypt_pool, bcrypt_pool_stats
+from backend.job_events import hub as job_event_hub
+import threading
+
 # Import all route modules
 # Each router handles a specific domain of functionality
 from backend.routers.auth import router as auth_router 
@@ -35,11 +54,36 @@ from backend.routers.ai import router as ai_router #Added by Wences Jacob Lorenz
 from backend.routers.team_members import router as team_members_router
 from backend.routers.game_metrics import router as game_metrics_router
 from backend.routers.drawboards import router as drawboards_router
+from backend.routers.jobs import router as jobs_router
+
+
 
+#Application lifecycle
+#The async pool and bcrypt workers are started on startup; pooled connections
+#and worker processes are closed when the server stops
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_async_pool()
+    await start_bcrypt_pool()
+    job_event_hub.start()
+
+    worker = None
+    if os.getenv("JOB_WORKER_IN_API", "0") == "1":
+        from backend.worker import Worker
+        worker = Worker()
+        threading.Thread(target=worker.run, kwargs={"grace": 0}, name="job-worker", daemon=True).start()
+
+    yield
+    if worker is not None:
+        worker.stop()
+    await job_event_hub.stop()
+    shutdown_bcrypt_pool()
+    await close_async_pool()
+    close_pool()
 
 
 #Initialize FastAPI App
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,8 +91,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries"],
 )
 
+#Counts the SQL statements each request runs (X-DB-Queries header, N+1 warnings)
+app.add_middleware(QueryStatsMiddleware)
+
+#Route latency histograms and in-flight gauges for /metrics
+app.add_middleware(MetricsMiddleware)
+
 #Register Routers
 #Routers define URL prefixes and tags
 #Keeps backend organized and scalable
@@ -64,8 +115,35 @@ app.include_router(ai_router)  # AI analysis (Gemini)  (Added by Wences Jacob Lo
 app.include_router(team_members_router)  # Team sharing & member management
 app.include_router(game_metrics_router)
 app.include_router(drawboards_router) # Football play diagrams + edit history
+app.include_router(jobs_router) # Live job progress (Server-Sent Events)
 
 #Verify if backend is running
 @app.get("/")
 def home():
     return {"message": "CoachAssist backend running"}
+
+#Database connection pool statistics (size, in use, waits, recycles...)
+@app.get("/health/db")
+def db_health():
+    return {"pool": pool_stats(), "async_pool": async_pool_stats()}
+
+#In-process cache statistics (hits, misses, evictions per cache)
+@app.get("/health/cache")
+def cache_health():
+    return {"caches": cache_stats()}
+
+#bcrypt process pool statistics (queue depth, rejections, wait/run times)
+@app.get("/health/bcrypt")
+def bcrypt_health():
+    return {"bcrypt": bcrypt_pool_stats()}
+
+#Job progress listener and open event streams
+@app.get("/health/jobs")
+def jobs_health():
+    return {"events": job_event_hub.stats()}
+
+#Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
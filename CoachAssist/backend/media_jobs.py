@@ -0,0 +1,720 @@
+"""
+media_jobs.py
+
+Handlers for the media jobs run by the worker (backend/worker.py).
+
+- run_upload_job: turns a staged original into a streamable MP4, doing as
+  little work as ingest_planner.py allows, and stores it as the video's
+  file, or points the video at the team's existing copy of the same file
+  (video_blobs.py)
+- run_hls_job: builds the HLS ladder of a newly stored upload (hls_ladder.py)
+- run_preview_job: extracts its poster and thumbnail sprites (video_previews.py)
+  and indexes its keyframes for frame-accurate clips (clip_engine.py)
+- run_clip_job: cuts [start, end] out of a stored video into a new video,
+  reading only the byte ranges it needs (clip_engine.py), and caches it
+  for identical requests (video_blobs.py)
+- run_clip_batch_job: many cuts of one stored video in one job: parallel
+  cuts, concurrent uploads, one INSERT, progress per clip; cached ranges
+  are not cut again
+- run_upscale_job: upscales a stored video with Real-ESRGAN into a new video,
+  streaming frame batches through decode, upscale and encode, in parallel
+  segments (upscale_pipeline.py)
+
+Every handler is called as handler(job, cur, db, reporter) with the claimed
+job row, a psycopg2 cursor/connection and the job's ProgressReporter. A
+handler reports its progress, marks the job done (which commits its
+writes) and raises on error; the worker decides between retrying and
+failing the job. Raise JobFailed for errors a retry cannot fix.
+
+Handlers may run more than once for the same job, so they must be safe
+to repeat.
+"""
+
+import os
+import uuid
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.extras import execute_values
+
+from backend.video_providers.firebase_storage import bucket
+from backend.video_providers.resumable_upload import ResumableUpload
+from backend.upscaling_utils.realesrgan import REALSRCAN_BIN
+from backend.metrics import external_call
+from backend.job_queue import JobFailed, enqueue_job, INGEST_FOLLOW_UPS
+from backend.video_blobs import reference_blob, register_blob, clip_range, clip_key, insert_blob_video
+from backend.ingest_planner import plan_ingest, apply_plan, NotAVideo
+from backend.hls_ladder import hls_prefix, build_ladder
+from backend.video_previews import preview_prefix, build_previews
+from backend.media_storage import UPLOAD_CONCURRENCY, upload_directory, delete_prefix
+from backend.clip_engine import cut_clip, cut_clips, keyframe_index
+from backend.upscale_pipeline import MODEL as UPSCALE_MODEL, upscale_video
+
+logger = logging.getLogger(__name__)
+
+
+#resumable blob uploads will allow the upload progress to be visible
+#Firebase SDK is meant to work on the frontend, so it would mean a total change in our architecture
+#ResumableUpload keeps one connection open, grows the chunk size with the observed
+#throughput, resumes from the server's committed offset and retries failed chunks
+#on_progress(fraction), if given, is called instead of reporting to the job
+def upload_video_with_progress(file_path, blob, reporter=None,
+                         base_progress=0, progress_span=100, on_progress=None):
+
+    file_size = os.path.getsize(file_path)
+
+    with external_call("firebase", "create_upload_session"):
+        session_url = blob.create_resumable_upload_session(
+            content_type="video/mp4"
+        )
+
+    def report(uploaded):
+        pct = uploaded / file_size if file_size else 1
+
+        if on_progress:
+            on_progress(pct)
+
+        #progress tracking (coalesced by the reporter)
+        elif reporter:
+            progress = base_progress + int(pct * progress_span)
+
+            reporter.update(progress=progress, step="uploading")
+
+    upload = ResumableUpload(session_url, total_size=file_size, on_progress=report)
+
+    with open(file_path, "rb") as f:
+        while True:
+            data = f.read(upload.chunk_size)
+            if not data:
+                break
+            if upload.write(data):
+                upload.flush()
+
+    upload.finish()
+
+
+#upload job: the API streamed the original to payload["source_path"]
+#(for an .mp4 without faststart that is already the final storage path)
+def run_upload_job(job, cur, db, reporter):
+    payload = job["payload"]
+    user_id = job["user_id"]
+    team_id = job["team_id"]
+    match_id = job["match_id"]
+    original_filename = payload["filename"]
+    source_path = payload["source_path"]
+    content_hash = payload.get("content_hash")
+    source = bucket.blob(source_path)
+    existing = None
+
+    cur.execute("SELECT blob_id, storage_path FROM videos WHERE id = %s", (job["video_id"],))
+    video = cur.fetchone()
+    if video is None:
+        raise JobFailed("Video not found")
+
+    # identical file stored by another upload since this one was queued
+    # (or a previous attempt already got as far as registering the result)
+    if content_hash and video["blob_id"] is None:
+        existing = reference_blob(cur, team_id, content_hash, job["video_id"])
+        if existing is not None:
+            logger.info(f"[UPLOAD] {original_filename} is a duplicate of {existing['storage_path']}, skipping conversion")
+
+    if video["blob_id"] is not None or existing is not None:
+        cur.execute(
+            "UPDATE videos SET filename = %s WHERE id = %s",
+            (os.path.splitext(original_filename)[0] + ".mp4", job["video_id"])
+        )
+        reporter.update(status="done", progress=100, step="completed", final=True)
+        if source_path != (existing or video)["storage_path"]:
+            delete_unused(source, source_path)
+        return
+
+    reporter.update(status="processing", progress=5, step="downloading")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # detect extension
+        ext = os.path.splitext(original_filename)[1].lower()
+        temp_path = os.path.join(tmpdir, "original" + ext)
+
+        with external_call("firebase", "download"):
+            source.download_to_filename(temp_path)
+
+        # probe, then copy / remux / transcode audio / encode (ingest_planner.py)
+        try:
+            plan = plan_ingest(temp_path, ext)
+        except NotAVideo as e:
+            raise JobFailed(str(e))
+
+        logger.info(f"[UPLOAD] {original_filename}: {plan['action']} ({plan['reason']})")
+        reporter.update(progress=15, step=plan["step"])
+
+        final_path = apply_plan(temp_path, plan, on_step=lambda step: reporter.update(step=step))
+        original_filename = os.path.splitext(original_filename)[0] + ".mp4"
+
+        # the video id keeps the path unique: the file may end up shared by
+        # other videos, so a later upload with the same name must not replace it
+        filename = f"{user_id}_{match_id}_{job['video_id']}_{original_filename}"
+        storage_path = f"users/{user_id}/matches/{match_id}/{filename}"
+
+        blob = bucket.blob(storage_path)
+
+        # nothing to rewrite if the stored file already is the result
+        if final_path != temp_path or source_path != storage_path:
+            upload_video_with_progress(
+                final_path,
+                blob,
+                reporter=reporter,
+                base_progress=20,
+                progress_span=80
+            )
+
+            blob.content_type = "video/mp4"
+            with external_call("firebase", "set_metadata"):
+                blob.patch()
+
+        size = os.path.getsize(final_path)
+
+    # update video record
+    cur.execute(
+        """
+        UPDATE videos
+        SET storage_path = %s,
+            filename = %s
+        WHERE id = %s
+        """,
+        (storage_path, original_filename, job["video_id"])
+    )
+
+    new_file = True
+    if content_hash:
+        registered = register_blob(cur, team_id, content_hash, storage_path, size, job["video_id"])
+
+        # an identical upload finished first: the video now uses its file, drop ours
+        if not registered["inserted"]:
+            logger.info(f"[UPLOAD] {original_filename} was stored concurrently at {registered['storage_path']}")
+            delete_unused(blob, storage_path)
+            new_file = False
+
+    # previews and streaming renditions are built in the background
+    if new_file:
+        for job_type in INGEST_FOLLOW_UPS:
+            enqueue_job(cur, job_type, job["video_id"], user_id, team_id, match_id)
+
+    reporter.update(status="done", progress=100, step="completed", final=True)
+
+    # the staged original is only needed until the video row points at the result
+    # (a streamed .mp4 that needed faststart was rewritten in place)
+    if source_path != storage_path:
+        delete_unused(source, source_path)
+
+
+#best-effort removal of a blob nothing points at
+def delete_unused(blob, path):
+    try:
+        with external_call("firebase", "delete"):
+            blob.delete()
+    except Exception as e:
+        logger.warning(f"[UPLOAD] Failed to delete unused blob {path}: {e}")
+
+
+#records a clip job's new video in its payload ("video_id"): the INSERT may
+#already be committed (autocommit connections), so a retry must not add another
+def remember_clip_video(cur, job, video_id):
+    cur.execute("""
+        UPDATE upload_jobs
+        SET payload = payload || jsonb_build_object('video_id', %s::int)
+        WHERE id = %s
+    """, (video_id, job["id"]))
+
+
+#clip job: payload {"start", "end"} in seconds
+def run_clip_job(job, cur, db, reporter):
+    payload = job["payload"]
+    user_id = job["user_id"]
+    team_id = job["team_id"]
+    match_id = job["match_id"]
+    start, end = clip_range(payload["start"], payload["end"])
+
+    # a previous attempt saved the clip before it failed
+    if payload.get("video_id"):
+        logger.info(f"[CLIP] job {job['id']}: saved as video {payload['video_id']} by a previous attempt")
+        reporter.update(status="done", progress=100, step="completed", final=True)
+        return
+
+    reporter.update(status="processing", progress=5, step="clipping")
+
+    # fetch source video
+    cur.execute("""
+        SELECT storage_path, filename, keyframes
+        FROM videos
+        WHERE id = %s AND user_id = %s AND team_id = %s AND match_id = %s
+    """, (job["video_id"], user_id, team_id, match_id))
+
+    video = cur.fetchone()
+    if not video or not video["storage_path"]:
+        raise JobFailed("Video not found")
+
+    clip_filename = f"clip_{uuid.uuid4().hex}.mp4"
+
+    # the same range was clipped (and stored) since this job was queued
+    key = clip_key(video["storage_path"], start, end)
+    cached = insert_blob_video(cur, team_id, key, user_id, match_id, clip_filename)
+    if cached:
+        remember_clip_video(cur, job, cached["id"])
+        logger.info(f"[CLIP] job {job['id']}: {start}-{end}s is cached as {cached['storage_path']}")
+        reporter.update(status="done", progress=100, step="completed", final=True)
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_path = os.path.join(tmpdir, "clip.mp4")
+
+        # ffmpeg reads only the byte ranges it needs from storage and cuts at
+        # the exact frame, re-encoding only up to the first keyframe (clip_engine.py)
+        cut = cut_clip(
+            bucket, video["storage_path"], start, end, output_path,
+            keyframes=video["keyframes"],
+            on_progress=lambda done: reporter.update(progress=5 + int(done * 35))
+        )
+        logger.info(f"[CLIP] job {job['id']}: cut {start}-{end}s ({cut['read']}, {cut['method']})")
+
+        # the clip is local: index it now, so clips of the clip are exact too
+        keyframes = keyframe_index(output_path)
+
+        reporter.update(progress=40, step="uploading")
+
+        # upload with progress
+        storage_path = f"users/{user_id}/matches/{match_id}/{clip_filename}"
+
+        blob_out = bucket.blob(storage_path)
+
+        upload_video_with_progress(
+            output_path,
+            blob_out,
+            reporter=reporter,
+            base_progress=40,
+            progress_span=50  # 40 → 90
+        )
+
+        blob_out.content_type = "video/mp4"
+        with external_call("firebase", "set_metadata"):
+            blob_out.patch()
+
+        size = os.path.getsize(output_path)
+
+    # insert DB record
+    reporter.update(progress=90, step="saving")
+
+    cur.execute("""
+        INSERT INTO videos (
+            user_id, team_id, match_id,
+            provider, provider_video_id,
+            storage_path, filename, keyframes
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
+    """, (
+        user_id,
+        team_id,
+        match_id,
+        "firebase",
+        None,
+        storage_path,
+        clip_filename,
+        keyframes
+    ))
+    clip_id = cur.fetchone()["id"]
+    remember_clip_video(cur, job, clip_id)
+
+    # cache it; an identical clip stored first by a concurrent job wins
+    if not register_blob(cur, team_id, key, storage_path, size, clip_id)["inserted"]:
+        delete_unused(blob_out, storage_path)
+
+    reporter.update(status="done", progress=100, step="completed", final=True)
+    logger.info(f"[CLIP] job {job['id']} completed")
+
+
+#clip batch job: payload["clips"] = [{"start", "end", "name"}, ...] of one source
+#each clip's progress runs 0-50 while it is cut and 50-100 while it uploads; its
+#item gets the id of its new video ("video_id") once that is saved
+def run_clip_batch_job(job, cur, db, reporter):
+    user_id = job["user_id"]
+    team_id = job["team_id"]
+    match_id = job["match_id"]
+    clips = job["payload"]["clips"]
+
+    # clips saved by a previous attempt keep their video (items survive a retry)
+    previous = job.get("item_progress") or []
+    items = [
+        dict(previous[index]) if index < len(previous) and previous[index].get("video_id")
+        else {"status": "queued", "progress": 0}
+        for index in range(len(clips))
+    ]
+    saved = sum(1 for item in items if item.get("video_id"))
+    lock = threading.Lock()     # cut / upload threads share the reporter's connection
+
+    def report(index, status=None, progress=None, step=None):
+        with lock:
+            if status is not None:
+                items[index]["status"] = status
+            if progress is not None:
+                items[index]["progress"] = progress
+            overall = 5 + int(sum(item["progress"] for item in items) / len(items) * 0.9)
+            reporter.update(progress=overall, step=step, items=items)
+
+    reporter.update(status="processing", progress=5, step="clipping", items=items)
+
+    cur.execute("""
+        SELECT storage_path, keyframes
+        FROM videos
+        WHERE id = %s AND user_id = %s AND team_id = %s AND match_id = %s
+    """, (job["video_id"], user_id, team_id, match_id))
+
+    video = cur.fetchone()
+    if not video or not video["storage_path"]:
+        raise JobFailed("Video not found")
+
+    # ranges the team has clipped before get a video of the stored clip (video_blobs.py)
+    keys = [clip_key(video["storage_path"], *clip_range(clip["start"], clip["end"])) for clip in clips]
+    pending = []
+    for index, clip in enumerate(clips):
+        if items[index].get("video_id"):
+            continue
+        name = (clip.get("name") or "").strip() or f"clip_{uuid.uuid4().hex}.mp4"
+        cached = insert_blob_video(cur, team_id, keys[index], user_id, match_id, name)
+        if cached:
+            items[index].update(status="done", progress=100, video_id=cached["id"])
+        else:
+            pending.append(index)
+
+    # committed with the videos they point at, so a retry does not add them again
+    cached = len(clips) - saved - len(pending)
+    reporter.update(items=items)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_paths = [os.path.join(tmpdir, f"clip_{i}.mp4") for i in range(len(clips))]
+
+        def cut_progress(position, done):
+            report(pending[position], status="clipping", progress=int(done * 50))
+
+        results = cut_clips(
+            bucket, video["storage_path"],
+            [clip_range(clips[i]["start"], clips[i]["end"]) for i in pending],
+            [output_paths[i] for i in pending],
+            keyframes=video["keyframes"], on_progress=cut_progress
+        ) if pending else []
+
+        cut = []
+        for index, result in zip(pending, results):
+            if "error" in result:
+                logger.warning(f"[CLIP] batch job {job['id']}: clip {index} failed: {result['error']}")
+                report(index, status="failed")
+            else:
+                cut.append(index)
+
+        reporter.update(step="uploading")
+
+        def upload(index):
+            clip_filename = f"clip_{uuid.uuid4().hex}.mp4"
+            storage_path = f"users/{user_id}/matches/{match_id}/{clip_filename}"
+
+            try:
+                # also fails on an empty output (a range past the end of the video)
+                keyframes = keyframe_index(output_paths[index])
+            except RuntimeError as e:
+                logger.warning(f"[CLIP] batch job {job['id']}: clip {index} has no video: {e}")
+                report(index, status="failed")
+                return None
+
+            blob_out = bucket.blob(storage_path)
+            try:
+                upload_video_with_progress(
+                    output_paths[index], blob_out,
+                    on_progress=lambda done: report(index, status="uploading", progress=50 + int(done * 50))
+                )
+
+                blob_out.content_type = "video/mp4"
+                with external_call("firebase", "set_metadata"):
+                    blob_out.patch()
+            except Exception as e:
+                # only this clip fails; the upload may have stored it before patch() failed
+                logger.warning(f"[CLIP] batch job {job['id']}: clip {index} upload failed: {e}")
+                report(index, status="failed")
+                delete_unused(blob_out, storage_path)
+                return None
+
+            report(index, status="saving", progress=100)
+            name = (clips[index].get("name") or "").strip() or clip_filename
+            row = (user_id, team_id, match_id, "firebase", None, storage_path, name, keyframes)
+            return index, row, os.path.getsize(output_paths[index])
+
+        with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as pool:
+            uploaded = [result for result in pool.map(upload, cut) if result]
+
+    if not uploaded and not any(item.get("video_id") for item in items):
+        raise RuntimeError("Every clip of the batch failed")
+
+    reporter.update(progress=95, step="saving")
+
+    if uploaded:
+        # one statement for the whole batch
+        try:
+            ids = execute_values(cur, """
+                INSERT INTO videos (
+                    user_id, team_id, match_id,
+                    provider, provider_video_id,
+                    storage_path, filename, keyframes
+                )
+                VALUES %s
+                RETURNING id
+            """, [row for _, row, _ in uploaded], page_size=len(uploaded), fetch=True)
+        except Exception:
+            # nothing points at these uploads; the retry cuts them again
+            for _, row, _ in uploaded:
+                delete_unused(bucket.blob(row[5]), row[5])
+            raise
+
+        for (index, _, _), clip in zip(uploaded, ids):
+            items[index].update(status="done", video_id=clip["id"])
+        reporter.update(items=items)
+
+        # cache the new clips; a range stored first by a concurrent job wins
+        for (index, row, size), clip in zip(uploaded, ids):
+            storage_path = row[5]
+            if not register_blob(cur, team_id, keys[index], storage_path, size, clip["id"])["inserted"]:
+                delete_unused(bucket.blob(storage_path), storage_path)
+
+    reporter.update(status="done", progress=100, step="completed", items=items, final=True)
+    logger.info(
+        f"[CLIP] batch job {job['id']} completed: {len(uploaded)} cut, {cached} cached, "
+        f"{saved} saved before, {len(clips)} requested"
+    )
+
+
+#upscale job
+def run_upscale_job(job, cur, db, reporter):
+    user_id = job["user_id"]
+    team_id = job["team_id"]
+    match_id = job["match_id"]
+    video_id = job["video_id"]
+
+    logger.info(f"[UPSCALE] Starting upscale for user={user_id}, video={video_id}")
+    #update job to reflect that it has begun
+    reporter.update(status="processing", progress=5, step="downloading")
+
+    cur.execute(
+        """
+        SELECT storage_path, filename, keyframes
+        FROM videos
+        WHERE id = %s
+          AND user_id = %s
+          AND team_id = %s
+          AND match_id = %s
+        """,
+        (video_id, user_id, team_id, match_id)
+    )
+
+    video = cur.fetchone()
+    if not video or not video["storage_path"]:
+        logger.error(f"[UPSCALE] Video not found or missing storage_path: {video}")
+        raise JobFailed("video not found")
+
+    logger.info(f"[UPSCALE] Found video: {video['filename']}, storage_path={video['storage_path']}")
+
+    if not os.path.exists(REALSRCAN_BIN):
+        raise JobFailed(f"Real-ESRGAN binary not found at {REALSRCAN_BIN}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_path = os.path.join(tmpdir, "input.mp4")
+        output_path = os.path.join(tmpdir, "output.mp4")
+
+        # Step 1: Download from Firebase
+        try:
+            logger.info(f"[UPSCALE] Downloading video from Firebase: {video['storage_path']}")
+
+            blob = bucket.blob(video["storage_path"])
+            with external_call("firebase", "download"):
+                blob.download_to_filename(input_path)
+            logger.info(f"[UPSCALE] Successfully downloaded video ({os.path.getsize(input_path)} bytes)")
+        except Exception as e:
+            logger.error(f"[UPSCALE] Firebase download failed: {e}")
+            raise
+        # update job to reflect that the current stage is upscaling frames
+        reporter.update(progress=20, step="upscaling_frames")
+        # Step 2: Decode -> upscale -> encode, a batch of frames at a time, in parallel
+        # segments split at keyframes (upscale_pipeline.py)
+        try:
+            logger.info(f"[UPSCALE] Upscaling with Real-ESRGAN (model: {UPSCALE_MODEL})...")
+            upscale_video(
+                input_path, output_path, tmpdir,
+                keyframes=video["keyframes"] or keyframe_index(input_path),
+                on_progress=lambda done: reporter.update(progress=20 + int(done * 60))
+            )
+
+            output_size = os.path.getsize(output_path)
+            logger.info(f"[UPSCALE] Successfully rebuilt video ({output_size} bytes)")
+        except Exception as e:
+            logger.error(f"[UPSCALE] Upscaling failed: {e}")
+            raise
+        # update job to reflect that the current stage is reuploading video
+        reporter.update(progress=80, step="uploading")
+        # Step 3: Upload to Firebase
+        try:
+
+            logger.info(f"[UPSCALE] Uploading upscaled video to Firebase...")
+            upscale_filename = f"upscaled_{uuid.uuid4().hex}.mp4"
+            storage_path = f"users/{user_id}/matches/{match_id}/{upscale_filename}"
+
+            blob_out = bucket.blob(storage_path)
+
+            upload_video_with_progress(
+                output_path,
+                blob_out,
+                reporter=reporter,
+                base_progress=80,   # your existing stage
+                progress_span=10    # goes from 80 → 90
+            )
+
+            blob_out.content_type = "video/mp4"
+            with external_call("firebase", "set_metadata"):
+                blob_out.patch()
+            logger.info(f"[UPSCALE] Successfully uploaded to Firebase: {storage_path}")
+        except Exception as e:
+            logger.error(f"[UPSCALE] Firebase upload failed: {e}")
+            raise
+        # update job to reflect that the current stage is updating the database records
+        reporter.update(progress=90, step="updating records")
+        # Step 4: Insert database record
+        logger.info(f"[UPSCALE] Inserting new video record into database...")
+        cur.execute(
+            """
+            INSERT INTO videos (
+                user_id,
+                team_id,
+                match_id,
+                provider,
+                provider_video_id,
+                storage_path,
+                filename
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            (
+                user_id,
+                team_id,
+                match_id,
+                "firebase",
+                None,
+                storage_path,
+                f"Upscaled {video['filename']}"
+            )
+        )
+
+    reporter.update(status="done", progress=100, step="completed", final=True)
+    logger.info(f"[UPSCALE] Upscaling completed successfully for video={video_id}")
+
+
+#hls job: builds the adaptive-bitrate ladder of a stored video (hls_ladder.py)
+def run_hls_job(job, cur, db, reporter):
+    reporter.update(status="processing", progress=5, step="downloading")
+
+    cur.execute("SELECT storage_path FROM videos WHERE id = %s", (job["video_id"],))
+    video = cur.fetchone()
+    if not video or not video["storage_path"]:
+        raise JobFailed("Video not found")
+
+    storage_path = video["storage_path"]
+    prefix = hls_prefix(storage_path)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_path = os.path.join(tmpdir, "input.mp4")
+        output_dir = os.path.join(tmpdir, "hls")
+
+        with external_call("firebase", "download"):
+            bucket.blob(storage_path).download_to_filename(input_path)
+
+        reporter.update(progress=10, step="segmenting")
+        try:
+            ladder = build_ladder(
+                input_path, output_dir,
+                on_progress=lambda done: reporter.update(progress=10 + int(done * 70))
+            )
+        except ValueError as e:
+            raise JobFailed(str(e))
+
+        logger.info(f"[HLS] {storage_path}: renditions {', '.join(f'{h}p' for h, _ in ladder)}")
+
+        reporter.update(progress=80, step="uploading")
+        upload_directory(
+            bucket, output_dir, prefix,
+            on_progress=lambda done: reporter.update(progress=80 + int(done * 20))
+        )
+
+    # every video sharing the file (video_blobs.py) gets the ladder
+    cur.execute(
+        "UPDATE videos SET hls_path = %s WHERE storage_path = %s",
+        (prefix, storage_path)
+    )
+
+    # deleted while the ladder was being built
+    if cur.rowcount == 0:
+        delete_prefix(bucket, prefix)
+
+    reporter.update(status="done", progress=100, step="completed", final=True)
+
+
+#preview job: poster frame + thumbnail sprites (video_previews.py) and keyframe index
+#(clip_engine.py) of a stored video, from one download
+def run_preview_job(job, cur, db, reporter):
+    reporter.update(status="processing", progress=5, step="downloading")
+
+    cur.execute("SELECT storage_path FROM videos WHERE id = %s", (job["video_id"],))
+    video = cur.fetchone()
+    if not video or not video["storage_path"]:
+        raise JobFailed("Video not found")
+
+    storage_path = video["storage_path"]
+    prefix = preview_prefix(storage_path)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_path = os.path.join(tmpdir, "input.mp4")
+        output_dir = os.path.join(tmpdir, "previews")
+
+        with external_call("firebase", "download"):
+            bucket.blob(storage_path).download_to_filename(input_path)
+
+        reporter.update(progress=10, step="extracting_previews")
+        try:
+            build_previews(
+                input_path, output_dir,
+                on_progress=lambda done: reporter.update(progress=10 + int(done * 80))
+            )
+        except ValueError as e:
+            raise JobFailed(str(e))
+
+        keyframes = keyframe_index(input_path)
+
+        reporter.update(progress=90, step="uploading")
+        upload_directory(bucket, output_dir, prefix)
+
+    # every video sharing the file (video_blobs.py) gets the previews
+    cur.execute(
+        "UPDATE videos SET preview_path = %s, keyframes = %s WHERE storage_path = %s",
+        (prefix, keyframes, storage_path)
+    )
+
+    # deleted while the previews were being built
+    if cur.rowcount == 0:
+        delete_prefix(bucket, prefix)
+
+    reporter.update(status="done", progress=100, step="completed", final=True)
+
+
+HANDLERS = {
+    "upload": run_upload_job,
+    "clip": run_clip_job,
+    "clip_batch": run_clip_batch_job,
+    "upscale": run_upscale_job,
+    "hls": run_hls_job,
+    "preview": run_preview_job,
+}
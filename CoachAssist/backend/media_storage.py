@@ -0,0 +1,152 @@
+"""
+media_storage.py
+
+Storage helpers shared by the files derived from a video (HLS ladder,
+poster and thumbnails):
+- upload_directory / delete_prefix: store or remove a whole folder of
+  outputs under a storage prefix, MEDIA_UPLOAD_CONCURRENCY files at a time
+- media_token / check_media_token: short-lived token, scoped to one video,
+  for URLs the browser fetches without the Bearer header (<video src>,
+  <track src>, native HLS players)
+- sign_url: signed URL for one private storage object
+- cached: small in-process cache for rendered index files (playlists,
+  WebVTT), whose links are signed on every render
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from jose import jwt, JWTError
+
+from backend.utils import SECRET_KEY, ALGORITHM
+from backend.metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CONCURRENCY = int(os.getenv("MEDIA_UPLOAD_CONCURRENCY", "8"))
+
+URL_LIFETIME = timedelta(hours=4)       # media tokens and signed URLs
+
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".jpg": "image/jpeg",
+    ".vtt": "text/vtt",
+}
+
+# files that link to the others in their folder
+INDEX_EXTENSIONS = (".m3u8", ".vtt")
+
+
+#=== STORE / DELETE ===
+
+def upload_directory(bucket, local_dir: str, prefix: str, on_progress=None) -> int:
+    """
+    Stores every file under local_dir at prefix/<relative path>.
+    Index files (playlists, WebVTT) go last, deepest first, so nothing links
+    to a file that is not stored yet. on_progress(fraction) follows the upload.
+    Returns the number of files stored.
+    """
+
+    files = []
+    for root, _, names in os.walk(local_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            files.append((path, os.path.relpath(path, local_dir).replace(os.sep, "/")))
+
+    media = [f for f in files if not f[1].endswith(INDEX_EXTENSIONS)]
+    indexes = sorted(
+        (f for f in files if f[1].endswith(INDEX_EXTENSIONS)),
+        key=lambda f: -f[1].count("/")
+    )
+
+    def store(item):
+        path, name = item
+        blob = bucket.blob(f"{prefix}/{name}")
+        with external_call("firebase", "upload"):
+            blob.upload_from_filename(path, content_type=CONTENT_TYPES.get(os.path.splitext(name)[1]))
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as pool:
+        for _ in pool.map(store, media):
+            done += 1
+            if on_progress:
+                on_progress(done / len(files))
+
+    for item in indexes:
+        store(item)
+
+    return len(files)
+
+
+def delete_prefix(bucket, prefix: str):
+    """Best-effort removal of everything stored under prefix/."""
+
+    try:
+        with external_call("firebase", "list"):
+            blobs = list(bucket.list_blobs(prefix=prefix + "/"))
+
+        with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as pool:
+            list(pool.map(lambda blob: blob.delete(), blobs))
+    except Exception as e:
+        logger.warning(f"[MEDIA] Failed to delete {prefix}/: {e}")
+
+
+#=== URLS ===
+
+def media_token(video_id: int) -> str:
+    """
+    Token for the derived files of one video. The expiry is rounded to the
+    hour, so list_videos hands out the same URLs for an hour and players
+    and caches are not reset by every refresh.
+    """
+
+    now = int(time.time())
+    expires = now - now % 3600 + 3600 + int(URL_LIFETIME.total_seconds())
+    return jwt.encode({"vid": video_id, "scope": "media", "exp": expires}, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def check_media_token(token: str, video_id: int) -> bool:
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return claims.get("scope") == "media" and claims.get("vid") == video_id
+
+
+def sign_url(bucket, name: str) -> str:
+    with external_call("firebase", "sign_url"):
+        return bucket.blob(name).generate_signed_url(expiration=URL_LIFETIME, method="GET")
+
+
+#=== RENDER CACHE ===
+
+CACHE_SECONDS = 600
+
+_cache = {}     # key -> (expires, value)
+_cache_lock = threading.Lock()      # renders run on threadpool threads
+
+
+def cached(key, build):
+    """Returns build() for key, reusing it for CACHE_SECONDS."""
+
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+
+    # built outside the lock: it signs URLs over the network
+    value = build()
+
+    with _cache_lock:
+        # drop expired entries before adding, so the cache cannot grow unbounded
+        for stale in [k for k, (expires, _) in _cache.items() if expires <= now]:
+            _cache.pop(stale, None)
+        _cache[key] = (now + CACHE_SECONDS, value)
+
+    return value
@@ -0,0 +1,253 @@
+"""
+metrics.py
+
+Prometheus metrics for the CoachAssist backend, served at GET /metrics.
+
+Provides:
+- MetricsMiddleware: request latency histogram per route template
+  (e.g. /teams/{team_id}/matches), method and status, and an in-flight
+  request gauge
+- Database and bcrypt pool gauges, read from pool_stats(),
+  async_pool_stats() and bcrypt_pool_stats() at scrape time
+- Background job gauges and counters by type (upload, clip, upscale):
+  track_job() around each job a worker runs, set_queue_depth() from the
+  worker's periodic queue scan (the queue lives in Postgres, job_queue.py)
+- external_call(): latency histogram for Firebase Storage and Gemini calls
+
+Metrics are per process. With several uvicorn workers, scrape each one
+(or sum them in Prometheus).
+"""
+
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+
+from backend.database import pool_stats
+from backend.async_database import async_pool_stats
+from backend.password_hashing import bcrypt_pool_stats
+
+#=== HTTP REQUESTS ===
+
+REQUEST_LATENCY = Histogram(
+    "coachassist_http_request_duration_seconds",
+    "Time from request start to the end of the response body",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "coachassist_http_requests_in_flight",
+    "Requests currently being answered",
+    ["method"],
+)
+
+#=== BACKGROUND JOBS ===
+
+JOBS = Gauge(
+    "coachassist_jobs",
+    "Background jobs running in this process by type",
+    ["type", "state"],
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    "coachassist_job_queue_depth",
+    "Jobs waiting in the database queue by type, as last seen by this worker",
+    ["type"],
+)
+
+JOBS_FINISHED = Counter(
+    "coachassist_jobs_finished_total",
+    "Background jobs finished by type and outcome (done, failed)",
+    ["type", "outcome"],
+)
+
+JOB_DURATION = Histogram(
+    "coachassist_job_duration_seconds",
+    "Time a background job spent running",
+    ["type", "outcome"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+#=== EXTERNAL SERVICES ===
+
+EXTERNAL_LATENCY = Histogram(
+    "coachassist_external_call_duration_seconds",
+    "Latency of calls to Firebase Storage and Gemini",
+    ["service", "operation", "outcome"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+
+@contextmanager
+def external_call(service: str, operation: str):
+    """
+    Times a call to an external service.
+
+    Usage:
+        with external_call("firebase", "download"):
+            blob.download_to_filename(path)
+    """
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_LATENCY.labels(service, operation, outcome).observe(time.perf_counter() - started)
+
+
+def set_queue_depth(job_type: str, queued: int):
+    JOB_QUEUE_DEPTH.labels(job_type).set(queued)
+
+
+class _Job:
+    def __init__(self):
+        self.outcome = "failed"
+
+    def done(self):
+        self.outcome = "done"
+
+
+@contextmanager
+def track_job(job_type: str):
+    """
+    Counts a job as running for as long as the block runs.
+
+    Usage:
+        with track_job("upload") as job:
+            ...
+            job.done()
+
+    A job that leaves the block without calling done() is counted as failed,
+    so except blocks that swallow the error need no extra call.
+    """
+
+    job = _Job()
+    JOBS.labels(job_type, "running").inc()
+    started = time.perf_counter()
+    try:
+        yield job
+    finally:
+        JOBS.labels(job_type, "running").dec()
+        JOBS_FINISHED.labels(job_type, job.outcome).inc()
+        JOB_DURATION.labels(job_type, job.outcome).observe(time.perf_counter() - started)
+
+
+#=== POOLS (read at scrape time) ===
+
+class _PoolCollector:
+    def collect(self):
+        connections = GaugeMetricFamily(
+            "coachassist_db_pool_connections",
+            "Database pool connections by state",
+            labels=["pool", "state"],
+        )
+        waiting = GaugeMetricFamily(
+            "coachassist_db_pool_requests_waiting",
+            "Requests waiting for a database connection",
+            labels=["pool"],
+        )
+        checkouts = CounterMetricFamily(
+            "coachassist_db_pool_checkouts",
+            "Database connections handed out",
+            labels=["pool"],
+        )
+        timeouts = CounterMetricFamily(
+            "coachassist_db_pool_timeouts",
+            "Connection requests that timed out",
+            labels=["pool"],
+        )
+
+        sync = pool_stats()
+        if sync:
+            connections.add_metric(["sync", "in_use"], sync["in_use"])
+            connections.add_metric(["sync", "idle"], sync["idle"])
+            connections.add_metric(["sync", "max"], sync["max_size"])
+            checkouts.add_metric(["sync"], sync["checkouts"])
+            timeouts.add_metric(["sync"], sync["timeouts"])
+
+        pool = async_pool_stats()
+        if pool:
+            available = pool.get("pool_available", 0)
+            connections.add_metric(["async", "in_use"], pool.get("pool_size", 0) - available)
+            connections.add_metric(["async", "idle"], available)
+            connections.add_metric(["async", "max"], pool.get("pool_max", 0))
+            waiting.add_metric(["async"], pool.get("requests_waiting", 0))
+            checkouts.add_metric(["async"], pool.get("requests_num", 0))
+            timeouts.add_metric(["async"], pool.get("requests_errors", 0))
+
+        bcrypt = bcrypt_pool_stats()
+        bcrypt_jobs = GaugeMetricFamily(
+            "coachassist_bcrypt_jobs",
+            "bcrypt jobs in the process pool by state",
+            labels=["state"],
+        )
+        bcrypt_jobs.add_metric(["running"], bcrypt["running"])
+        bcrypt_jobs.add_metric(["queued"], bcrypt["queued"])
+        bcrypt_rejected = CounterMetricFamily(
+            "coachassist_bcrypt_rejected",
+            "bcrypt jobs refused because the queue was full",
+        )
+        bcrypt_rejected.add_metric([], bcrypt["rejected"])
+
+        return [connections, waiting, checkouts, timeouts, bcrypt_jobs, bcrypt_rejected]
+
+
+REGISTRY.register(_PoolCollector())
+
+
+def render():
+    """Returns (body, content type) for the /metrics endpoint."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+#=== ASGI MIDDLEWARE ===
+
+def _route_template(scope) -> str:
+    """
+    Path template of the route that answered the request, so that
+    /teams/1 and /teams/2 share a series. The router stores the matched
+    route in the scope; requests that matched none share one label.
+    """
+
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """
+    Records request latency per route template and requests in flight.
+
+    The route is only known once the router has matched it, so the
+    in-flight gauge is labelled by method alone.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = "500"
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(method, _route_template(scope), status).observe(
+                time.perf_counter() - started
+            )
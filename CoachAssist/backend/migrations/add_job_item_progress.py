@@ -0,0 +1,86 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+
+if os.path.exists("backend/.env"):
+    load_dotenv("backend/.env")
+else:
+    load_dotenv()
+
+
+def get_db_connection():
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        conn = psycopg2.connect(database_url)
+    else:
+        conn = psycopg2.connect(
+            host=os.getenv("PGHOST"),
+            database=os.getenv("PGDATABASE"),
+            user=os.getenv("PGUSER"),
+            password=os.getenv("PGPASSWORD"),
+            sslmode="require" if os.getenv("PGHOST") else "disable"
+        )
+    conn.autocommit = True
+    return conn
+
+
+def add_item_progress():
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        # Per-item progress of batch jobs (clip_batch), see backend/job_progress.py
+        for table in ("upload_jobs", "upscale_jobs"):
+            print(f"Adding {table}.item_progress column...")
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS item_progress JSONB;")
+
+        # Pushed to open /jobs/events streams by backend/job_events.py; items are read
+        # from the row (has_items), as NOTIFY payloads must be under 8000 bytes
+        print("Updating notify_job_progress() function...")
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION notify_job_progress() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'UPDATE'
+                   AND NEW.status IS NOT DISTINCT FROM OLD.status
+                   AND NEW.progress IS NOT DISTINCT FROM OLD.progress
+                   AND NEW.step IS NOT DISTINCT FROM OLD.step
+                   AND NEW.item_progress IS NOT DISTINCT FROM OLD.item_progress THEN
+                    RETURN NEW;
+                END IF;
+
+                PERFORM pg_notify('job_progress', json_build_object(
+                    'table', TG_TABLE_NAME,
+                    'id', NEW.id,
+                    'user_id', NEW.user_id,
+                    'job_type', NEW.job_type,
+                    'video_id', NEW.video_id,
+                    'team_id', NEW.team_id,
+                    'match_id', NEW.match_id,
+                    'status', NEW.status,
+                    'progress', NEW.progress,
+                    'step', NEW.step,
+                    'has_items', NEW.item_progress IS NOT NULL
+                )::text);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+
+        for table in ("upload_jobs", "upscale_jobs"):
+            print(f"Updating {table} progress trigger...")
+            cur.execute(f"DROP TRIGGER IF EXISTS {table}_notify_progress ON {table};")
+            cur.execute(f"""
+                CREATE TRIGGER {table}_notify_progress
+                AFTER INSERT OR UPDATE OF status, progress, step, item_progress ON {table}
+                FOR EACH ROW EXECUTE FUNCTION notify_job_progress();
+            """)
+
+        print("Job item progress added successfully.")
+        cur.close()
+        conn.close()
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    add_item_progress()
@@ -0,0 +1,44 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+
+if os.path.exists("backend/.env"):
+    load_dotenv("backend/.env")
+else:
+    load_dotenv()
+
+
+def get_db_connection():
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        conn = psycopg2.connect(database_url)
+    else:
+        conn = psycopg2.connect(
+            host=os.getenv("PGHOST"),
+            database=os.getenv("PGDATABASE"),
+            user=os.getenv("PGUSER"),
+            password=os.getenv("PGPASSWORD"),
+            sslmode="require" if os.getenv("PGHOST") else "disable"
+        )
+    conn.autocommit = True
+    return conn
+
+
+def add_column():
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        # Keyframe times of the video (seconds), see backend/clip_engine.py
+        print("Adding videos.keyframes column...")
+        cur.execute("ALTER TABLE videos ADD COLUMN IF NOT EXISTS keyframes DOUBLE PRECISION[];")
+
+        print("videos.keyframes added successfully.")
+        cur.close()
+        conn.close()
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    add_column()
@@ -0,0 +1,78 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+
+if os.path.exists("backend/.env"):
+    load_dotenv("backend/.env")
+else:
+    load_dotenv()
+
+
+def get_db_connection():
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        conn = psycopg2.connect(database_url)
+    else:
+        conn = psycopg2.connect(
+            host=os.getenv("PGHOST"),
+            database=os.getenv("PGDATABASE"),
+            user=os.getenv("PGUSER"),
+            password=os.getenv("PGPASSWORD"),
+            sslmode="require" if os.getenv("PGHOST") else "disable"
+        )
+    conn.autocommit = True
+    return conn
+
+
+def create_triggers():
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        # Pushed to open /jobs/events streams by backend/job_events.py
+        print("Creating notify_job_progress() function...")
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION notify_job_progress() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'UPDATE'
+                   AND NEW.status IS NOT DISTINCT FROM OLD.status
+                   AND NEW.progress IS NOT DISTINCT FROM OLD.progress
+                   AND NEW.step IS NOT DISTINCT FROM OLD.step THEN
+                    RETURN NEW;
+                END IF;
+
+                PERFORM pg_notify('job_progress', json_build_object(
+                    'table', TG_TABLE_NAME,
+                    'id', NEW.id,
+                    'user_id', NEW.user_id,
+                    'job_type', NEW.job_type,
+                    'video_id', NEW.video_id,
+                    'team_id', NEW.team_id,
+                    'match_id', NEW.match_id,
+                    'status', NEW.status,
+                    'progress', NEW.progress,
+                    'step', NEW.step
+                )::text);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+
+        for table in ("upload_jobs", "upscale_jobs"):
+            print(f"Creating {table} progress trigger...")
+            cur.execute(f"DROP TRIGGER IF EXISTS {table}_notify_progress ON {table};")
+            cur.execute(f"""
+                CREATE TRIGGER {table}_notify_progress
+                AFTER INSERT OR UPDATE OF status, progress, step ON {table}
+                FOR EACH ROW EXECUTE FUNCTION notify_job_progress();
+            """)
+
+        print("Job progress triggers created successfully.")
+        cur.close()
+        conn.close()
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    create_triggers()
@@ -0,0 +1,96 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+
+if os.path.exists("backend/.env"):
+    load_dotenv("backend/.env")
+else:
+    load_dotenv()
+
+
+def get_db_connection():
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        conn = psycopg2.connect(database_url)
+    else:
+        conn = psycopg2.connect(
+            host=os.getenv("PGHOST"),
+            database=os.getenv("PGDATABASE"),
+            user=os.getenv("PGUSER"),
+            password=os.getenv("PGPASSWORD"),
+            sslmode="require" if os.getenv("PGHOST") else "disable"
+        )
+    conn.autocommit = True
+    return conn
+
+
+# (table, default job_type)
+JOB_TABLES = (("upload_jobs", "upload"), ("upscale_jobs", "upscale"))
+
+
+def create_job_queue():
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        for table, default_type in JOB_TABLES:
+            print(f"Creating {table} table...")
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id SERIAL PRIMARY KEY,
+                    video_id   INTEGER,
+                    user_id    INTEGER,
+                    team_id    INTEGER,
+                    match_id   INTEGER,
+                    status     VARCHAR(20),
+                    progress   INTEGER,
+                    step       VARCHAR(100),
+                    created_at TIMESTAMP DEFAULT NOW()
+                );
+            """)
+
+            # Queue columns; payload stays NULL on rows written before the queue
+            print(f"Adding queue columns to {table}...")
+            cur.execute(f"""
+                ALTER TABLE {table}
+                ADD COLUMN IF NOT EXISTS job_type VARCHAR(20) NOT NULL DEFAULT '{default_type}',
+                ADD COLUMN IF NOT EXISTS payload JSONB,
+                ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS max_attempts INTEGER NOT NULL DEFAULT 3,
+                ADD COLUMN IF NOT EXISTS run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+                ADD COLUMN IF NOT EXISTS locked_by TEXT,
+                ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS last_error TEXT;
+            """)
+
+            # Jobs of the old in-process background tasks cannot be resumed
+            print(f"Failing unfinished {table} rows from before the queue...")
+            cur.execute(f"""
+                UPDATE {table}
+                SET status = 'failed', step = 'interrupted'
+                WHERE payload IS NULL
+                  AND status IN ('queued', 'processing')
+                  AND lease_expires_at IS NULL;
+            """)
+            print(f"  {cur.rowcount} row(s) failed")
+
+            print(f"Creating {table} queue indexes...")
+            cur.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_queued "
+                f"ON {table}(job_type, run_after, id) WHERE status = 'queued';"
+            )
+            cur.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_leased "
+                f"ON {table}(job_type, lease_expires_at) WHERE status = 'processing';"
+            )
+
+        print("Job queue created successfully (or already exists).")
+        cur.close()
+        conn.close()
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    create_job_queue()
@@ -0,0 +1,63 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+
+if os.path.exists("backend/.env"):
+    load_dotenv("backend/.env")
+else:
+    load_dotenv()
+
+
+def get_db_connection():
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        conn = psycopg2.connect(database_url)
+    else:
+        conn = psycopg2.connect(
+            host=os.getenv("PGHOST"),
+            database=os.getenv("PGDATABASE"),
+            user=os.getenv("PGUSER"),
+            password=os.getenv("PGPASSWORD"),
+            sslmode="require" if os.getenv("PGHOST") else "disable"
+        )
+    conn.autocommit = True
+    return conn
+
+
+def create_tables():
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        # Content-hash index of stored uploads, see backend/video_blobs.py
+        print("Creating video_blobs table...")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS video_blobs (
+                id SERIAL PRIMARY KEY,
+                team_id      INTEGER NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+                content_hash CHAR(64) NOT NULL,
+                storage_path TEXT NOT NULL,
+                size_bytes   BIGINT,
+                ref_count    INTEGER NOT NULL DEFAULT 0,
+                created_at   TIMESTAMP DEFAULT NOW(),
+                UNIQUE (team_id, content_hash)
+            );
+        """)
+
+        # Videos uploaded before this migration keep blob_id NULL and own their file
+        print("Adding videos.blob_id column...")
+        cur.execute("""
+            ALTER TABLE videos
+            ADD COLUMN IF NOT EXISTS blob_id INTEGER REFERENCES video_blobs(id) ON DELETE SET NULL;
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_videos_blob ON videos(blob_id);")
+
+        print("Video blob tables created successfully.")
+        cur.close()
+        conn.close()
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    create_tables()
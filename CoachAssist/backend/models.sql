@@ -29,6 +29,10 @@ ALTER TABLE users
 ADD COLUMN password_reset_code TEXT,
 ADD COLUMN password_reset_expires TIMESTAMP;
 
+-- Token version: bumped on password change to revoke issued JWTs
+ALTER TABLE users
+ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0;
+
 -- PENDING USERS
 CREATE TABLE pending_users (
     id SERIAL PRIMARY KEY,
@@ -464,3 +468,128 @@ CREATE INDEX IF NOT EXISTS idx_drawboards_team   ON drawboards(team_id);
 CREATE INDEX IF NOT EXISTS idx_drawboards_match  ON drawboards(match_id);
 CREATE INDEX IF NOT EXISTS idx_drawboards_video  ON drawboards(video_id);
 CREATE INDEX IF NOT EXISTS idx_versions_board_at ON drawboard_versions(drawboard_id, created_at DESC);
+
+-- =========================
+-- MEDIA JOBS (upload / clip / upscale queue, see job_queue.py)
+-- =========================
+
+CREATE TABLE IF NOT EXISTS upload_jobs (
+    id SERIAL PRIMARY KEY,
+    video_id   INTEGER,
+    user_id    INTEGER,
+    team_id    INTEGER,
+    match_id   INTEGER,
+    status     VARCHAR(20),
+    progress   INTEGER,
+    step       VARCHAR(100),
+    created_at TIMESTAMP DEFAULT NOW(),
+    job_type         VARCHAR(20) NOT NULL DEFAULT 'upload',  -- upload | clip | clip_batch | hls | preview
+    payload          JSONB,
+    item_progress    JSONB,   -- per-item progress of batch jobs, [{"status", "progress"}, ...]
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    max_attempts     INTEGER NOT NULL DEFAULT 3,
+    run_after        TIMESTAMP NOT NULL DEFAULT NOW(),
+    locked_by        TEXT,
+    lease_expires_at TIMESTAMP,
+    heartbeat_at     TIMESTAMP,
+    last_error       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS upscale_jobs (
+    id SERIAL PRIMARY KEY,
+    video_id   INTEGER,
+    user_id    INTEGER,
+    team_id    INTEGER,
+    match_id   INTEGER,
+    status     VARCHAR(20),
+    progress   INTEGER,
+    step       VARCHAR(100),
+    created_at TIMESTAMP DEFAULT NOW(),
+    job_type         VARCHAR(20) NOT NULL DEFAULT 'upscale',
+    payload          JSONB,
+    item_progress    JSONB,
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    max_attempts     INTEGER NOT NULL DEFAULT 3,
+    run_after        TIMESTAMP NOT NULL DEFAULT NOW(),
+    locked_by        TEXT,
+    lease_expires_at TIMESTAMP,
+    heartbeat_at     TIMESTAMP,
+    last_error       TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_upload_jobs_queued  ON upload_jobs(job_type, run_after, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_upload_jobs_leased  ON upload_jobs(job_type, lease_expires_at) WHERE status = 'processing';
+CREATE INDEX IF NOT EXISTS idx_upscale_jobs_queued ON upscale_jobs(job_type, run_after, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_upscale_jobs_leased ON upscale_jobs(job_type, lease_expires_at) WHERE status = 'processing';
+
+-- Job progress notifications for GET /jobs/events (see job_events.py)
+-- item_progress stays out of the payload (NOTIFY payloads must be under 8000 bytes);
+-- has_items tells the stream to read it from the row
+CREATE OR REPLACE FUNCTION notify_job_progress() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.status IS NOT DISTINCT FROM OLD.status
+       AND NEW.progress IS NOT DISTINCT FROM OLD.progress
+       AND NEW.step IS NOT DISTINCT FROM OLD.step
+       AND NEW.item_progress IS NOT DISTINCT FROM OLD.item_progress THEN
+        RETURN NEW;
+    END IF;
+
+    PERFORM pg_notify('job_progress', json_build_object(
+        'table', TG_TABLE_NAME,
+        'id', NEW.id,
+        'user_id', NEW.user_id,
+        'job_type', NEW.job_type,
+        'video_id', NEW.video_id,
+        'team_id', NEW.team_id,
+        'match_id', NEW.match_id,
+        'status', NEW.status,
+        'progress', NEW.progress,
+        'step', NEW.step,
+        'has_items', NEW.item_progress IS NOT NULL
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS upload_jobs_notify_progress ON upload_jobs;
+CREATE TRIGGER upload_jobs_notify_progress
+AFTER INSERT OR UPDATE OF status, progress, step, item_progress ON upload_jobs
+FOR EACH ROW EXECUTE FUNCTION notify_job_progress();
+
+DROP TRIGGER IF EXISTS upscale_jobs_notify_progress ON upscale_jobs;
+CREATE TRIGGER upscale_jobs_notify_progress
+AFTER INSERT OR UPDATE OF status, progress, step, item_progress ON upscale_jobs
+FOR EACH ROW EXECUTE FUNCTION notify_job_progress();
+
+-- =========================
+-- VIDEO BLOBS (content-hash dedup of uploads and clips, see video_blobs.py)
+-- =========================
+
+CREATE TABLE IF NOT EXISTS video_blobs (
+    id SERIAL PRIMARY KEY,
+    team_id      INTEGER NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    content_hash CHAR(64) NOT NULL,          -- sha256 of the uploaded file, or clip_key() of a clip
+    storage_path TEXT NOT NULL,
+    size_bytes   BIGINT,
+    ref_count    INTEGER NOT NULL DEFAULT 0, -- videos rows sharing the file
+    created_at   TIMESTAMP DEFAULT NOW(),
+    UNIQUE (team_id, content_hash)
+);
+
+ALTER TABLE videos
+ADD COLUMN IF NOT EXISTS blob_id INTEGER REFERENCES video_blobs(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_videos_blob ON videos(blob_id);
+
+-- Storage prefix of the video's HLS ladder (see hls_ladder.py), NULL until built
+ALTER TABLE videos
+ADD COLUMN IF NOT EXISTS hls_path TEXT;
+
+-- Storage prefix of the video's poster and thumbnail sprites (see video_previews.py), NULL until built
+ALTER TABLE videos
+ADD COLUMN IF NOT EXISTS preview_path TEXT;
+
+-- Keyframe times of the video in seconds (see clip_engine.py), NULL until indexed
+ALTER TABLE videos
+ADD COLUMN IF NOT EXISTS keyframes DOUBLE PRECISION[];
@@ -0,0 +1,197 @@
+"""
+password_hashing.py
+
+bcrypt hashing and verification off the request path.
+
+Provides:
+- hash_password_async() / verify_password_async(): run bcrypt in a
+  dedicated process pool (BCRYPT_WORKERS processes), so logins and signups
+  neither hold Starlette's threadpool nor take CPU from the event loop
+- A bounded queue: at most BCRYPT_MAX_PENDING jobs wait or run at once,
+  further requests get a 503 instead of piling up behind each other
+- needs_rehash(): True when a stored hash was made with a cost factor other
+  than BCRYPT_ROUNDS, so login can upgrade it transparently
+- bcrypt_pool_stats(): queue depth, jobs in flight, rejections and
+  average wait / run times, for monitoring
+
+Worker processes are started with "spawn" so they do not inherit the
+server's threads, connections or locks. They only import this module.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException
+
+#Cost factor for new hashes. Stored hashes with another cost are rehashed
+#on the user's next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(os.cpu_count() or 1, 4))))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "64"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "rejected": 0,
+    "failed": 0,
+    "pending": 0,           # queued + running
+    "max_pending": 0,
+    "wait_time": 0.0,       # seconds between submit and a worker picking the job up
+    "run_time": 0.0,        # seconds spent inside bcrypt
+}
+
+
+#=== WORKER FUNCTIONS (run in the pool's processes) ===
+
+def _hash(password: str, rounds: int, submitted_at: float):
+    started = time.time()
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+    return hashed, started - submitted_at, time.time() - started
+
+
+def _check(password: str, hashed: str, submitted_at: float):
+    started = time.time()
+    try:
+        ok = bcrypt.checkpw(password.encode(), hashed.encode())
+    except ValueError:
+        ok = False
+    return ok, started - submitted_at, time.time() - started
+
+
+def _noop():
+    return None
+
+
+#=== POOL LIFECYCLE ===
+
+def get_bcrypt_pool() -> ProcessPoolExecutor:
+    """Returns the process pool, creating it on first use."""
+
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=BCRYPT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+async def start_bcrypt_pool():
+    """Starts every worker up front so the first logins do not pay for it."""
+
+    loop = asyncio.get_running_loop()
+    pool = get_bcrypt_pool()
+    await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(BCRYPT_WORKERS)))
+
+
+def shutdown_bcrypt_pool():
+    """Stops the worker processes. Called on app shutdown."""
+
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+async def _submit(fn, *args):
+    """
+    Runs fn(*args, submitted_at) in the pool and returns its result.
+    Raises HTTPException(503) when BCRYPT_MAX_PENDING jobs are already queued.
+    """
+
+    if _stats["pending"] >= BCRYPT_MAX_PENDING:
+        _stats["rejected"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-in requests right now, please try again"
+        )
+
+    _stats["submitted"] += 1
+    _stats["pending"] += 1
+    _stats["max_pending"] = max(_stats["max_pending"], _stats["pending"])
+
+    loop = asyncio.get_running_loop()
+    try:
+        result, waited, ran = await loop.run_in_executor(
+            get_bcrypt_pool(), fn, *args, time.time()
+        )
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        _stats["pending"] -= 1
+
+    _stats["completed"] += 1
+    _stats["wait_time"] += max(waited, 0.0)
+    _stats["run_time"] += ran
+    return result
+
+
+#=== PUBLIC API ===
+
+async def hash_password_async(password: str) -> str:
+    """Async hash_password: bcrypt with BCRYPT_ROUNDS, in the process pool."""
+
+    return await _submit(_hash, password, BCRYPT_ROUNDS)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Async verify_password, in the process pool."""
+
+    if not hashed:
+        return False
+    return await _submit(_check, password, hashed)
+
+
+def hash_rounds(hashed: str):
+    """Cost factor of a bcrypt hash ($2b$12$...), or None if it is not one."""
+
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True when `hashed` was made with a cost factor other than BCRYPT_ROUNDS."""
+
+    rounds = hash_rounds(hashed)
+    return rounds is not None and rounds != BCRYPT_ROUNDS
+
+
+def bcrypt_pool_stats() -> dict:
+    """Queue depth and timing counters of the bcrypt pool."""
+
+    stats = dict(_stats)
+    completed = stats.pop("completed")
+    wait_time = stats.pop("wait_time")
+    run_time = stats.pop("run_time")
+
+    running = min(stats["pending"], BCRYPT_WORKERS)
+
+    stats.update({
+        "completed": completed,
+        "running": running,
+        "queued": stats["pending"] - running,
+        "avg_wait_ms": round(wait_time / completed * 1000, 2) if completed else 0.0,
+        "avg_run_ms": round(run_time / completed * 1000, 2) if completed else 0.0,
+        "workers": BCRYPT_WORKERS,
+        "max_pending_allowed": BCRYPT_MAX_PENDING,
+        "rounds": BCRYPT_ROUNDS,
+        "started": _pool is not None,
+    })
+    return stats
@@ -0,0 +1,227 @@
+"""
+query_stats.py
+
+Per-request SQL instrumentation.
+
+Provides:
+- Cursor classes for psycopg2 (sync pool) and psycopg 3 (async pool) that
+  record every statement's duration, row count and call site
+- QueryStatsMiddleware: collects the statements run while a request is
+  being answered, adds an X-DB-Queries summary header and logs the
+  statements at DEBUG level
+- N+1 detection: a warning when the same statement shape runs more than
+  DB_N_PLUS_ONE_THRESHOLD times in one request
+
+Statements run outside a request (background tasks, scripts), or after
+the response has been sent, are not recorded.
+Set DB_QUERY_STATS=0 to turn the instrumentation off.
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import contextvars
+from functools import lru_cache
+
+import psycopg2.extensions
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("DB_QUERY_STATS", "1") != "0"
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = {
+    os.path.join(_BACKEND_DIR, name)
+    for name in ("query_stats.py", "database.py", "async_database.py")
+}
+
+_current = contextvars.ContextVar("query_log", default=None)
+
+
+class QueryLog:
+    """Statements recorded for one request."""
+
+    def __init__(self):
+        self.queries = []       # [(shape, duration, rowcount, call_site)]
+        self.finished = False
+
+    def record(self, sql, duration, rowcount):
+        self.queries.append((normalize_sql(sql), duration, rowcount, _call_site()))
+
+    @property
+    def total_time(self):
+        return sum(q[1] for q in self.queries)
+
+    def repeated(self):
+        """Returns {shape: (count, call_site)} for shapes above the N+1 threshold."""
+
+        counts = {}
+        for shape, _, _, site in self.queries:
+            count, first_site = counts.get(shape, (0, site))
+            counts[shape] = (count + 1, first_site)
+
+        return {
+            shape: value for shape, value in counts.items()
+            if value[0] > N_PLUS_ONE_THRESHOLD
+        }
+
+    def header(self):
+        return f"count={len(self.queries)}, time_ms={self.total_time * 1000:.1f}"
+
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(sql):
+    """
+    Reduces a statement to its shape: whitespace collapsed and inline
+    literals replaced with `?`, so repeated queries compare equal.
+    """
+
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    elif not isinstance(sql, str):
+        sql = str(sql)
+
+    return _LITERALS.sub("?", _WHITESPACE.sub(" ", sql).strip())
+
+
+def _call_site():
+    """First stack frame inside the backend that is not database plumbing."""
+
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_BACKEND_DIR) and filename not in _SKIP_FILES:
+            return (
+                f"{os.path.relpath(filename, _BACKEND_DIR)}:"
+                f"{frame.f_lineno} {frame.f_code.co_name}"
+            )
+        frame = frame.f_back
+    return "?"
+
+
+def _record(sql, started, rowcount):
+    log = _current.get()
+    if log is not None and not log.finished and sql:
+        log.record(sql, time.perf_counter() - started, rowcount)
+
+
+#=== psycopg2 (sync pool) ===
+
+class _InstrumentedCursorMixin:
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _record(query, started, self.rowcount)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _record(query, started, self.rowcount)
+
+
+@lru_cache(maxsize=None)
+def _instrumented(cursor_class):
+    if issubclass(cursor_class, _InstrumentedCursorMixin):
+        return cursor_class
+    return type(
+        f"Instrumented{cursor_class.__name__}",
+        (_InstrumentedCursorMixin, cursor_class),
+        {},
+    )
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """
+    psycopg2 connection whose cursors record their statements.
+    Works with any cursor_factory, including ones passed to cursor().
+    """
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = _instrumented(factory)
+        return super().cursor(*args, **kwargs)
+
+
+#=== psycopg 3 (async pool) ===
+
+class InstrumentedAsyncCursor(psycopg.AsyncCursor):
+    """psycopg 3 async cursor that records its statements."""
+
+    async def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            _record(query, started, self.rowcount)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            _record(query, started, self.rowcount)
+
+
+#=== ASGI middleware ===
+
+class QueryStatsMiddleware:
+    """
+    Starts a QueryLog for every HTTP request, adds the X-DB-Queries header
+    and logs the summary once the response body has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _current.set(log)
+        path = f'{scope["method"]} {scope["path"]}'
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", log.header().encode()))
+                message = {**message, "headers": headers}
+
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                if not log.finished:
+                    log.finished = True
+                    _report(path, log)
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            log.finished = True
+            _current.reset(token)
+
+
+def _report(path, log):
+    for shape, (count, site) in log.repeated().items():
+        logger.warning(
+            f"[N+1] {path}: same statement ran {count} times (first at {site}): {shape[:200]}"
+        )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        lines = [
+            f"  {duration * 1000:7.2f} ms  rows={rowcount:<5} {site}  {shape[:120]}"
+            for shape, duration, rowcount, site in log.queries
+        ]
+        logger.debug(f"[DB] {path}: {log.header()}\n" + "\n".join(lines))
@@ -8,7 +8,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from backend.database import get_db
 from backend.routers.auth import require_user
-from backend.routers.team_access import require_team_role
+from backend.routers.team_access import resolve_access
+from backend.metrics import external_call
 from google import genai
 from psycopg2.extras import RealDictCursor
 import os
@@ -39,39 +40,13 @@ class SaveGameAnalysisRequest(BaseModel):
     analysis: str
 
 
+# Game analyses stay owner-only; team_id and game_id come from the request body
 def verify_team_access(team_id: int, user_id: int, db):
-    with db.cursor() as cur:
-        cur.execute(
-            """
-            SELECT id
-            FROM teams
-            WHERE id = %s AND user_id = %s
-            """,
-            (team_id, user_id)
-        )
-        row = cur.fetchone()
-
-    if not row:
-        raise HTTPException(status_code=403, detail="Access denied to this team")
+    resolve_access(db, user_id, "owner", team_id=team_id)
 
 
 def verify_game_access(team_id: int, game_id: int, user_id: int, db):
-    with db.cursor() as cur:
-        cur.execute(
-            """
-            SELECT m.id
-            FROM matches m
-            JOIN teams t ON m.team_id = t.id
-            WHERE m.id = %s
-              AND m.team_id = %s
-              AND t.user_id = %s
-            """,
-            (game_id, team_id, user_id)
-        )
-        row = cur.fetchone()
-
-    if not row:
-        raise HTTPException(status_code=403, detail="Access denied to this game")
+    resolve_access(db, user_id, "owner", team_id=team_id, game_id=game_id)
 
 
 # Promp AI model to analyze player
@@ -119,10 +94,11 @@ async def analyze_player(data: PlayerAnalysisRequest, user=Depends(require_user)
         {data.payload}
         """
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
+        with external_call("gemini", "generate_content"):
+            response = client.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=prompt
+            )
 
         analysis_text = None
 
@@ -152,7 +128,7 @@ def save_player_analysis(
     user=Depends(require_user)
 ):
     try:
-        require_team_role(data.team_id, user["id"], db, "editor")
+        resolve_access(db, user["id"], "editor", team_id=data.team_id)
 
         with db.cursor() as cur:
             cur.execute("""
@@ -184,7 +160,7 @@ def save_player_analysis(
 @router.get("/saved-player-analysis/{team_id}")
 def get_saved_player_analysis(team_id: int, db=Depends(get_db), user=Depends(require_user)):
     try:
-        require_team_role(team_id, user["id"], db, "viewer")
+        resolve_access(db, user["id"], "viewer", team_id=team_id)
 
         with db.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
@@ -264,10 +240,11 @@ async def analyze_game(
         {data.payload}
         """
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
+        with external_call("gemini", "generate_content"):
+            response = client.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=prompt
+            )
 
         analysis_text = None
 
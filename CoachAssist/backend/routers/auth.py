@@ -13,10 +13,14 @@ Implements JWT-based authentication using HTTP Bearer tokens.
 
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
+import os
 import random
 
+from backend.cache import TTLCache
 from backend.database import get_db
+from backend.async_database import get_async_db
 from backend.schemas.auth_schema import (
     SignupSchema,
     LoginSchema,
@@ -26,9 +30,12 @@ from backend.schemas.auth_schema import (
     ForgotPasswordVerifySchema,
     VerifyProfilePasswordChangeSchema
 )
+from backend.password_hashing import (
+    hash_password_async,
+    verify_password_async,
+    needs_rehash
+)
 from backend.utils import (
-    hash_password,
-    verify_password,
     create_token,
     decode_token,
     send_verification_email,
@@ -61,16 +68,32 @@ def generate_code() -> str:
 
 #AUTHENTICATION DEPENDENCY
 
-def require_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-):
+#Stored token version per user id. Tokens carry `uid`/`ver` claims and are
+#authenticated against this table alone; bumping users.token_version
+#revokes every token issued before.
+TOKEN_VERSION_SQL = "SELECT token_version FROM users WHERE id = %s"
+
+token_version_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_VERSION_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("TOKEN_VERSION_CACHE_TTL", "30")),
+    name="token_versions",
+)
+
+def revoke_tokens(user_id: int):
     """
-    Dependency protects routes
-    
-    -Extract JWT from Authorization Header
-    -Decode and validate token
-    -Retrieve corresponding user from database
-    -Return user record if valid
+    Drops the cached token version of a user.
+    Call after bumping users.token_version or deleting the account.
+    """
+
+    token_version_cache.pop(user_id)
+
+def token_payload(credentials: HTTPAuthorizationCredentials) -> dict:
+    """
+    Extracts and validates the JWT from the Authorization header.
+    Returns the payload (with `sub`, `uid` and `ver` claims) or raises 401.
+
+    Tokens issued before token versions (sub only) cannot be revoked by a
+    password change, so they are rejected and the user logs in again.
     """
 
     if not credentials:
@@ -82,92 +105,150 @@ def require_user(
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    username = payload.get("sub")
-    if not username:
+    if not payload.get("sub"):
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    db = get_db()
-    cur = db.cursor()
+    if not is_versioned(payload):
+        raise HTTPException(status_code=401, detail="Session expired, please log in again")
 
-    #Fetch authenticated user
-    cur.execute(
-        """
-        SELECT id, username, email
-        FROM users
-        WHERE username = %s
-        """,
-        (username,)
-    )
+    return payload
 
-    user = cur.fetchone()
-    cur.close()
-    db.close()
+def is_versioned(payload: dict) -> bool:
+    """True for tokens that carry uid + ver (see utils.create_token)."""
 
-    if not user:
+    return payload.get("uid") is not None and payload.get("ver") is not None
+
+def remember_token_version(user_id: int, row):
+    """Caches the version from a TOKEN_VERSION_SQL row; None if the user is gone."""
+
+    if not row:
+        return None
+
+    token_version_cache.set(user_id, row["token_version"])
+    return row["token_version"]
+
+def versioned_user(payload: dict, version) -> dict:
+    """
+    Builds the user dict from the token claims once the stored
+    token version is known. Raises 401 if the user or token is gone.
+    """
+
+    if version is None:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return user  
+    if version != payload["ver"]:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+    return {"id": payload["uid"], "username": payload["sub"], "email": payload.get("email")}
+
+def require_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db=Depends(get_db)
+):
+    """
+    Dependency protects routes
+    
+    -Extract JWT from Authorization Header
+    -Decode and validate token
+    -Check the token version against the database
+    -Return user record if valid
+
+    Uses the request's shared connection (FastAPI caches get_db per request),
+    so auth, role checks and the handler all run on one connection.
+
+    Only the user's token version is needed, usually from
+    token_version_cache.
+    """
+
+    payload = token_payload(credentials)
+
+    version = token_version_cache.get(payload["uid"])
+
+    if version is None:
+        cur = db.cursor()
+        cur.execute(TOKEN_VERSION_SQL, (payload["uid"],))
+        version = remember_token_version(payload["uid"], cur.fetchone())
+        cur.close()
+
+    return versioned_user(payload, version)
+
+async def require_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db=Depends(get_async_db)
+):
+    """
+    Async twin of require_user for `async def` routes.
+    Runs on the request's shared async connection.
+    """
+
+    payload = token_payload(credentials)
+
+    version = token_version_cache.get(payload["uid"])
+
+    if version is None:
+        cur = await db.execute(TOKEN_VERSION_SQL, (payload["uid"],))
+        version = remember_token_version(payload["uid"], await cur.fetchone())
+
+    return versioned_user(payload, version)
 
 
 # SIGNUP / EMAIL VERIFICATION
 
 @router.post("/signup")
-def signup(data: SignupSchema):
+async def signup(data: SignupSchema, db=Depends(get_async_db)):
     """
     Registration Step 1:
      
     -Check for duplicate username/email
     -Store user in pending_users table
     -Send verification code via email
-    """
 
-    db = get_db()
-    cur = db.cursor()
+    The password is hashed in the bcrypt process pool.
+    """
 
     email = normalize_email(data.email)
 
     #Ensure username/email not in use
-    cur.execute(
+    cur = await db.execute(
         "SELECT id FROM users WHERE username=%s OR email=%s",
         (data.username, email)
     )
-    if cur.fetchone():
+    if await cur.fetchone():
         raise HTTPException(400, "Username or email already in use")
 
-    #Remove pending signup with same email
-    cur.execute("DELETE FROM pending_users WHERE email=%s", (email,))
+    password_hash = await hash_password_async(data.password)
 
     code = generate_code()
     expires = datetime.utcnow() + timedelta(minutes=15)
 
-    #Insert into temporary pending_users table
-    cur.execute(
-        """
-        INSERT INTO pending_users
-        (full_name, email, username, password_hash, verification_code, verification_expires)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """,
-        (
-            data.full_name,
-            email,
-            data.username,
-            hash_password(data.password),
-            code,
-            expires
+    async with db.transaction():
+        #Remove pending signup with same email
+        await db.execute("DELETE FROM pending_users WHERE email=%s", (email,))
+
+        #Insert into temporary pending_users table
+        await db.execute(
+            """
+            INSERT INTO pending_users
+            (full_name, email, username, password_hash, verification_code, verification_expires)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            (
+                data.full_name,
+                email,
+                data.username,
+                password_hash,
+                code,
+                expires
+            )
         )
-    )
-
-    send_verification_email(email, code)
 
-    db.commit()
-    cur.close()
-    db.close()
+    await run_in_threadpool(send_verification_email, email, code)
 
     return {"message": "Check your email for a verification code."}
 
 
 @router.post("/verify-email")
-def verify_email(data: VerifyEmailSchema):
+def verify_email(data: VerifyEmailSchema, db=Depends(get_db)):
     """
     Registration Step 2:
     
@@ -176,7 +257,6 @@ def verify_email(data: VerifyEmailSchema):
     -Marks email as verified
     """
 
-    db = get_db()
     cur = db.cursor()
 
     cur.execute(
@@ -220,12 +300,11 @@ def verify_email(data: VerifyEmailSchema):
 
     db.commit()
     cur.close()
-    db.close()
 
     return {"message": "Email verified. You may now log in."}
 
 @router.post("/resend-verification")
-def resend_verification(data: ResendVerificationSchema):
+def resend_verification(data: ResendVerificationSchema, db=Depends(get_db)):
     """
     Resends verification code if:
     
@@ -233,7 +312,6 @@ def resend_verification(data: ResendVerificationSchema):
     -Email not verified
     """
 
-    db = get_db()
     cur = db.cursor()
 
     email = normalize_email(data.email)
@@ -264,45 +342,67 @@ def resend_verification(data: ResendVerificationSchema):
 
     db.commit()
     cur.close()
-    db.close()
 
     return {"message": "Verification code resent."}
 
 # LOGIN / PROFILE
 @router.post("/login")
-def login(data: LoginSchema):
+async def login(data: LoginSchema, db=Depends(get_async_db)):
     """
     Authenticates user by username or email
     Returns JWT token if credentials are valid
-    """
 
-    db = get_db()
-    cur = db.cursor()
+    bcrypt runs in the process pool. Hashes made with an older cost
+    factor are replaced after a successful login.
+    """
 
     identifier = normalize_email(data.username)
 
-    cur.execute(
+    cur = await db.execute(
         """
-        SELECT username, password_hash
+        SELECT id, username, email, password_hash, token_version
         FROM users
         WHERE username=%s OR email=%s
         """,
         (data.username, identifier)
     )
-    user = cur.fetchone()
+    user = await cur.fetchone()
 
-    if not user or not verify_password(data.password, user["password_hash"]):
+    if not user or not await verify_password_async(data.password, user["password_hash"]):
         raise HTTPException(401, "Invalid login credentials")
 
-    token = create_token(user["username"])
+    if needs_rehash(user["password_hash"]):
+        await rehash_password(db, user, data.password)
 
-    cur.close()
-    db.close()
+    token = create_token(
+        user["username"],
+        user_id=user["id"],
+        email=user["email"],
+        token_version=user["token_version"]
+    )
 
     return {"token": token}
 
+async def rehash_password(db, user, password: str):
+    """
+    Re-hashes a verified password with the current BCRYPT_ROUNDS.
+    Skipped when the bcrypt pool is saturated; the next login retries.
+    Only replaces the hash it was computed from, so a concurrent password
+    change wins.
+    """
+
+    try:
+        new_hash = await hash_password_async(password)
+    except HTTPException:
+        return
+
+    await db.execute(
+        "UPDATE users SET password_hash=%s WHERE id=%s AND password_hash=%s",
+        (new_hash, user["id"], user["password_hash"])
+    )
+
 @router.get("/profile")
-def get_profile(user=Depends(require_user)):
+async def get_profile(user=Depends(require_user_async)):
     """
     Returns authenticated user's basic profile info
     """
@@ -317,7 +417,7 @@ def get_profile(user=Depends(require_user)):
 #FORGOT PASSWORD
 
 @router.post("/forgot-password/request")
-def forgot_password_request(data: ForgotPasswordRequestSchema):
+def forgot_password_request(data: ForgotPasswordRequestSchema, db=Depends(get_db)):
     """
     Initiate password reset
 
@@ -326,7 +426,6 @@ def forgot_password_request(data: ForgotPasswordRequestSchema):
     -Store expiration in database
     """
 
-    db = get_db()
     cur = db.cursor()
 
     email = normalize_email(data.email)
@@ -355,26 +454,22 @@ def forgot_password_request(data: ForgotPasswordRequestSchema):
 
     db.commit()
     cur.close()
-    db.close()
 
     return {"message": "Password reset code sent."}
 
 @router.post("/forgot-password/verify")
-def forgot_password_verify(data: ForgotPasswordVerifySchema):
-    db = get_db()
-    cur = db.cursor()
-
+async def forgot_password_verify(data: ForgotPasswordVerifySchema, db=Depends(get_async_db)):
     email = normalize_email(data.email)
 
-    cur.execute(
+    cur = await db.execute(
         """
-        SELECT id, password_reset_expires
+        SELECT id, username, password_reset_expires
         FROM users
         WHERE email=%s AND password_reset_code=%s
         """,
         (email, data.code)
     )
-    user = cur.fetchone()
+    user = await cur.fetchone()
 
     if not user:
         raise HTTPException(400, "Invalid reset code")
@@ -382,27 +477,29 @@ def forgot_password_verify(data: ForgotPasswordVerifySchema):
     if user["password_reset_expires"] < datetime.utcnow():
         raise HTTPException(400, "Reset code expired")
 
-    cur.execute(
+    password_hash = await hash_password_async(data.new_password)
+
+    await db.execute(
         """
         UPDATE users
         SET password_hash=%s,
             password_reset_code=NULL,
-            password_reset_expires=NULL
+            password_reset_expires=NULL,
+            token_version=token_version + 1
         WHERE id=%s
         """,
-        (hash_password(data.new_password), user["id"])
+        (password_hash, user["id"])
     )
 
-    db.commit()
-    cur.close()
-    db.close()
+    #Existing sessions are signed out
+    revoke_tokens(user["id"])
 
     return {"message": "Password reset successful"}
 
 # LOGGED IN PASSWORD CHANGE
 
 @router.post("/profile/request-password-change")
-def request_password_change(user=Depends(require_user)):
+def request_password_change(db=Depends(get_db), user=Depends(require_user)):
     """
     Initiate password reset when logged in
 
@@ -411,7 +508,6 @@ def request_password_change(user=Depends(require_user)):
     -Store expiration in database
     """
     
-    db = get_db()
     cur = db.cursor()
 
     code = generate_code()
@@ -431,19 +527,16 @@ def request_password_change(user=Depends(require_user)):
 
     db.commit()
     cur.close()
-    db.close()
 
     return {"message": "Verification code sent."}
 
 @router.post("/profile/verify-password-change")
-def verify_password_change(
+async def verify_password_change(
     data: VerifyProfilePasswordChangeSchema,
-    user=Depends(require_user)
+    db=Depends(get_async_db),
+    user=Depends(require_user_async)
 ):
-    db = get_db()
-    cur = db.cursor()
-
-    cur.execute(
+    cur = await db.execute(
         """
         SELECT password_reset_expires
         FROM users
@@ -451,7 +544,7 @@ def verify_password_change(
         """,
         (user["id"], data.code)
     )
-    record = cur.fetchone()
+    record = await cur.fetchone()
 
     if not record:
         raise HTTPException(400, "Invalid verification code")
@@ -459,34 +552,45 @@ def verify_password_change(
     if record["password_reset_expires"] < datetime.utcnow():
         raise HTTPException(400, "Verification code expired")
 
-    cur.execute(
+    password_hash = await hash_password_async(data.new_password)
+
+    cur = await db.execute(
         """
         UPDATE users
         SET password_hash=%s,
             password_reset_code=NULL,
-            password_reset_expires=NULL
+            password_reset_expires=NULL,
+            token_version=token_version + 1
         WHERE id=%s
+        RETURNING token_version
         """,
-        (hash_password(data.new_password), user["id"])
+        (password_hash, user["id"])
     )
+    updated = await cur.fetchone()
 
-    db.commit()
-    cur.close()
-    db.close()
+    #Other sessions are signed out; this one continues with a fresh token
+    revoke_tokens(user["id"])
 
-    return {"message": "Password updated successfully"}
+    token = create_token(
+        user["username"],
+        user_id=user["id"],
+        email=user["email"],
+        token_version=updated["token_version"]
+    )
+
+    return {"message": "Password updated successfully", "token": token}
 
 
 #DELETE ACCOUNT
 @router.post("/delete-account")
-def delete_account(user=Depends(require_user)):
-    db = get_db()
+def delete_account(db=Depends(get_db), user=Depends(require_user)):
     cur = db.cursor()
 
     cur.execute("DELETE FROM users WHERE id=%s", (user["id"],))
 
     db.commit()
     cur.close()
-    db.close()
+
+    revoke_tokens(user["id"])
 
     return {"message": "Account deleted successfully"}
@@ -20,7 +20,7 @@ from pydantic import BaseModel, Field
 
 from backend.database import get_db
 from backend.routers.auth import require_user
-from backend.routers.team_access import require_team_role
+from backend.routers.team_access import require_access, resolve_access
 
 
 router = APIRouter(tags=["Drawboards"])
@@ -81,18 +81,6 @@ def _latest_version(board_id: int, db) -> Optional[dict]:
     return row
 
 
-def _verify_video_belongs_to_match(video_id: int, match_id: int, db):
-    cur = db.cursor()
-    cur.execute(
-        "SELECT id FROM videos WHERE id = %s AND match_id = %s",
-        (video_id, match_id),
-    )
-    found = cur.fetchone()
-    cur.close()
-    if not found:
-        raise HTTPException(status_code=404, detail="Video not found for this match")
-
-
 # ---------- List / create boards on a team ----------
 
 @router.get("/teams/{team_id}/drawboards")
@@ -102,10 +90,8 @@ def list_drawboards(
     match_id: Optional[int] = None,
     video_id: Optional[int] = None,
     db=Depends(get_db),
-    user=Depends(require_user),
+    access=Depends(require_access("viewer")),
 ):
-    require_team_role(team_id, user["id"], db, "viewer")
-
     sql = """
         SELECT d.id, d.team_id, d.match_id, d.video_id, d.scope, d.title,
                d.created_by, u.username AS created_by_username,
@@ -148,8 +134,6 @@ def create_drawboard(
     db=Depends(get_db),
     user=Depends(require_user),
 ):
-    require_team_role(team_id, user["id"], db, "editor")
-
     # Per-scope validation matching the table's CHECK constraint.
     if body.scope == "playbook":
         if body.match_id is not None or body.video_id is not None:
@@ -160,19 +144,12 @@ def create_drawboard(
     elif body.scope == "video":
         if body.match_id is None or body.video_id is None:
             raise HTTPException(status_code=400, detail="video scope requires both match_id and video_id")
-        _verify_video_belongs_to_match(body.video_id, body.match_id, db)
 
-    # Match must belong to this team.
-    if body.match_id is not None:
-        cur = db.cursor()
-        cur.execute(
-            "SELECT id FROM matches WHERE id = %s AND team_id = %s",
-            (body.match_id, team_id),
-        )
-        if not cur.fetchone():
-            cur.close()
-            raise HTTPException(status_code=404, detail="Match not found for this team")
-        cur.close()
+    # Editor role, match in this team and video in this match: one query.
+    resolve_access(
+        db, user["id"], "editor",
+        team_id=team_id, match_id=body.match_id, video_id=body.video_id,
+    )
 
     cur = db.cursor()
     try:
@@ -212,10 +189,9 @@ def create_drawboard(
 def get_drawboard(
     board_id: int,
     db=Depends(get_db),
-    user=Depends(require_user),
+    access=Depends(require_access("viewer")),
 ):
     board = _load_board(board_id, db)
-    require_team_role(board["team_id"], user["id"], db, "viewer")
     latest = _latest_version(board_id, db)
     return {"drawboard": board, "latest_version": latest}
 
@@ -224,11 +200,8 @@ def get_drawboard(
 def delete_drawboard(
     board_id: int,
     db=Depends(get_db),
-    user=Depends(require_user),
+    access=Depends(require_access("editor")),
 ):
-    board = _load_board(board_id, db)
-    require_team_role(board["team_id"], user["id"], db, "editor")
-
     cur = db.cursor()
     cur.execute("DELETE FROM drawboards WHERE id = %s", (board_id,))
     db.commit()
@@ -242,11 +215,8 @@ def delete_drawboard(
 def list_versions(
     board_id: int,
     db=Depends(get_db),
-    user=Depends(require_user),
+    access=Depends(require_access("viewer")),
 ):
-    board = _load_board(board_id, db)
-    require_team_role(board["team_id"], user["id"], db, "viewer")
-
     cur = db.cursor()
     cur.execute(
         """
@@ -269,11 +239,8 @@ def get_version(
     board_id: int,
     version_id: int,
     db=Depends(get_db),
-    user=Depends(require_user),
+    access=Depends(require_access("viewer")),
 ):
-    board = _load_board(board_id, db)
-    require_team_role(board["team_id"], user["id"], db, "viewer")
-
     cur = db.cursor()
     cur.execute(
         """
@@ -298,10 +265,8 @@ def save_version(
     body: SaveVersionBody,
     db=Depends(get_db),
     user=Depends(require_user),
+    access=Depends(require_access("editor")),
 ):
-    board = _load_board(board_id, db)
-    require_team_role(board["team_id"], user["id"], db, "editor")
-
     cur = db.cursor()
     try:
         cur.execute(
@@ -332,10 +297,8 @@ def restore_version(
     version_id: int,
     db=Depends(get_db),
     user=Depends(require_user),
+    access=Depends(require_access("editor")),
 ):
-    board = _load_board(board_id, db)
-    require_team_role(board["team_id"], user["id"], db, "editor")
-
     cur = db.cursor()
     cur.execute(
         "SELECT snapshot FROM drawboard_versions WHERE id = %s AND drawboard_id = %s",
@@ -17,8 +17,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from psycopg2.extras import RealDictCursor
 
 from backend.database import get_db
-from backend.routers.auth import require_user
-from backend.routers.team_access import require_game_role
+from backend.routers.team_access import require_access
 from backend.schemas.game_metrics_schema import GameMetricsUpdate
 
 
@@ -28,11 +27,6 @@ router = APIRouter(
 )
 
 
-# HELPER: Verify Game Access (Team Security)
-def verify_game_access(game_id: int, user_id: int, db, required_role: str = "viewer"):
-    require_game_role(game_id, user_id, db, required_role)
-
-
 # =========================
 # GET GAME METRICS
 # =========================
@@ -40,7 +34,7 @@ def verify_game_access(game_id: int, user_id: int, db, required_role: str = "vie
 def get_game_metrics(
     game_id: int,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("viewer"))
 ):
     """
     Retrieves all quantitative metrics for a game.
@@ -51,9 +45,6 @@ def get_game_metrics(
     If no metrics exist yet, returns empty structure.
     """
 
-    user_id = user["id"]
-    verify_game_access(game_id, user_id, db)
-
     with db.cursor(cursor_factory=RealDictCursor) as cur:
 
         # Fetch all quarter rows
@@ -96,7 +87,7 @@ def update_game_metrics(
     game_id: int,
     data: GameMetricsUpdate,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("editor"))
 ):
     """
     Replaces ALL game metrics for a given game.
@@ -111,9 +102,6 @@ def update_game_metrics(
     - Clean synchronization
     """
 
-    user_id = user["id"]
-    verify_game_access(game_id, user_id, db, "editor")
-
     with db.cursor(cursor_factory=RealDictCursor) as cur:
         try:
 
@@ -1,8 +1,7 @@
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from backend.database import get_db
-from backend.routers.auth import require_user
-from backend.routers.team_access import require_game_role
+from backend.routers.team_access import require_access
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -21,17 +20,13 @@ class GameStateUpdate(BaseModel):
     category: str
     data: List[GameStateRow]
 
-def verify_game_access(game_id: int, user_id: int, db, required_role: str = "viewer"):
-    require_game_role(game_id, user_id, db, required_role)
-
 
 @router.get("/{game_id}/state")
 def get_game_state(
     game_id: int, 
     db=Depends(get_db), 
-    user=Depends(require_user)
+    access=Depends(require_access("viewer"))
 ):
-    verify_game_access(game_id, user["id"], db)
     cur = db.cursor()
     
     cur.execute("""
@@ -67,9 +62,8 @@ def update_game_state(
     game_id: int, 
     state_data: dict[str, List[GameStateRow]], 
     db=Depends(get_db), 
-    user=Depends(require_user)
+    access=Depends(require_access("editor"))
 ):
-    verify_game_access(game_id, user["id"], db, "editor")
     cur = db.cursor()
 
     try:
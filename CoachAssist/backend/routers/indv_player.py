@@ -27,8 +27,7 @@ from backend.schemas.indv_player_schema import (
     PlayerUpdate
 )
 from backend.database import get_db
-from backend.routers.auth import require_user
-from backend.routers.team_access import require_team_role
+from backend.routers.team_access import require_access
 
 router = APIRouter(
     prefix="/teams",
@@ -38,10 +37,6 @@ router = APIRouter(
 UnitType = Literal["offense", "defense", "special"]
 
 
-def verify_team_access(team_id: int, user_id: int, db, required_role: str = "viewer"):
-    require_team_role(team_id, user_id, db, required_role)
-
-
 # =========================
 # GET ALL PLAYERS
 # =========================
@@ -50,11 +45,8 @@ def get_players(
     team_id: int,
     unit: Optional[UnitType] = None,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("viewer"))
 ):
-    user_id = user["id"]
-    verify_team_access(team_id, user_id, db, "viewer")
-
     cur = db.cursor()
 
     query = """
@@ -83,11 +75,8 @@ def export_players_pdf(
     team_id: int,
     unit: Optional[UnitType] = None,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("viewer"))
 ):
-    user_id = user["id"]
-    verify_team_access(team_id, user_id, db, "viewer")
-
     cur = db.cursor()
 
     query = """
@@ -149,11 +138,8 @@ def add_player(
     team_id: int,
     player: PlayerCreate,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("editor"))
 ):
-    user_id = user["id"]
-    verify_team_access(team_id, user_id, db, "editor")
-
     if team_id != player.team_id:
         raise HTTPException(status_code=400, detail="Team ID mismatch")
 
@@ -240,7 +226,7 @@ def switch_position(
     player_id: int,
     payload: dict,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("editor"))
 ):
     new_position = payload.get("new_position")
 
@@ -257,8 +243,6 @@ def switch_position(
         cur.close()
         raise HTTPException(status_code=404, detail="Player not found")
 
-    require_team_role(player["team_id"], user["id"], db, "editor")
-
     #  STEP 1: deactivate current player
     cur.execute(
         "UPDATE indv_players SET is_active = FALSE WHERE id = %s",
@@ -349,20 +333,10 @@ def switch_position(
 def delete_player(
     player_id: int,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("editor"))
 ):
-    user_id = user["id"]
     cur = db.cursor()
 
-    cur.execute("SELECT id, team_id FROM indv_players WHERE id = %s", (player_id,))
-    player = cur.fetchone()
-
-    if not player:
-        cur.close()
-        raise HTTPException(status_code=404, detail="Player not found")
-
-    require_team_role(player["team_id"], user_id, db, "editor")
-
     cur.execute("DELETE FROM indv_players WHERE id = %s", (player_id,))
     db.commit()
     cur.close()
@@ -377,9 +351,8 @@ def delete_player(
 def get_player(
     player_id: int,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("viewer"))
 ):
-    user_id = user["id"]
     cur = db.cursor()
 
     cur.execute(
@@ -397,8 +370,6 @@ def get_player(
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    require_team_role(player["team_id"], user_id, db, "viewer")
-
     return player
 
 
@@ -410,9 +381,8 @@ def update_player(
     player_id: int,
     updates: PlayerUpdate,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("editor"))
 ):
-    user_id = user["id"]
     cur = db.cursor()
 
     cur.execute("SELECT id, team_id, athlete_id FROM indv_players WHERE id = %s", (player_id,))
@@ -422,8 +392,6 @@ def update_player(
         cur.close()
         raise HTTPException(status_code=404, detail="Player not found")
 
-    require_team_role(player["team_id"], user_id, db, "editor")
-
     fields = []
     values = []
 
@@ -0,0 +1,118 @@
+"""
+jobs.py
+
+Live progress of a user's media jobs (uploads, clips, upscales).
+
+GET /jobs/events is a Server-Sent Events stream:
+- `snapshot`: every active (queued / processing) job of the user, sent
+  when the stream opens and whenever it had to resynchronise
+- `job`: one job's new status / progress / step, pushed as it changes
+  (batch jobs also carry `items`, the per-clip status / progress, read
+  from the row: they do not fit in a NOTIFY payload)
+- a comment line every JOB_EVENTS_KEEPALIVE seconds keeps proxies from
+  closing an idle stream
+
+One stream covers all of the user's jobs, across teams and matches.
+The per-job status endpoints in videos.py remain for one-off checks.
+
+Authentication uses the usual Bearer header (the frontend reads the
+stream with fetch, not EventSource). The database connection is only
+held while authenticating and while reading a snapshot or a batch's items.
+"""
+
+import os
+import json
+import asyncio
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from backend.async_database import async_connection
+from backend.routers.auth import security, require_user_async
+from backend.job_events import hub
+from backend.job_queue import JOB_TABLES
+
+KEEPALIVE = float(os.getenv("JOB_EVENTS_KEEPALIVE", "15"))
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+EVENT_FIELDS = ("table", "id", "job_type", "video_id", "team_id", "match_id", "status", "progress", "step", "items")
+
+ACTIVE_JOBS_SQL = """
+    SELECT 'upload_jobs' AS "table", id, job_type, video_id, team_id, match_id, status, progress, step,
+           item_progress AS items
+    FROM upload_jobs
+    WHERE user_id = %s AND status IN ('queued', 'processing')
+    UNION ALL
+    SELECT 'upscale_jobs' AS "table", id, job_type, video_id, team_id, match_id, status, progress, step,
+           item_progress AS items
+    FROM upscale_jobs
+    WHERE user_id = %s AND status IN ('queued', 'processing')
+    ORDER BY id
+"""
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def job_items(table: str, job_id: int):
+    if table not in JOB_TABLES.values():
+        return None
+    async with async_connection() as db:
+        cur = await db.execute(f"SELECT item_progress FROM {table} WHERE id = %s", (job_id,))
+        row = await cur.fetchone()
+    return row["item_progress"] if row else None
+
+
+async def active_jobs(user_id: int) -> list:
+    async with async_connection() as db:
+        cur = await db.execute(ACTIVE_JOBS_SQL, (user_id, user_id))
+        return await cur.fetchall()
+
+
+@router.get("/events")
+async def job_events(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    async with async_connection() as db:
+        user = await require_user_async(credentials, db)
+
+    # subscribe before the snapshot so no change falls in between
+    subscription = hub.subscribe(user["id"])
+
+    async def stream():
+        try:
+            yield sse("snapshot", await active_jobs(user["id"]))
+
+            while True:
+                if subscription.needs_resync:
+                    subscription.needs_resync = False
+                    yield sse("snapshot", await active_jobs(user["id"]))
+
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is not None:
+                    if event.get("has_items"):
+                        event = {**event, "items": await job_items(event.get("table"), event.get("id"))}
+                    yield sse("job", {field: event.get(field) for field in EVENT_FIELDS})
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",      # nginx: pass events through unbuffered
+        },
+    )
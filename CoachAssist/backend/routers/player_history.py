@@ -13,12 +13,11 @@ Security:
 - Verifies player belongs to user's team
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from psycopg2.extras import RealDictCursor
 from typing import Optional
 from backend.database import get_db
-from backend.routers.auth import require_user
-from backend.routers.team_access import require_team_role
+from backend.routers.team_access import require_access
 
 router = APIRouter(
     prefix="/players",
@@ -30,7 +29,7 @@ router = APIRouter(
 def get_player_history(
     player_id: int,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("viewer"))
 ):
     """
     Returns full player history across all games.
@@ -41,28 +40,11 @@ def get_player_history(
     - Notes per game
     """
 
-    user_id = user["id"]
+    # Player access (and the player's team) resolved by require_access
+    team_id = access["team_id"]
 
     with db.cursor(cursor_factory=RealDictCursor) as cur:
 
-        # Verify Player Access
-        cur.execute(
-            "SELECT id, team_id FROM indv_players WHERE id = %s",
-            (player_id,)
-        )
-
-        player = cur.fetchone()
-
-        if not player:
-            raise HTTPException(
-                status_code=404,
-                detail="Player not found"
-            )
-
-        require_team_role(player["team_id"], user_id, db, "viewer")
-
-        team_id = player["team_id"]
-
         # Get All Games
         cur.execute(
             """
@@ -16,8 +16,7 @@ Security:
 from fastapi import APIRouter, Depends, HTTPException, status
 from psycopg2.extras import RealDictCursor
 from backend.database import get_db
-from backend.routers.auth import require_user
-from backend.routers.team_access import require_game_role
+from backend.routers.team_access import require_access
 from backend.schemas.player_insights_schema import PlayerInsightsUpdate
 
 router = APIRouter(
@@ -25,14 +24,6 @@ router = APIRouter(
     tags=["Player Insights"]
 )
 
-# HELPER: Verify Game Ownership (Team Security)
-
-def verify_game_access(game_id: int, user_id: int, db, required_role: str = "viewer"):
-    """
-    Ensures the user has at least the required role for the game's team.
-    """
-    require_game_role(game_id, user_id, db, required_role)
-
 # GET PLAYER INSIGHTS (Stats + Notes)
 
 @router.get("/{game_id}/players/{player_id}")
@@ -40,7 +31,7 @@ def get_player_insights(
     game_id: int,
     player_id: int,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("viewer"))
 ):
     """
     Retrieves all analysis data for a player in a specific game.
@@ -52,11 +43,6 @@ def get_player_insights(
     If no stats exist yet, returns an empty stats object.
     """
 
-    user_id = user["id"]
-
-    #Ensure user owns this game
-    verify_game_access(game_id, user_id, db)
-
     with db.cursor(cursor_factory=RealDictCursor) as cur:
 
         # Fetch Stats (ALL QUARTERS)
@@ -109,7 +95,7 @@ def update_player_insights(
     player_id: int,
     data: PlayerInsightsUpdate,
     db=Depends(get_db),
-    user=Depends(require_user)
+    access=Depends(require_access("editor"))
 ):
     """
     Replaces ALL player insights for a given game.
@@ -126,9 +112,6 @@ def update_player_insights(
     - Clean synchronization between UI and database
     """
 
-    user_id = user["id"]
-    verify_game_access(game_id, user_id, db, "editor")
-
     with db.cursor(cursor_factory=RealDictCursor) as cur:
         try:
 
@@ -17,8 +17,7 @@ class PlayerUpdateStatsSchema(BaseModel):
 
 
 @router.post("")
-def create_player(data: PlayerCreateSchema, username=Depends(require_username)):
-    db = get_db()
+def create_player(data: PlayerCreateSchema, username=Depends(require_username), db=Depends(get_db)):
     cur = db.cursor()
 
     cur.execute(
@@ -34,7 +33,6 @@ def create_player(data: PlayerCreateSchema, username=Depends(require_username)):
     player = cur.fetchone()
     db.commit()
     cur.close()
-    db.close()
     return dict(player)
 
 
@@ -3,57 +3,97 @@ team_access.py
 
 Centralized access control for team resources.
 
-Provides helpers to check if a user has the required role
-(owner, editor, viewer) for a given team or game.
+Resolves the user's role (owner, editor, viewer) for a team, together
+with the ownership of the match/game, drawboard, video or player being
+accessed, in a single SQL statement.
+
+- require_access(role): route dependency that reads the path parameters
+  (team_id, match_id, game_id, board_id, video_id, player_id)
+- resolve_access(db, user_id, role, **ids): same check for ids that come
+  from a request body
+- *_async variants for `async def` routes (backend.async_database)
+- require_user_access_async(role): user and access for long requests
+  (streamed uploads), on a connection given back before the route runs
+- role_cache: (team_id, user_id) -> role, so team-only checks skip the
+  query; invalidate_team_role() / invalidate_team() on membership changes
+
+Error semantics:
+- 403 when the user has no role, or a lower one, on the team
+- 404 when a resource does not exist or belongs to another team. If the
+  team is only known through the resource (no team_id in the path), the
+  404 comes first; otherwise the 403 does, so nothing leaks about other
+  teams' resources.
 """
 
-from fastapi import HTTPException
+import os
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials
+
+from backend.cache import TTLCache
+from backend.database import get_db
+from backend.async_database import get_async_db, async_connection
+from backend.routers.auth import security, require_user, require_user_async
 
 ROLE_HIERARCHY = {"owner": 3, "editor": 2, "viewer": 1}
 
+# Resource path parameters: (column holding the resource's team, 404 detail)
+RESOURCES = {
+    "match_id": ("match_team_id", "Match not found"),
+    "game_id": ("match_team_id", "Game not found"),
+    "board_id": ("board_team_id", "Drawboard not found"),
+    "video_id": ("video_team_id", "Video not found"),
+    "player_id": ("player_team_id", "Player not found"),
+}
 
-def get_user_team_role(team_id: int, user_id: int, db):
-    """
-    Returns the user's role for a team, or None if no access.
+# Role of %(user_id)s on team `t`: owner via teams.user_id, otherwise the
+# accepted team_members role, otherwise NULL. The team is the one in the
+# path, or else the team of the first resource found.
+ACCESS_SQL = """
+    SELECT t.id AS team_id,
+           CASE WHEN t.user_id = %(user_id)s THEN 'owner' ELSE tm.role END AS role,
+           m.team_id AS match_team_id,
+           b.team_id AS board_team_id,
+           v.team_id AS video_team_id,
+           v.match_id AS video_match_id,
+           p.team_id AS player_team_id
+    FROM (SELECT 1) AS params
+    LEFT JOIN matches m ON m.id = %(match_id)s::int
+    LEFT JOIN drawboards b ON b.id = %(board_id)s::int
+    LEFT JOIN videos v ON v.id = %(video_id)s::int
+    LEFT JOIN indv_players p ON p.id = %(player_id)s::int
+    LEFT JOIN teams t
+        ON t.id = COALESCE(%(team_id)s::int, m.team_id, b.team_id, v.team_id, p.team_id)
+    LEFT JOIN team_members tm
+        ON tm.team_id = t.id
+       AND tm.user_id = %(user_id)s
+       AND tm.status = 'accepted'
+"""
 
-    Checks:
-    1. Is user the team owner (teams.user_id)?  -> 'owner'
-    2. Is user an accepted team member?          -> role from team_members
-    """
-    cur = db.cursor()
 
-    cur.execute(
-        "SELECT id FROM teams WHERE id = %s AND user_id = %s",
-        (team_id, user_id)
-    )
-    if cur.fetchone():
-        cur.close()
-        return "owner"
-
-    cur.execute(
-        """
-        SELECT role FROM team_members
-        WHERE team_id = %s AND user_id = %s AND status = 'accepted'
-        """,
-        (team_id, user_id)
-    )
-    row = cur.fetchone()
-    cur.close()
+# (team_id, user_id) -> role, "" when the user has no access.
+# Filled from every ACCESS_SQL row whose team exists.
+role_cache = TTLCache(
+    maxsize=int(os.getenv("TEAM_ROLE_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("TEAM_ROLE_CACHE_TTL", "30")),
+    name="team_roles",
+)
+
 
-    if row:
-        return row["role"]
+def invalidate_team_role(team_id: int, user_id: int):
+    """Drops the cached role of one user on one team."""
+    role_cache.pop((team_id, user_id))
 
-    return None
 
+def invalidate_team(team_id: int):
+    """Drops every cached role on a team (e.g. when it is deleted)."""
+    role_cache.pop_where(lambda key: key[0] == team_id)
 
-def require_team_role(team_id: int, user_id: int, db, required_role: str = "viewer"):
+
+def check_role(role, required_role: str = "viewer"):
     """
-    Checks that the user has at least the required role for the team.
-    Returns the actual role string.
-    Raises HTTPException(403) if insufficient access.
+    Raises HTTPException(403) if `role` is missing or below `required_role`.
+    Returns the role string otherwise.
     """
-    role = get_user_team_role(team_id, user_id, db)
-
     if not role:
         raise HTTPException(status_code=403, detail="You do not have access to this team")
 
@@ -63,17 +103,156 @@ def require_team_role(team_id: int, user_id: int, db, required_role: str = "view
     return role
 
 
-def require_game_role(game_id: int, user_id: int, db, required_role: str = "viewer"):
+def _match_id(ids: dict):
+    """Matches are called games in some routers (game_id)."""
+    if ids.get("match_id") is not None:
+        return ids["match_id"]
+    return ids.get("game_id")
+
+
+def _params(user_id: int, ids: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "team_id": ids.get("team_id"),
+        "match_id": _match_id(ids),
+        "board_id": ids.get("board_id"),
+        "video_id": ids.get("video_id"),
+        "player_id": ids.get("player_id"),
+    }
+
+
+def _cached(user_id: int, ids: dict, required_role: str):
+    """
+    Answers team-only checks (no resource ids) from role_cache.
+    Returns None when the query has to run.
+    """
+    if ids.get("team_id") is None or any(ids.get(name) is not None for name in RESOURCES):
+        return None
+
+    role = role_cache.get((ids["team_id"], user_id))
+    if role is None:
+        return None
+
+    return {"team_id": ids["team_id"], "role": check_role(role, required_role)}
+
+
+def _evaluate(row, user_id: int, ids: dict, required_role: str) -> dict:
+    """
+    Applies the 403/404 rules to the ACCESS_SQL row.
+    Returns {"team_id": ..., "role": ...}.
+    """
+    if row["team_id"] is not None:
+        role_cache.set((row["team_id"], user_id), row["role"] or "")
+
+    given = [name for name in RESOURCES if ids.get(name) is not None]
+
+    if ids.get("team_id") is None:
+        for name in given:
+            column, detail = RESOURCES[name]
+            if row[column] is None:
+                raise HTTPException(status_code=404, detail=detail)
+
+    role = check_role(row["role"], required_role)
+
+    for name in given:
+        column, detail = RESOURCES[name]
+        if row[column] != row["team_id"]:
+            raise HTTPException(status_code=404, detail=detail)
+
+    match_id = _match_id(ids)
+    if ids.get("video_id") is not None and match_id is not None:
+        if row["video_match_id"] != match_id:
+            raise HTTPException(status_code=404, detail=RESOURCES["video_id"][1])
+
+    return {"team_id": row["team_id"], "role": role}
+
+
+def resolve_access(db, user_id: int, required_role: str = "viewer", **ids) -> dict:
     """
-    Looks up team_id from a game (match), then checks team role.
-    Returns the actual role string.
+    Checks the user's role and the ownership of every given resource
+    in one query. Keyword arguments are team_id, match_id, game_id,
+    board_id, video_id and player_id; None values are ignored.
+    Returns {"team_id": ..., "role": ...}.
     """
+    cached = _cached(user_id, ids, required_role)
+    if cached:
+        return cached
+
     cur = db.cursor()
-    cur.execute("SELECT team_id FROM matches WHERE id = %s", (game_id,))
-    match = cur.fetchone()
+    cur.execute(ACCESS_SQL, _params(user_id, ids))
+    row = cur.fetchone()
     cur.close()
 
-    if not match:
-        raise HTTPException(status_code=404, detail="Game not found")
+    return _evaluate(row, user_id, ids, required_role)
+
+
+async def resolve_access_async(db, user_id: int, required_role: str = "viewer", **ids) -> dict:
+    """Async twin of resolve_access."""
+    cached = _cached(user_id, ids, required_role)
+    if cached:
+        return cached
+
+    cur = await db.execute(ACCESS_SQL, _params(user_id, ids))
+    row = await cur.fetchone()
+
+    return _evaluate(row, user_id, ids, required_role)
+
+
+def _path_ids(request: Request) -> dict:
+    ids = {}
+
+    for name in ("team_id", *RESOURCES):
+        value = request.path_params.get(name)
+        if value is None:
+            continue
+        try:
+            ids[name] = int(value)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"{name} must be an integer")
+
+    return ids
+
+
+def require_access(required_role: str = "viewer"):
+    """
+    Route dependency: checks access to everything named in the path.
+
+    Usage:
+        @router.delete("/matches/{match_id}")
+        def delete_match(match_id: int, access=Depends(require_access("editor")), ...):
+            ...
+
+    Shares the request's connection and user with get_db / require_user.
+    Returns {"team_id": ..., "role": ...}.
+    """
+
+    def dependency(request: Request, db=Depends(get_db), user=Depends(require_user)):
+        return resolve_access(db, user["id"], required_role, **_path_ids(request))
+
+    return dependency
+
+
+def require_access_async(required_role: str = "viewer"):
+    """Async twin of require_access, for routes on get_async_db."""
+
+    async def dependency(request: Request, db=Depends(get_async_db), user=Depends(require_user_async)):
+        return await resolve_access_async(db, user["id"], required_role, **_path_ids(request))
+
+    return dependency
+
+
+def require_user_access_async(required_role: str = "viewer"):
+    """
+    require_user_async + require_access_async for long `async def` routes.
+
+    Borrows a connection only for the checks, so a route that runs for
+    minutes does not hold one from the pool. Returns (user, access).
+    """
+
+    async def dependency(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+        async with async_connection() as db:
+            user = await require_user_async(credentials, db)
+            access = await resolve_access_async(db, user["id"], required_role, **_path_ids(request))
+        return user, access
 
-    return require_team_role(match["team_id"], user_id, db, required_role)
+    return dependency
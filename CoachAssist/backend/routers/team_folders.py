@@ -17,11 +17,16 @@ Users can only access teams and matches they own.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from psycopg2.extras import RealDictCursor
 from backend.database import get_db
+from backend.async_database import get_async_db
 from backend.schemas.match_schema import MatchCreateSchema
-from backend.routers.auth import require_user
-from backend.routers.team_access import require_team_role, require_game_role
+from backend.routers.auth import require_user, require_user_async
+from backend.routers.team_access import (
+    require_access,
+    require_access_async,
+    invalidate_team,
+    invalidate_team_role,
+)
 from backend.video_providers.photo_handler import (
     upload_photo_to_firebase,
     delete_photo_from_firebase
@@ -45,6 +50,7 @@ async def create_team(
     description: str = Form(None),
     color: str = Form("#9DBA8A"),  # NEW
     image: UploadFile = File(None),
+    db=Depends(get_db),
     user=Depends(require_user)
 ):
     """
@@ -59,7 +65,6 @@ async def create_team(
     if image:
         image_path, image_url = upload_photo_to_firebase(image, user["id"])
 
-    db = get_db()
     cur = db.cursor()
 
     cur.execute(
@@ -84,22 +89,21 @@ async def create_team(
 
     db.commit()
 
+    invalidate_team_role(row["id"], user["id"])
+
     return {"team": dict(row)}
 
 
 # GET ALL TEAMS (owned by user)
 
 @router.get("/")
-def get_teams(user=Depends(require_user)):
+async def get_teams(db=Depends(get_async_db), user=Depends(require_user_async)):
     """
     Returns all teams the user owns or is a member of.
     Ordered by newest first.
     """
 
-    db = get_db()
-    cur = db.cursor()
-
-    cur.execute(
+    cur = await db.execute(
         """
         SELECT DISTINCT t.id, t.name, t.description, t.image_url, t.color, t.created_at,
             CASE WHEN t.user_id = %s THEN 'owner' ELSE tm.role END AS user_role
@@ -111,13 +115,12 @@ def get_teams(user=Depends(require_user)):
         (user["id"], user["id"], user["id"], user["id"])
     )
 
-    return {"teams": cur.fetchall()}
+    return {"teams": await cur.fetchall()}
 
 # SEARCH TEAMS
 
 @router.get("/search")
-def search_teams(query: str, user=Depends(require_user)):
-    db = get_db()
+def search_teams(query: str, db=Depends(get_db), user=Depends(require_user)):
     cur = db.cursor()
 
     cur.execute(
@@ -138,14 +141,12 @@ def search_teams(query: str, user=Depends(require_user)):
 # GET SINGLE TEAM
 
 @router.get("/{team_id}")
-def get_team(team_id: int, user=Depends(require_user)):
+def get_team(team_id: int, db=Depends(get_db), access=Depends(require_access("viewer"))):
     """
     Retrieves a single team if the user has access.
     """
 
-    db = get_db()
-
-    user_role = require_team_role(team_id, user["id"], db, "viewer")
+    user_role = access["role"]
 
     cur = db.cursor()
     cur.execute(
@@ -170,16 +171,12 @@ def get_team(team_id: int, user=Depends(require_user)):
 # DELETE TEAM (also deletes image from Firebase)
 
 @router.delete("/{team_id}")
-def delete_team(team_id: int, user=Depends(require_user)):
+def delete_team(team_id: int, db=Depends(get_db), access=Depends(require_access("owner"))):
     """
     Deletes a team. Only the team owner can delete.
     Also removes associated Firebase image if present.
     """
 
-    db = get_db()
-
-    require_team_role(team_id, user["id"], db, "owner")
-
     cur = db.cursor()
 
     # Get image_path first
@@ -199,6 +196,8 @@ def delete_team(team_id: int, user=Depends(require_user)):
 
     db.commit()
 
+    invalidate_team(team_id)
+
     return {"message": "Team deleted"}
 
 
@@ -212,7 +211,9 @@ async def update_team(
     color: str = Form("#9DBA8A"),  # NEW
     remove_image: str = Form(None),
     image: UploadFile = File(None),
-    user=Depends(require_user)
+    db=Depends(get_db),
+    user=Depends(require_user),
+    access=Depends(require_access("owner"))
 ):
     """
     Updates team name, description, color and optionally team image.
@@ -222,10 +223,6 @@ async def update_team(
     - Image removal
     """
 
-    db = get_db()
-
-    require_team_role(team_id, user["id"], db, "owner")
-
     cur = db.cursor()
 
     cur.execute(
@@ -319,7 +316,8 @@ async def update_team(
 def create_match(
     team_id: int,
     data: MatchCreateSchema,
-    user=Depends(require_user)
+    db=Depends(get_db),
+    access=Depends(require_access("editor"))
 ):
     """
     Creates a new match (game) inside a team.
@@ -329,10 +327,6 @@ def create_match(
     - No duplicate game dates for same team
     """
 
-    db = get_db()
-
-    require_team_role(team_id, user["id"], db, "editor")
-
     cur = db.cursor()
 
     # Check duplicate date
@@ -385,19 +379,13 @@ def create_match(
 # GET MATCHES FOR TEAM
 
 @router.get("/{team_id}/matches")
-def get_matches(team_id: int, user=Depends(require_user)):
+async def get_matches(team_id: int, db=Depends(get_async_db), access=Depends(require_access_async("viewer"))):
     """
     Returns all matches for a team owned by the user.
     Ordered by most recent game first.
     """
 
-    db = get_db()
-
-    require_team_role(team_id, user["id"], db, "viewer")
-
-    cur = db.cursor(cursor_factory=RealDictCursor)
-
-    cur.execute(
+    cur = await db.execute(
         """
         SELECT m.*
         FROM matches m
@@ -407,26 +395,28 @@ def get_matches(team_id: int, user=Depends(require_user)):
         (team_id,)
     )
 
-    rows = cur.fetchall()
+    rows = await cur.fetchall()
 
-    result = []
+    # =========================
+    # FETCH METRICS FOR ALL GAMES (one query, grouped by game)
+    # =========================
+    cur = await db.execute(
+        """
+        SELECT *
+        FROM game_metrics
+        WHERE game_id = ANY(%s)
+        """,
+        ([match["id"] for match in rows],)
+    )
 
-    for match in rows:
-        game_id = match["id"]
+    metrics_by_game = {}
+    for row in await cur.fetchall():
+        metrics_by_game.setdefault(row["game_id"], []).append(row)
 
-        # =========================
-        # FETCH METRICS FOR GAME
-        # =========================
-        cur.execute(
-            """
-            SELECT *
-            FROM game_metrics
-            WHERE game_id = %s
-            """,
-            (game_id,)
-        )
+    result = []
 
-        metric_rows = cur.fetchall()
+    for match in rows:
+        metric_rows = metrics_by_game.get(match["id"], [])
 
         metrics_by_quarter = {}
 
@@ -461,16 +451,12 @@ def get_matches(team_id: int, user=Depends(require_user)):
 # GET SINGLE MATCH
 
 @router.get("/matches/{match_id}")
-def get_match(match_id: int, user=Depends(require_user)):
+def get_match(match_id: int, db=Depends(get_db), access=Depends(require_access("viewer"))):
     """
     Retrieves a specific match if it belongs to a team
     owned by the authenticated user.
     """
 
-    db = get_db()
-
-    require_game_role(match_id, user["id"], db, "viewer")
-
     cur = db.cursor()
 
     cur.execute(
@@ -488,15 +474,11 @@ def get_match(match_id: int, user=Depends(require_user)):
 # DELETE MATCH
 
 @router.delete("/matches/{match_id}")
-def delete_match(match_id: int, user=Depends(require_user)):
+def delete_match(match_id: int, db=Depends(get_db), access=Depends(require_access("editor"))):
     """
     Deletes a match only if it belongs to a team owned by the user.
     """
 
-    db = get_db()
-
-    require_game_role(match_id, user["id"], db, "editor")
-
     cur = db.cursor()
 
     cur.execute("DELETE FROM matches WHERE id = %s", (match_id,))
@@ -511,17 +493,14 @@ def delete_match(match_id: int, user=Depends(require_user)):
 def update_match(
     match_id: int,
     data: MatchCreateSchema,
-    user=Depends(require_user)
+    db=Depends(get_db),
+    access=Depends(require_access("editor"))
 ):
     """
     Updates match metadata (name, opponent, scores, date, description).
     Ensures match belongs to a team owned by user.
     """
 
-    db = get_db()
-
-    require_game_role(match_id, user["id"], db, "editor")
-
     cur = db.cursor()
 
     cur.execute(
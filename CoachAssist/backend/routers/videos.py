@@ -1,20 +1,31 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
+from typing import List, Optional
 from backend.database import get_db
-from backend.routers.auth import require_user
-from backend.routers.team_access import require_team_role
+from backend.async_database import get_async_db, async_connection
+from backend.routers.auth import require_user, require_user_async
+from backend.routers.team_access import require_access, require_access_async, require_user_access_async
 from backend.video_providers.youtube import create_youtube_video
-from fastapi import UploadFile, File
 from backend.video_providers.firebase_storage import upload_video_to_firebase, bucket
-from backend.upscaling_utils.realesrgan import REALSRCAN_BIN, REALSRCAN_DIR
-import subprocess
-import tempfile
-import requests
+from backend.video_providers.multipart_stream import MultipartFileReader
+from backend.video_providers.resumable_upload import ResumableUpload
+from backend.metrics import external_call, track_job
+from backend.job_progress import ProgressReporter, live_status
+from backend.job_queue import enqueue_job, enqueue_job_async, hand_off_job_async, INGEST_FOLLOW_UPS
+from backend.ingest_planner import Mp4BoxScanner
+from backend.hls_ladder import MASTER as HLS_MASTER, PLAYLIST_NAME, render_playlist
+from backend.video_previews import POSTER, THUMBNAILS, render_thumbnails
+from backend.media_storage import media_token, check_media_token, sign_url, delete_prefix
+from backend.video_blobs import (
+    content_hasher, reference_blob_async, register_blob_async, release_blob,
+    clip_range, clip_key, insert_blob_video
+)
 import os
 import uuid
 import logging
-import shutil
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,509 +37,6 @@ router = APIRouter(
     prefix="/teams/{team_id}/matches/{match_id}/videos",
     tags=["Match Videos"]
 )
-#resumable blob uploads will allow the upload progress to be visible 
-#Firebase SDK is meant to work on the frontend, so it would mean a total change in our architecture
-def upload_video_with_progress(file_path, blob, job_id=None, cur=None, db=None,
-                         base_progress=0, progress_span=100):
-
-    file_size = os.path.getsize(file_path)
-
-    session_url = blob.create_resumable_upload_session(
-        content_type="video/mp4"
-    )
-    # 2MB 
-    # chunk_size = 2 * 1024 * 1024  
-    # 256KB
-    chunk_size = 256 * 1024  
-    uploaded = 0
-
-    with open(file_path, "rb") as f:
-        while True:
-            chunk = f.read(chunk_size)
-            if not chunk:
-                break
-
-            start = uploaded
-            end = uploaded + len(chunk) - 1
-
-            headers = {
-                "Content-Type": "video/mp4",
-                "Content-Range": f"bytes {start}-{end}/{file_size}"
-            }
-
-            response = requests.put(session_url, data=chunk, headers=headers)
-
-            if response.status_code not in (200, 201, 308):
-                raise Exception(f"Upload failed: {response.text}")
-
-            uploaded += len(chunk)
-
-            #progress tracking
-            if job_id and cur and db:
-                pct = uploaded / file_size
-                progress = base_progress + int(pct * progress_span)
-
-                update_upload_job(cur, job_id, progress=progress, step="uploading")
-                db.commit()
-
-#background task for video uploading
-def process_video_upload(user_id, team_id, match_id, video_id, job_id, temp_path, original_filename):
-    db = get_db()
-    cur = db.cursor()
-
-    try:
-        update_upload_job(cur, job_id, status="processing", progress=10, step="uploading")
-        db.commit()
-
-
-        # detect extension
-        ext = os.path.splitext(original_filename)[1].lower()
-
-        final_path = temp_path
-        # if not mp4, convert to mp4
-        if ext != ".mp4":
-            logger.info(f"[UPLOAD] Converting {original_filename} to MP4")
-
-            update_upload_job(cur, job_id, progress=15, step="converting")
-            db.commit()
-
-            final_path = convert_to_mp4(temp_path)
-            original_filename = os.path.splitext(original_filename)[0] + ".mp4"
-
-        
-        filename = f"{user_id}_{match_id}_{original_filename}"
-        storage_path = f"users/{user_id}/matches/{match_id}/{filename}"
-
-        blob = bucket.blob(storage_path)
-
-        upload_video_with_progress(
-            final_path,
-            blob,
-            job_id=job_id,
-            cur=cur,
-            db=db,
-            base_progress=20,
-            progress_span=80
-        )
-
-        blob.content_type = "video/mp4"
-        blob.patch()
-
-        # update video record
-        cur.execute(
-            """
-            UPDATE videos
-            SET storage_path = %s,
-                filename = %s
-            WHERE id = %s
-            """,
-            (storage_path, original_filename, video_id)
-        )
-
-        update_upload_job(cur, job_id, status="done", progress=100, step="completed")
-        db.commit()
-
-    except Exception as e:
-        update_upload_job(cur, job_id, status="failed", step=str(e)[:100])
-        db.commit()
-
-    finally:
-        try:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-        except Exception as e:
-            logger.warning(f"Failed to delete temp_path: {e}")
-
-        try:
-            if 'final_path' in locals() and final_path != temp_path and os.path.exists(final_path):
-                os.remove(final_path)
-        except Exception as e:
-            logger.warning(f"Failed to delete final_path: {e}")
-
-        cur.close()
-        db.close()
-
-#mp4 conversion method
-def convert_to_mp4(input_path: str) -> str:
-    output_path = input_path + "_converted.mp4"
-
-    result = subprocess.run([
-        "ffmpeg",
-        "-y",  # overwrite if exists
-        "-i", input_path,
-        "-c:v", "libx264",
-        "-preset", "fast",
-        "-crf", "23",
-        "-c:a", "aac",
-        "-movflags", "+faststart",
-        output_path
-    ], capture_output=True)
-
-    if result.returncode != 0:
-        raise RuntimeError(f"FFmpeg conversion failed: {result.stderr.decode()}")
-
-    return output_path
-
-
-#background task for video clipping
-def process_clip_video(
-    user_id,
-    team_id,
-    match_id,
-    source_video_id,
-    job_id,
-    start,
-    end
-):
-    db = get_db()
-    cur = db.cursor()
-
-    try:
-        update_upload_job(cur, job_id, status="processing", progress=5, step="downloading")
-        db.commit()
-
-        # fetch source video
-        cur.execute("""
-            SELECT storage_path, filename
-            FROM videos
-            WHERE id = %s AND user_id = %s AND team_id = %s AND match_id = %s
-        """, (source_video_id, user_id, team_id, match_id))
-
-        video = cur.fetchone()
-        if not video:
-            raise Exception("Video not found")
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            input_path = os.path.join(tmpdir, "input.mp4")
-            output_path = os.path.join(tmpdir, "clip.mp4")
-
-            # download
-            blob = bucket.blob(video["storage_path"])
-            blob.download_to_filename(input_path)
-
-            update_upload_job(cur, job_id, progress=20, step="clipping")
-            db.commit()
-
-            duration = end - start
-
-            # clip with ffmpeg
-            result = subprocess.run([
-                "ffmpeg",
-                "-ss", str(start),
-                "-i", input_path,
-                "-t", str(duration),
-                "-c", "copy",
-                output_path
-            ], capture_output=True)
-
-            if result.returncode != 0:
-                raise RuntimeError(result.stderr.decode())
-
-            update_upload_job(cur, job_id, progress=40, step="uploading")
-            db.commit()
-
-            # upload with progress
-            clip_filename = f"clip_{uuid.uuid4().hex}.mp4"
-            storage_path = f"users/{user_id}/matches/{match_id}/{clip_filename}"
-
-            blob_out = bucket.blob(storage_path)
-
-            upload_video_with_progress(
-                output_path,
-                blob_out,
-                job_id=job_id,
-                cur=cur,
-                db=db,
-                base_progress=40,
-                progress_span=50  # 40 → 90
-            )
-
-            blob_out.content_type = "video/mp4"
-            blob_out.patch()
-
-        # insert DB record
-        update_upload_job(cur, job_id, progress=90, step="saving")
-        db.commit()
-
-        cur.execute("""
-            INSERT INTO videos (
-                user_id, team_id, match_id,
-                provider, provider_video_id,
-                storage_path, filename
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            user_id,
-            team_id,
-            match_id,
-            "firebase",
-            None,
-            storage_path,
-            clip_filename
-        ))
-
-        update_upload_job(cur, job_id, status="done", progress=100, step="completed")
-        db.commit()
-        logger.info(f"[CLIP] job {job_id} completed")
-
-    except Exception as e:
-        update_upload_job(cur, job_id, status="failed", step=str(e)[:100])
-        db.commit()
-
-    finally:
-        cur.close()
-        db.close()
-
-#verify that the user has access to the match's team
-def verify_match_ownership(team_id: int, match_id: int, user_id: int, required_role: str = "viewer"):
-    db = get_db()
-    try:
-        require_team_role(team_id, user_id, db, required_role)
-
-        cur = db.cursor()
-        cur.execute(
-            "SELECT id FROM matches WHERE id = %s AND team_id = %s",
-            (match_id, team_id)
-        )
-        result = cur.fetchone()
-        cur.close()
-
-        if not result:
-            raise HTTPException(status_code=404, detail="Match not found")
-    finally:
-        db.close()
-
-#update an ongoing job to reflect progress
-def update_upload_job(cur, job_id, status=None, progress=None, step=None):
-    try:
-        cur.execute(
-            """
-            UPDATE upload_jobs
-            SET status = COALESCE(%s, status),
-                progress = COALESCE(%s, progress),
-                step = COALESCE(%s, step)
-            WHERE id = %s
-            """,
-            (status, progress, step, job_id)
-        )
-    except Exception as e:
-        logger.error(f"[UPSCALE] Update failed for job={job_id}: {e}", exc_info=True)
-def update_upscale_job(cur, job_id, status=None, progress=None, step=None):
-    try:
-        cur.execute(
-            """
-            UPDATE upscale_jobs
-            SET status = COALESCE(%s, status),
-                progress = COALESCE(%s, progress),
-                step = COALESCE(%s, step)
-            WHERE id = %s
-            """,
-            (status, progress, step, job_id)
-        )
-    except Exception as e:
-        logger.error(f"[UPSCALE] Update failed for job={job_id}: {e}", exc_info=True)
-
-#upscale video in background
-def process_upscale_video_in_background(user_id: int, team_id: int, match_id: int, video_id: int, job_id: int):
-    db = get_db()
-    cur = db.cursor()
-    
-    logger.info(f"[UPSCALE] Starting upscale for user={user_id}, video={video_id}")
-    #update job to reflect that it has begun
-    update_upscale_job(cur, job_id, status="processing", progress=5, step="downloading")
-    db.commit()
-    try:
-        cur.execute(
-            """
-            SELECT storage_path, filename
-            FROM videos
-            WHERE id = %s
-              AND user_id = %s
-              AND team_id = %s
-              AND match_id = %s
-            """,
-            (video_id, user_id, team_id, match_id)
-        )
-
-        video = cur.fetchone()
-        if not video or not video["storage_path"]:
-            update_upscale_job(cur, job_id, status="failed", step="video not found")
-            db.commit()
-            logger.error(f"[UPSCALE] Video not found or missing storage_path: {video}")
-            return
-
-        logger.info(f"[UPSCALE] Found video: {video['filename']}, storage_path={video['storage_path']}")
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            input_path = os.path.join(tmpdir, "input.mp4")
-            frames_dir = os.path.join(tmpdir, "frames")
-            upscaled_dir = os.path.join(tmpdir, "upscaled")
-            output_path = os.path.join(tmpdir, "output.mp4")
-
-            os.makedirs(frames_dir, exist_ok=True)
-            os.makedirs(upscaled_dir, exist_ok=True)
-
-            logger.info(f"[UPSCALE] Created temp dirs: input={input_path}, frames={frames_dir}, upscaled={upscaled_dir}, output={output_path}")
-
-            # Step 1: Download from Firebase
-            try:
-                logger.info(f"[UPSCALE] Downloading video from Firebase: {video['storage_path']}")
-                
-                blob = bucket.blob(video["storage_path"])
-                blob.download_to_filename(input_path)
-                logger.info(f"[UPSCALE] Successfully downloaded video ({os.path.getsize(input_path)} bytes)")
-            except Exception as e:
-                logger.error(f"[UPSCALE] Firebase download failed: {e}")
-                raise
-            # update job to reflect that the current stage is frame extraction
-            update_upscale_job(cur, job_id, progress=20, step="extracting_frames")
-            db.commit()
-            # Step 2: Extract frames
-            try:
-                logger.info(f"[UPSCALE] Extracting frames from video...")
-                result = subprocess.run(
-                    ["ffmpeg", "-i", input_path, f"{frames_dir}/frame_%04d.png"],
-                    capture_output=True,
-                    text=True,
-                    check=False
-                )
-                if result.returncode != 0:
-                    logger.error(f"[UPSCALE] ffmpeg frame extraction failed: {result.stderr}")
-                    raise RuntimeError(f"ffmpeg frame extraction failed: {result.stderr}")
-                frame_count = len([f for f in os.listdir(frames_dir) if f.endswith('.png')])
-                logger.info(f"[UPSCALE] Successfully extracted {frame_count} frames")
-            except Exception as e:
-                logger.error(f"[UPSCALE] Frame extraction failed: {e}")
-                raise
-            # update job to reflect that the current stage is upscaling frames
-            update_upscale_job(cur, job_id, progress=40, step="upscaling_frames")
-            db.commit()
-            # Step 3: Upscale frames
-            try:
-                logger.info(f"[UPSCALE] Upscaling {frame_count} frames using Real-ESRGAN (model: realesrgan-x4plus)...")
-                logger.info(f"[UPSCALE] REALSRCAN_BIN={REALSRCAN_BIN}, REALSRCAN_DIR={REALSRCAN_DIR}")
-                
-                if not os.path.exists(REALSRCAN_BIN):
-                    raise RuntimeError(f"Real-ESRGAN binary not found at {REALSRCAN_BIN}")
-                
-                result = subprocess.run([
-                    REALSRCAN_BIN,
-                    "-i", frames_dir,
-                    "-o", upscaled_dir,
-                    "-n", "realesrgan-x4plus",
-                    "-m", os.path.join(REALSRCAN_DIR, "models")
-                ], cwd=REALSRCAN_DIR, capture_output=True, text=True, check=False)
-                
-                if result.returncode != 0:
-                    logger.error(f"[UPSCALE] Real-ESRGAN failed: {result.stderr}")
-                    raise RuntimeError(f"Real-ESRGAN failed: {result.stderr}")
-                
-                upscaled_count = len([f for f in os.listdir(upscaled_dir) if f.endswith('.png')])
-                logger.info(f"[UPSCALE] Successfully upscaled {upscaled_count} frames")
-            except Exception as e:
-                logger.error(f"[UPSCALE] Upscaling failed: {e}")
-                raise
-            # update job to reflect that the current stage is rebuilding the video
-            update_upscale_job(cur, job_id, progress=70, step="rebuilding_video")
-            db.commit()
-            # Step 4: Rebuild video
-            try:
-                logger.info(f"[UPSCALE] Rebuilding video from upscaled frames...")
-                result = subprocess.run([
-                    "ffmpeg",
-                    "-framerate", "30",
-                    "-i", f"{upscaled_dir}/frame_%04d.png",
-                    "-c:v", "libx264",
-                    "-pix_fmt", "yuv420p",
-                    output_path
-                ], capture_output=True, text=True, check=False)
-                
-                if result.returncode != 0:
-                    logger.error(f"[UPSCALE] ffmpeg video rebuild failed: {result.stderr}")
-                    raise RuntimeError(f"ffmpeg video rebuild failed: {result.stderr}")
-                
-                output_size = os.path.getsize(output_path)
-                logger.info(f"[UPSCALE] Successfully rebuilt video ({output_size} bytes)")
-            except Exception as e:
-                logger.error(f"[UPSCALE] Video rebuild failed: {e}")
-                raise
-            # update job to reflect that the current stage is reuploading video
-            update_upscale_job(cur, job_id, progress=80, step="uploading")
-            db.commit()
-            # Step 5: Upload to Firebase
-            try:
-                
-                logger.info(f"[UPSCALE] Uploading upscaled video to Firebase...")
-                upscale_filename = f"upscaled_{uuid.uuid4().hex}.mp4"
-                storage_path = f"users/{user_id}/matches/{match_id}/{upscale_filename}"
-
-                blob_out = bucket.blob(storage_path)
-
-                upload_video_with_progress(
-                    output_path,
-                    blob_out,
-                    job_id=job_id,
-                    cur=cur,
-                    db=db,
-                    base_progress=80,   # your existing stage
-                    progress_span=10    # goes from 80 → 90
-                )
-
-                blob_out.content_type = "video/mp4"
-                blob_out.patch()
-                logger.info(f"[UPSCALE] Successfully uploaded to Firebase: {storage_path}")
-            except Exception as e:
-                logger.error(f"[UPSCALE] Firebase upload failed: {e}")
-                raise
-            # update job to reflect that the current stage is updating the database records
-            update_upscale_job(cur, job_id, progress=90, step="updating records")
-            db.commit()
-            # Step 6: Insert database record
-            try:
-                logger.info(f"[UPSCALE] Inserting new video record into database...")
-                cur.execute(
-                    """
-                    INSERT INTO videos (
-                        user_id,
-                        team_id,
-                        match_id,
-                        provider,
-                        provider_video_id,
-                        storage_path,
-                        filename
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (
-                        user_id,
-                        team_id,
-                        match_id,
-                        "firebase",
-                        None,
-                        storage_path,
-                        f"Upscaled {video['filename']}"
-                    )
-                )
-                db.commit()
-                logger.info(f"[UPSCALE] Successfully inserted video record into database")
-            except Exception as e:
-                db.rollback()
-                logger.error(f"[UPSCALE] Database insert failed: {e}")
-                raise
-        update_upscale_job(cur, job_id, status="done", progress=100, step="completed")
-        db.commit()
-        logger.info(f"[UPSCALE] Upscaling completed successfully for video={video_id}")
-
-    except Exception as e:
-        logger.error(f"[UPSCALE] Upscaling failed for user={user_id}, video={video_id}: {e}", exc_info=True)
-        db.commit()
-        update_upscale_job(cur, job_id, status="failed", step=str(e)[:100])
-
-    finally:
-        cur.close()
-        db.close()
-
-
 # -------------------------
 # Request schema
 # -------------------------
@@ -541,6 +49,15 @@ class ClipVideoSchema(BaseModel):
     start: float
     end: float
 
+#batch clipping schema
+class ClipRangeSchema(ClipVideoSchema):
+    name: Optional[str] = None
+
+class ClipBatchSchema(BaseModel):
+    clips: List[ClipRangeSchema]
+
+CLIP_BATCH_MAX = int(os.getenv("CLIP_BATCH_MAX", "100"))
+
 #renaming schema
 class RenameVideoRequest(BaseModel):
     filename: str
@@ -554,9 +71,10 @@ class RenameVideoRequest(BaseModel):
 @router.post("/youtube")
 def register_youtube_video(
     payload: YouTubeVideoSchema,
-    user=Depends(require_user)
+    db=Depends(get_db),
+    user=Depends(require_user),
+    access=Depends(require_access("editor"))
 ):
-    db = get_db()
     cur = db.cursor()
 
     # Extract the video info
@@ -592,89 +110,92 @@ def register_youtube_video(
         raise HTTPException(400, f"Failed to register video: {e} database: {db} cur: {cur} video: {video}")
     finally:
         cur.close()
-        db.close()
 
     return new_video
 
 
-@router.get("")
-def list_videos(
-    team_id: int,
-    match_id: int,
-    user=Depends(require_user)
-):
-    verify_match_ownership(team_id, match_id, user["id"])
-
-    db = get_db()
-    cur = db.cursor()
-
-    cur.execute(
-        """
-        SELECT id, provider, provider_video_id, storage_path, filename, created_at
-        FROM videos
-        WHERE team_id = %s
-          AND match_id = %s
-        ORDER BY created_at DESC
-        """,
-        (team_id, match_id)
-    )
-
-    rows = cur.fetchall()
-    cur.close()
-    db.close()
-
+#response entries of the videos rows; signs storage URLs (blocking calls), so it is
+#run in the threadpool
+def _video_entries(team_id, match_id, rows):
     videos = []
 
     for row in rows:
         playback_url = None
+        hls_url = None
+        poster_url = None
+        thumbnails_url = None
 
         if row["provider"] == "youtube":
             playback_url = f"https://www.youtube.com/watch?v={row['provider_video_id']}"
 
         elif row["provider"] == "firebase":
             blob = bucket.blob(row["storage_path"])
-            playback_url = blob.generate_signed_url(
-                expiration=timedelta(hours=4),
-                method="GET"
-            )
+            with external_call("firebase", "sign_url"):
+                playback_url = blob.generate_signed_url(
+                    expiration=timedelta(hours=4),
+                    method="GET"
+                )
+
+            # adaptive-bitrate stream, once the ladder is built (hls_ladder.py)
+            if row["hls_path"]:
+                hls_url = (
+                    f"/teams/{team_id}/matches/{match_id}/videos/{row['id']}/hls/{HLS_MASTER}"
+                    f"?token={media_token(row['id'])}"
+                )
+
+            # poster + scrubbing thumbnails, once extracted (video_previews.py)
+            if row["preview_path"]:
+                poster_url = sign_url(bucket, f"{row['preview_path']}/{POSTER}")
+                thumbnails_url = (
+                    f"/teams/{team_id}/matches/{match_id}/videos/{row['id']}/{THUMBNAILS}"
+                    f"?token={media_token(row['id'])}"
+                )
 
         videos.append({
             "id": row["id"],
             "filename": row["filename"],
             "playback_url": playback_url,
+            "hls_url": hls_url,
+            "poster_url": poster_url,
+            "thumbnails_url": thumbnails_url,
             "created_at": row["created_at"]
         })
 
     return videos
 
 
-#firebase upload
-@router.post("")
-def upload_video(
+@router.get("")
+async def list_videos(
     team_id: int,
     match_id: int,
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    user=Depends(require_user)
+    db=Depends(get_async_db),
+    access=Depends(require_access_async("viewer"))
 ):
-    #verify that the user has editor access
-    verify_match_ownership(team_id, match_id, user["id"], "editor")
-
-    db = get_db()
-    cur = db.cursor()
+    cur = await db.execute(
+        """
+        SELECT id, provider, provider_video_id, storage_path, hls_path, preview_path, filename, created_at
+        FROM videos
+        WHERE team_id = %s
+          AND match_id = %s
+        ORDER BY created_at DESC
+        """,
+        (team_id, match_id)
+    )
 
-    temp_path = None
+    rows = await cur.fetchall()
 
-    try:
-        # 1. Save temp file
-        ext = os.path.splitext(file.filename)[1].lower()
+    return await run_in_threadpool(_video_entries, team_id, match_id, rows)
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            temp_path = tmp.name
 
-        # 2. Create DB record FIRST (placeholder video)
-        cur.execute(
+#upload_jobs / videos rows for a new upload, created before the content is stored
+#without a payload the job is run by this request (streamed .mp4) and never queued;
+#with one it is queued for a worker, unless content_hash says the team already has
+#the file: the video then points at that copy and the job is created done
+#returns (video_id, job_id, duplicate)
+async def create_upload_records(db, user_id, team_id, match_id, filename, payload=None, content_hash=None):
+    async with db.transaction():
+        # placeholder video
+        cur = await db.execute(
             """
             INSERT INTO videos (
                 user_id,
@@ -687,56 +208,229 @@ def upload_video(
             VALUES (%s, %s, %s, %s, %s, %s)
             RETURNING id
             """,
-            (
-                user["id"],
-                team_id,
-                match_id,
-                "firebase",
-                None,
-                file.filename
-            )
+            (user_id, team_id, match_id, "firebase", None, filename)
         )
+        video_id = (await cur.fetchone())["id"]
 
-        video_id = cur.fetchone()["id"]
+        if content_hash and await reference_blob_async(db, team_id, content_hash, video_id):
+            await db.execute(
+                "UPDATE videos SET filename = %s WHERE id = %s",
+                (os.path.splitext(filename)[0] + ".mp4", video_id)
+            )
+            cur = await db.execute(
+                """
+                INSERT INTO upload_jobs (
+                    video_id, user_id, team_id, match_id,
+                    status, progress, step, job_type, payload
+                )
+                VALUES (%s, %s, %s, %s, 'done', 100, 'completed', 'upload', '{}')
+                RETURNING id
+                """,
+                (video_id, user_id, team_id, match_id)
+            )
+            return video_id, (await cur.fetchone())["id"], True
 
-        # 3. Create upload job
-        cur.execute(
+        if payload is not None:
+            job_id = await enqueue_job_async(db, "upload", video_id, user_id, team_id, match_id, payload)
+            return video_id, job_id, False
+
+        cur = await db.execute(
             """
             INSERT INTO upload_jobs (
                 video_id, user_id, team_id, match_id,
-                status, progress, step
+                status, progress, step, job_type, payload
             )
-            VALUES (%s, %s, %s, %s, 'queued', 0, 'queued')
+            VALUES (%s, %s, %s, %s, 'processing', 0, 'uploading', 'upload', '{}')
             RETURNING id
             """,
-            (video_id, user["id"], team_id, match_id)
+            (video_id, user_id, team_id, match_id)
         )
+        job_id = (await cur.fetchone())["id"]
 
-        job_id = cur.fetchone()["id"]
+    return video_id, job_id, False
 
-        db.commit()
 
+#best-effort removal of a blob nothing points at (staged originals, duplicates)
+async def delete_unused_blob(storage_path):
+    try:
+        with external_call("firebase", "delete"):
+            await run_in_threadpool(bucket.blob(storage_path).delete)
+    except Exception as e:
+        logger.warning(f"[UPLOAD] Failed to delete unused blob {storage_path}: {e}")
+
+
+#streams the file part of a request into a blob through a resumable upload session
+#on_progress(offset) is awaited after every flushed chunk
+#inspect(chunk), if given, sees every chunk on its way through
+#returns (size, sha256 hex digest) of the stored content, hashed on the way through
+async def stream_to_storage(reader, storage_path, content_type, on_progress=None, inspect=None):
+    blob = bucket.blob(storage_path)
+    with external_call("firebase", "create_upload_session"):
+        session_url = await run_in_threadpool(
+            blob.create_resumable_upload_session, content_type=content_type
+        )
+
+    upload = ResumableUpload(session_url, content_type=content_type)
+    hasher = content_hasher()
+    size = 0
+
+    try:
+        async for chunk in reader.chunks():
+            hasher.update(chunk)
+            size += len(chunk)
+            if inspect:
+                inspect(chunk)
+            if upload.write(chunk):
+                await run_in_threadpool(upload.flush)
+                if on_progress:
+                    await on_progress(upload.offset)
+
+        await run_in_threadpool(upload.finish)
     finally:
-        cur.close()
-        db.close()
-
-    # 4. Start background upload
-    background_tasks.add_task(
-        process_video_upload,
-        user["id"],
-        team_id,
-        match_id,
-        video_id,
-        job_id,
-        temp_path,
-        file.filename
-    )
+        upload.close()
+
+    return size, hasher.hexdigest()
+
+
+#streams an .mp4 request body into a resumable upload session; nothing touches the disk
+#the content is only known to be a duplicate once it has all arrived: the video then
+#points at the team's existing copy and the one just stored is deleted
+#an .mp4 without faststart (moov after mdat) is handed to a worker to be remuxed in place
+#connections are borrowed per write, never held while the body streams in
+async def stream_video_upload(reader, expected_size, user_id, team_id, match_id, video_id, job_id, original_filename):
+    filename = f"{user_id}_{match_id}_{video_id}_{original_filename}"
+    storage_path = f"users/{user_id}/matches/{match_id}/{filename}"
+
+    reporter = ProgressReporter("upload_jobs", job_id, user_id)
+
+    async def report(offset):
+        # progress against Content-Length (includes the multipart framing)
+        if expected_size:
+            progress = min(5 + int(offset / expected_size * 90), 95)
+            await reporter.update_async(None, progress=progress, step="uploading")
+
+    with track_job("upload") as job:
+        try:
+            await reporter.update_async(None, status="processing", progress=5, step="uploading")
+
+            boxes = Mp4BoxScanner()
+            size, content_hash = await stream_to_storage(
+                reader, storage_path, "video/mp4", on_progress=report, inspect=boxes.feed
+            )
+
+            if not boxes.moov_first:
+                logger.info(f"[UPLOAD] {original_filename} is not faststart, queueing a remux")
+                async with async_connection() as db:
+                    await hand_off_job_async(db, "upload", job_id, {
+                        "source_path": storage_path,
+                        "filename": original_filename,
+                        "content_hash": content_hash,
+                    })
+                reporter.record(status="queued", progress=0, step="queued")
+                job.done()
+                return
+
+            async with async_connection() as db:
+                async with db.transaction():
+                    await db.execute(
+                        """
+                        UPDATE videos
+                        SET storage_path = %s,
+                            filename = %s
+                        WHERE id = %s
+                        """,
+                        (storage_path, original_filename, video_id)
+                    )
+                    registered = await register_blob_async(db, team_id, content_hash, storage_path, size, video_id)
+
+                    # previews and streaming renditions of a new file are built by a worker
+                    if registered["inserted"]:
+                        for job_type in INGEST_FOLLOW_UPS:
+                            await enqueue_job_async(db, job_type, video_id, user_id, team_id, match_id)
+
+                await reporter.update_async(db, status="done", progress=100, step="completed")
+            job.done()
+
+        except HTTPException as e:
+            await reporter.update_async(None, status="failed", step=str(e.detail)[:100])
+            raise
+        except ClientDisconnect:
+            await reporter.update_async(None, status="failed", step="client disconnected")
+            raise
+        except Exception as e:
+            logger.error(f"[UPLOAD] Streaming upload failed for job={job_id}: {e}", exc_info=True)
+            await reporter.update_async(None, status="failed", step=str(e)[:100])
+            raise HTTPException(status_code=502, detail="Upload to storage failed")
+
+    if not registered["inserted"]:
+        logger.info(f"[UPLOAD] {original_filename} is a duplicate of {registered['storage_path']}")
+        await delete_unused_blob(storage_path)
+
+
+#firebase upload
+#.mp4 files are streamed to storage while the request body arrives;
+#other formats are staged in storage as-is and converted by a worker (upload job)
+#no connection is held for the request: a body can take minutes to arrive
+@router.post("")
+async def upload_video(
+    team_id: int,
+    match_id: int,
+    request: Request,
+    auth=Depends(require_user_access_async("editor"))
+):
+    user, access = auth
+    reader = MultipartFileReader(request, field="file")
+    original_filename = await reader.open()
+    ext = os.path.splitext(original_filename)[1].lower()
+
+    if ext == ".mp4":
+        async with async_connection() as db:
+            video_id, job_id, _ = await create_upload_records(
+                db, user["id"], team_id, match_id, original_filename
+            )
+
+        await stream_video_upload(
+            reader,
+            int(request.headers.get("content-length") or 0),
+            user["id"],
+            team_id,
+            match_id,
+            video_id,
+            job_id,
+            original_filename
+        )
+
+    else:
+        # 1. Stage the original (only input that has to be transcoded)
+        source_path = f"users/{user['id']}/matches/{match_id}/incoming/{uuid.uuid4().hex}{ext}"
+        try:
+            _, content_hash = await stream_to_storage(
+                reader, source_path, reader.content_type or "application/octet-stream"
+            )
+        except (HTTPException, ClientDisconnect):
+            raise
+        except Exception as e:
+            logger.error(f"[UPLOAD] Staging {original_filename} failed: {e}", exc_info=True)
+            raise HTTPException(status_code=502, detail="Upload to storage failed")
+
+        # 2. Create DB records (placeholder video + queued upload job),
+        #    or reuse the team's copy if this exact file was uploaded before
+        async with async_connection() as db:
+            video_id, job_id, duplicate = await create_upload_records(
+                db, user["id"], team_id, match_id, original_filename,
+                payload={"source_path": source_path, "filename": original_filename, "content_hash": content_hash},
+                content_hash=content_hash
+            )
+
+        if duplicate:
+            logger.info(f"[UPLOAD] {original_filename} is already stored for team {team_id}, skipping conversion")
+            await delete_unused_blob(source_path)
 
-    # 5. RETURN IMMEDIATELY
+    # 3. RETURN
     return {
         "video": {
             "id": video_id,
-            "filename": file.filename,
+            "filename": original_filename,
             "playback_url": None
         },
         "job_id": job_id
@@ -749,23 +443,22 @@ def delete_video(
     team_id: int,
     match_id: int,
     video_id: int,
-    user=Depends(require_user)
+    db=Depends(get_db),
+    user=Depends(require_user),
+    access=Depends(require_access("editor"))
 ):
-    verify_match_ownership(team_id, match_id, user["id"], "editor")
-
-    db = get_db()
     cur = db.cursor()
 
     try:
-        # Get video details before deleting
+        # Delete from database
         cur.execute(
             """
-            SELECT provider, storage_path
-            FROM videos
+            DELETE FROM videos
             WHERE id = %s
                 AND user_id = %s
                 AND team_id = %s
                 AND match_id = %s
+            RETURNING provider, storage_path, hls_path, preview_path, blob_id
             """,
             (video_id, user["id"], team_id, match_id)
         )
@@ -775,33 +468,35 @@ def delete_video(
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
 
+        # a deduplicated file is shared: only the last video using it deletes it
+        storage_path = video["storage_path"]
+        if video["blob_id"] is not None:
+            storage_path = release_blob(cur, video["blob_id"])
+
+        db.commit()
+
         # Delete from Firebase if applicable
-        if video["provider"] == "firebase" and video["storage_path"]:
+        if video["provider"] == "firebase" and storage_path:
             try:
-                blob = bucket.blob(video["storage_path"])
-                blob.delete()
+                blob = bucket.blob(storage_path)
+                with external_call("firebase", "delete"):
+                    blob.delete()
             except Exception as firebase_error:
                 print(f"Warning: Failed to delete blob from Firebase: {firebase_error}")
 
-        # Delete from database
-        cur.execute(
-            """
-            DELETE FROM videos
-            WHERE id = %s
-                AND user_id = %s
-            """,
-            (video_id, user["id"])
-        )
-
-        db.commit()
+            for prefix in (video["hls_path"], video["preview_path"]):
+                if prefix:
+                    delete_prefix(bucket, prefix)
 
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to delete video: {str(e)}")
 
     finally:
         cur.close()
-        db.close()
 
     return {"message": "Video deleted successfully"}
 
@@ -812,11 +507,10 @@ def rename_video(
     match_id: int,
     video_id: int,
     payload: RenameVideoRequest,
-    user=Depends(require_user)
+    db=Depends(get_db),
+    user=Depends(require_user),
+    access=Depends(require_access("editor"))
 ):
-    verify_match_ownership(team_id, match_id, user["id"], "editor")
-
-    db = get_db()
     cur = db.cursor()
 
     try:
@@ -846,71 +540,123 @@ def rename_video(
 
     finally:
         cur.close()
-        db.close()
 
     return updated_video
 
 #clipping method
+#a range the team has already clipped from the same file is answered at once (200)
+#with a new video of the stored clip (video_blobs.py); otherwise a job is queued (202)
 @router.post("/{video_id}/clip", status_code=202)
 def clip_video(
     team_id: int,
     match_id: int,
     video_id: int,
     payload: ClipVideoSchema,
-    background_tasks: BackgroundTasks,
-    user=Depends(require_user)
+    response: Response,
+    db=Depends(get_db),
+    user=Depends(require_user),
+    access=Depends(require_access("editor"))
 ):
-    verify_match_ownership(team_id, match_id, user["id"], "editor")
-
-    if payload.end <= payload.start:
+    start, end = clip_range(payload.start, payload.end)
+    if end <= start or start < 0:
         raise HTTPException(400, "Invalid time range")
 
-    db = get_db()
     cur = db.cursor()
 
     try:
         # validate source exists
         cur.execute("""
-            SELECT id FROM videos
+            SELECT id, storage_path FROM videos
             WHERE id = %s AND user_id = %s AND team_id = %s AND match_id = %s
         """, (video_id, user["id"], team_id, match_id))
 
-        if not cur.fetchone():
+        video = cur.fetchone()
+        if not video:
             raise HTTPException(404, "Video not found")
 
-        # create upload job
-        cur.execute("""
-            INSERT INTO upload_jobs (
-                video_id, user_id, team_id, match_id,
-                status, progress, step
+        if video["storage_path"]:
+            cached = insert_blob_video(
+                cur, team_id, clip_key(video["storage_path"], start, end),
+                user["id"], match_id, f"clip_{uuid.uuid4().hex}.mp4"
             )
-            VALUES (%s, %s, %s, %s, 'queued', 0, 'queued')
-            RETURNING id
+            if cached:
+                db.commit()
+                logger.info(f"[CLIP] {start}-{end}s of video {video_id} is cached as {cached['storage_path']}")
+                response.status_code = 200
+                return {
+                    "status": "done",
+                    "video_id": cached["id"],
+                    "cached": True
+                }
+
+        # queue clip job (run by a worker, progress in upload_jobs)
+        job_id = enqueue_job(
+            cur, "clip", video_id, user["id"], team_id, match_id,
+            {"start": start, "end": end}
+        )
+        db.commit()
+        logger.info(f"[CLIP] Queued clip job {job_id}")
+
+    finally:
+        cur.close()
+
+    return {
+        "status": "queued",
+        "job_id": job_id
+    }
+
+
+#batch clipping: many ranges of one video in one job (one source read, parallel cuts,
+#one INSERT, cached ranges reused); per-clip progress, and the id of the clip's video
+#once it is saved, is in the job's items, in the order of payload.clips
+@router.post("/{video_id}/clips", status_code=202)
+def clip_video_batch(
+    team_id: int,
+    match_id: int,
+    video_id: int,
+    payload: ClipBatchSchema,
+    db=Depends(get_db),
+    user=Depends(require_user),
+    access=Depends(require_access("editor"))
+):
+    if not payload.clips:
+        raise HTTPException(400, "No clips requested")
+    if len(payload.clips) > CLIP_BATCH_MAX:
+        raise HTTPException(400, f"At most {CLIP_BATCH_MAX} clips per batch")
+    ranges = [clip_range(clip.start, clip.end) for clip in payload.clips]
+    for start, end in ranges:
+        if end <= start or start < 0:
+            raise HTTPException(400, f"Invalid time range {start}-{end}")
+
+    cur = db.cursor()
+
+    try:
+        # validate source exists
+        cur.execute("""
+            SELECT id FROM videos
+            WHERE id = %s AND user_id = %s AND team_id = %s AND match_id = %s
         """, (video_id, user["id"], team_id, match_id))
 
-        job_id = cur.fetchone()["id"]
+        if not cur.fetchone():
+            raise HTTPException(404, "Video not found")
+
+        job_id = enqueue_job(
+            cur, "clip_batch", video_id, user["id"], team_id, match_id,
+            {"clips": [
+                {"start": start, "end": end, "name": clip.name}
+                for (start, end), clip in zip(ranges, payload.clips)
+            ]}
+        )
         db.commit()
-        logger.info(f"[CLIP] Created upload job {job_id}")
+        logger.info(f"[CLIP] Queued clip batch job {job_id} ({len(payload.clips)} clips)")
 
     finally:
         cur.close()
-        db.close()
-
-    # start background clipping
-    background_tasks.add_task(
-        process_clip_video,
-        user["id"],
-        team_id,
-        match_id,
-        video_id,
-        job_id,
-        payload.start,
-        payload.end
-    )
 
     return {
         "status": "queued",
-        "job_id": job_id
+        "job_id": job_id,
+        "clips": len(payload.clips)
     }
 
 
@@ -920,13 +666,11 @@ def upscale_video(
     team_id: int,
     match_id: int,
     video_id: int,
-    background_tasks: BackgroundTasks,
-    user=Depends(require_user)
+    db=Depends(get_db),
+    user=Depends(require_user),
+    access=Depends(require_access("editor"))
 ):
-    verify_match_ownership(team_id, match_id, user["id"], "editor")
-
     # Pre-validation: ensure the video exists.
-    db = get_db()
     cur = db.cursor()
 
     try:
@@ -962,54 +706,17 @@ def upscale_video(
 
         if existing_job:
             cur.close()
-            db.close()
             return {
                 "status": "already_running",
                 "job_id": existing_job["id"]
             }
         
-        # create upscaling job to track progress
-        cur.execute(
-            """
-            INSERT INTO upscale_jobs (
-                video_id,
-                user_id,
-                team_id,
-                match_id,
-                status,
-                progress,
-                step
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-            """,
-            (
-                video_id,
-                user["id"],
-                team_id,
-                match_id,
-                "queued",
-                0,
-                "queued"
-            )
-        )
-
-        job_id = cur.fetchone()["id"]
+        # queue upscaling job (run by a worker, also tracks progress)
+        job_id = enqueue_job(cur, "upscale", video_id, user["id"], team_id, match_id)
         db.commit()
 
     finally:
         cur.close()
-        db.close()
-
-    #start background task
-    background_tasks.add_task(
-        process_upscale_video_in_background,
-        user["id"],
-        team_id,
-        match_id,
-        video_id,
-        job_id   
-    )
 
     return {
         "status": "queued",
@@ -1018,26 +725,26 @@ def upscale_video(
 
 #uploading job status endpoint
 @router.get("/upload-status/{job_id}")
-def get_upload_status(
+async def get_upload_status(
     job_id: int,
-    user=Depends(require_user)
+    db=Depends(get_async_db),
+    user=Depends(require_user_async)
 ):
-    db = get_db()
-    cur = db.cursor()
+    #in-memory progress of jobs running in this process is never older than the row
+    live = live_status("upload_jobs", job_id, user["id"])
+    if live:
+        return live
 
-    cur.execute(
+    cur = await db.execute(
         """
-        SELECT status, progress, step
+        SELECT status, progress, step, item_progress AS items
         FROM upload_jobs
         WHERE id = %s AND user_id = %s
         """,
         (job_id, user["id"])
     )
 
-    job = cur.fetchone()
-
-    cur.close()
-    db.close()
+    job = await cur.fetchone()
 
     if not job:
         raise HTTPException(404, "Job not found")
@@ -1046,11 +753,12 @@ def get_upload_status(
 
 #upscaling job status endpoint
 @router.get("/{job_id}/upscale-status")
-def get_upscale_status(job_id: int, user=Depends(require_user)):
-    db = get_db()
-    cur = db.cursor()
+async def get_upscale_status(job_id: int, db=Depends(get_async_db), user=Depends(require_user_async)):
+    live = live_status("upscale_jobs", job_id, user["id"])
+    if live:
+        return live
 
-    cur.execute(
+    cur = await db.execute(
         """
         SELECT status, progress, step
         FROM upscale_jobs
@@ -1059,12 +767,89 @@ def get_upscale_status(job_id: int, user=Depends(require_user)):
         (job_id, user["id"])
     )
 
-    job = cur.fetchone()
-
-    cur.close()
-    db.close()
+    job = await cur.fetchone()
 
     if not job:
         raise HTTPException(404, "Job not found")
 
-    return job
\ No newline at end of file
+    return job
+
+
+#HLS playlists of a video (hls_ladder.py)
+#authorised by the token in the URL from list_videos, since native players cannot send headers;
+#segment links are signed storage URLs, so only the small playlists go through the API
+@router.get("/{video_id}/hls/{playlist:path}")
+async def get_hls_playlist(
+    team_id: int,
+    match_id: int,
+    video_id: int,
+    playlist: str,
+    token: str,
+    db=Depends(get_async_db)
+):
+    if not PLAYLIST_NAME.match(playlist) or not check_media_token(token, video_id):
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    cur = await db.execute(
+        """
+        SELECT hls_path
+        FROM videos
+        WHERE id = %s AND team_id = %s AND match_id = %s
+        """,
+        (video_id, team_id, match_id)
+    )
+    video = await cur.fetchone()
+
+    if not video or not video["hls_path"]:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    try:
+        text = await run_in_threadpool(render_playlist, bucket, video["hls_path"], playlist, token)
+    except Exception as e:
+        logger.error(f"[HLS] Failed to read {video['hls_path']}/{playlist}: {e}")
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    return Response(
+        content=text,
+        media_type="application/vnd.apple.mpegurl",
+        headers={"Cache-Control": "private, max-age=300"}
+    )
+
+
+#WebVTT index of the thumbnail sprites (video_previews.py), for scrubbing previews
+#same token as the HLS playlists; sprite links are signed storage URLs
+@router.get("/{video_id}/thumbnails.vtt")
+async def get_thumbnails(
+    team_id: int,
+    match_id: int,
+    video_id: int,
+    token: str,
+    db=Depends(get_async_db)
+):
+    if not check_media_token(token, video_id):
+        raise HTTPException(status_code=404, detail="Thumbnails not found")
+
+    cur = await db.execute(
+        """
+        SELECT preview_path
+        FROM videos
+        WHERE id = %s AND team_id = %s AND match_id = %s
+        """,
+        (video_id, team_id, match_id)
+    )
+    video = await cur.fetchone()
+
+    if not video or not video["preview_path"]:
+        raise HTTPException(status_code=404, detail="Thumbnails not found")
+
+    try:
+        text = await run_in_threadpool(render_thumbnails, bucket, video["preview_path"])
+    except Exception as e:
+        logger.error(f"[PREVIEW] Failed to read {video['preview_path']}/{THUMBNAILS}: {e}")
+        raise HTTPException(status_code=404, detail="Thumbnails not found")
+
+    return Response(
+        content=text,
+        media_type="text/vtt",
+        headers={"Cache-Control": "private, max-age=300"}
+    )
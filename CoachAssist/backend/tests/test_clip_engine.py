@@ -0,0 +1,107 @@
+"""
+test_clip_engine.py
+
+Smart cuts (clip_engine.py) against generated sources with and without
+B-frames: every frame of the range, once, in order, with evenly spaced
+timestamps across the joins of the re-encoded and copied parts.
+
+Needs ffmpeg and ffprobe; skipped without them.
+
+Run from the CoachAssist directory:
+    python -m pytest backend/tests
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from backend.ingest_planner import FFMPEG_BIN, FFPROBE_BIN
+from backend.clip_engine import keyframe_index, smart_cut
+
+pytestmark = pytest.mark.skipif(
+    not (shutil.which(FFMPEG_BIN) and shutil.which(FFPROBE_BIN)), reason="needs ffmpeg and ffprobe"
+)
+
+FPS = 30
+# small gray thumbnails are enough to tell testsrc2 frames apart
+THUMB = (32, 18)
+
+# x264 settings of the source -> B-frame reorder delay 0, 1 and 2
+SOURCES = {
+    "no_bframes": ["-bf", "0"],
+    "bframes": ["-b-pyramid", "none"],
+    "bpyramid": [],
+}
+
+
+@pytest.fixture(scope="module", params=list(SOURCES))
+def source(request, tmp_path_factory):
+    """8 s High-profile H.264 + AAC, a (closed) GOP every 2 s."""
+
+    path = str(tmp_path_factory.mktemp("source") / f"{request.param}.mp4")
+    subprocess.run([
+        FFMPEG_BIN, "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=320x180:rate={FPS}:duration=8",
+        "-f", "lavfi", "-i", "sine=frequency=440:duration=8",
+        "-c:v", "libx264", "-profile:v", "high", "-preset", "veryfast",
+        "-g", str(2 * FPS), "-sc_threshold", "0", *SOURCES[request.param],
+        "-c:a", "aac",
+        path,
+    ], check=True)
+    return path
+
+
+def thumbnails(path):
+    result = subprocess.run([
+        FFMPEG_BIN, "-v", "error", "-i", path,
+        "-map", "0:v:0", "-fps_mode", "passthrough",
+        "-vf", f"scale={THUMB[0]}:{THUMB[1]},format=gray",
+        "-f", "rawvideo", "-",
+    ], capture_output=True, check=True)
+
+    size = THUMB[0] * THUMB[1]
+    return [result.stdout[i:i + size] for i in range(0, len(result.stdout), size)]
+
+
+def frame_times(path):
+    """Presentation times of the decoded frames, in the stream time base."""
+
+    result = subprocess.run([
+        FFMPEG_BIN, "-v", "error", "-i", path,
+        "-map", "0:v:0", "-fps_mode", "passthrough", "-f", "framecrc", "-",
+    ], capture_output=True, text=True, check=True)
+
+    return [int(line.split(",")[2]) for line in result.stdout.splitlines() if not line.startswith("#")]
+
+
+def source_frames(clip, frames, first):
+    """Index in frames of the source frame each clip frame shows (searched near where it should be)."""
+
+    def distance(a, b):
+        return sum(abs(x - y) for x, y in zip(a, b))
+
+    matched = []
+    for offset, frame in enumerate(clip):
+        near = range(max(0, first + offset - 5), min(len(frames), first + offset + 6))
+        matched.append(min(near, key=lambda index: distance(frames[index], frame)))
+    return matched
+
+
+@pytest.mark.parametrize("start, end, method", [
+    (1.3, 6.5, "smart"),   # re-encoded head and tail around copied GOPs
+    (0.0, 5.5, "smart"),   # copied from the very first GOP, re-encoded tail
+    (2.0, 6.0, "copy"),    # keyframe to keyframe
+])
+def test_smart_cut_keeps_every_frame_once(source, tmp_path, start, end, method):
+    output_path = str(tmp_path / "clip.mp4")
+
+    assert smart_cut(source, start, end, output_path, keyframe_index(source)) == method
+
+    first = round(start * FPS)
+    assert source_frames(thumbnails(output_path), thumbnails(source), first) == \
+        list(range(first, round(end * FPS)))
+
+    times = frame_times(output_path)
+    steps = {later - earlier for earlier, later in zip(times, times[1:])}
+    assert len(steps) == 1 and steps.pop() > 0
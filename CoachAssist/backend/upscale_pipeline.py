@@ -0,0 +1,407 @@
+"""
+upscale_pipeline.py
+
+Real-ESRGAN upscaling of stored game film (the "upscale" job, media_jobs.py)
+as a bounded streaming pipeline, so temp disk and memory use stay the same
+whatever the length of the video:
+
+- decode: ffmpeg writes the frames as PNGs to a pipe; they are split off
+  the stream and grouped into batch directories of UPSCALE_BATCH_FRAMES
+- upscale: realesrgan-ncnn-vulkan only reads and writes files, so it runs
+  once per batch directory (upscaling_utils/realesrgan.py)
+- encode: the upscaled PNGs of each batch are piped, in order, into a
+  second ffmpeg that encodes H.264 and copies the original audio back in
+
+The stages run in their own threads and overlap: the next batch is decoded
+and the previous one encoded while one is upscaled. At most
+UPSCALE_PIPELINE_DEPTH batches wait between two stages; a full queue stops
+the stage feeding it (the decoder then blocks on its pipe), so only a few
+batches are ever on disk. Frames are named by their index within their
+batch, so there is no frame-count limit (frame_%04d.png broke past 9999
+frames, under six minutes of 30 fps film).
+
+The source frame rate is kept (the frames used to be re-encoded at 30 fps)
+and the audio is copied instead of dropped.
+
+Long videos are upscaled in parallel segments (upscale_video):
+- the video is split at its keyframes (videos.keyframes, or keyframe_index
+  in clip_engine.py) into segments of at least UPSCALE_SEGMENT_SECONDS; each
+  starts on a keyframe, so its decode does not run through the GOP before it
+- UPSCALE_PARALLELISM segments run at once on a process pool, each through
+  its own bounded pipeline, video only
+- the concat demuxer joins the segments and muxes the original audio back
+  in, without re-encoding; every segment is encoded with the same settings
+  at the same frame rate, so they join as one stream
+
+See backend/benchmarks/bench_upscale_parallel.py for the speedup at
+1/2/4/8 segments at once.
+"""
+
+import os
+import queue
+import shutil
+import struct
+import logging
+import threading
+import subprocess
+import multiprocessing
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from backend.ingest_planner import FFMPEG_BIN, probe
+from backend.upscaling_utils.realesrgan import upscale_frames
+
+logger = logging.getLogger(__name__)
+
+BATCH_FRAMES = int(os.getenv("UPSCALE_BATCH_FRAMES", "64"))
+PIPELINE_DEPTH = int(os.getenv("UPSCALE_PIPELINE_DEPTH", "2"))
+MODEL = os.getenv("UPSCALE_MODEL", "realesrgan-x4plus")
+
+# segments upscaled at once (processes, each with its own Real-ESRGAN)
+PARALLELISM = int(os.getenv("UPSCALE_PARALLELISM", str(min(4, os.cpu_count() or 1))))
+SEGMENT_SECONDS = float(os.getenv("UPSCALE_SEGMENT_SECONDS", "30"))
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class _Stopped(Exception):
+    """Another stage failed; this one stops quietly."""
+
+
+#=== FRAME STREAM ===
+
+def read_png(stream):
+    """The next PNG of an image2pipe stream, or None at its end."""
+
+    signature = stream.read(8)
+    if not signature:
+        return None
+    if signature != _PNG_SIGNATURE:
+        raise RuntimeError("Unexpected data in the decoded frame stream")
+
+    parts = [signature]
+    while True:
+        header = stream.read(8)
+        if len(header) < 8:
+            raise RuntimeError("Truncated frame in the decoded frame stream")
+
+        length = struct.unpack(">I", header[:4])[0]
+        body = stream.read(length + 4)     # chunk data + CRC
+        if len(body) < length + 4:
+            raise RuntimeError("Truncated frame in the decoded frame stream")
+
+        parts += [header, body]
+        if header[4:] == b"IEND":
+            return b"".join(parts)
+
+
+def frame_rate(video: dict) -> str:
+    """The stream's frame rate as ffmpeg takes it ("30000/1001"), 30 if unknown."""
+
+    for key in ("avg_frame_rate", "r_frame_rate"):
+        rate = video.get(key) or "0/0"
+        if not rate.endswith("/0") and Fraction(rate) > 0:
+            return rate
+    return "30"
+
+
+#=== FFMPEG ===
+
+def _range_args(start: float, end) -> list:
+    args = ["-ss", f"{start:.6f}"] if start else []
+    if end is not None:
+        args += ["-t", f"{end - start:.6f}"]
+    return args
+
+
+def _decoder_args(input_path: str, rate: str, start: float = 0, end=None) -> list:
+    return [
+        FFMPEG_BIN, "-v", "error",
+        *_range_args(start, end),
+        "-i", input_path,
+        "-map", "0:v:0",
+        "-r", rate,                     # constant rate, in step with the encoder
+        "-f", "image2pipe",
+        "-c:v", "png", "-compression_level", "1",
+        "-",
+    ]
+
+
+def _encoder_args(input_path: str, output_path: str, rate: str, audio: bool = True) -> list:
+    # a segment is video only: the audio is muxed in once, when they are joined
+    audio_args = ["-i", input_path, "-map", "0:v:0", "-map", "1:a:0?", "-c:a", "copy"] if audio else []
+
+    return [
+        FFMPEG_BIN, "-y", "-v", "error",
+        "-f", "image2pipe", "-c:v", "png",
+        "-framerate", rate,
+        "-i", "-",
+        *audio_args,
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+
+
+def _drain(process):
+    """Collects the last lines of the process's stderr in the background."""
+
+    tail = []
+    thread = threading.Thread(target=lambda: tail.extend(process.stderr.readlines()[-20:]), daemon=True)
+    thread.start()
+    return thread, tail
+
+
+#=== PIPELINE ===
+
+def upscale_segment(input_path: str, output_path: str, workdir: str, rate: str,
+                    start: float = 0, end=None, audio: bool = True, total: int = 0, on_progress=None) -> int:
+    """
+    Upscales [start, end) of input_path (the whole video by default) into
+    output_path at the given frame rate, using workdir for the frame
+    batches in flight. on_progress(fraction) follows the encoded frames,
+    out of total. Returns the number of frames upscaled.
+    """
+
+    decoded = queue.Queue(maxsize=PIPELINE_DEPTH)
+    upscaled = queue.Queue(maxsize=PIPELINE_DEPTH)
+    failed = threading.Event()
+    errors = []
+    frames = [0]
+
+    def put(q, item):
+        while True:
+            if failed.is_set():
+                raise _Stopped()
+            try:
+                return q.put(item, timeout=0.5)
+            except queue.Full:
+                pass
+
+    def get(q):
+        while True:
+            if failed.is_set():
+                raise _Stopped()
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                pass
+
+    decoder = subprocess.Popen(
+        _decoder_args(input_path, rate, start, end), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    encoder = subprocess.Popen(
+        _encoder_args(input_path, output_path, rate, audio), stdin=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    (decoder_drain, decoder_log), (encoder_drain, encoder_log) = _drain(decoder), _drain(encoder)
+
+    def decode():
+        batch, count, index = None, 0, 0
+        while True:
+            frame = read_png(decoder.stdout)
+            if frame is None:
+                break
+
+            if batch is None:
+                batch = os.path.join(workdir, f"in_{index:08d}")
+                os.makedirs(batch)
+            with open(os.path.join(batch, f"{count:08d}.png"), "wb") as f:
+                f.write(frame)
+
+            count += 1
+            if count == BATCH_FRAMES:
+                put(decoded, batch)
+                batch, count, index = None, 0, index + 1
+
+        if batch:
+            put(decoded, batch)
+        put(decoded, None)
+
+    def upscale():
+        while True:
+            batch = get(decoded)
+            if batch is None:
+                break
+
+            output_dir = os.path.join(workdir, "out_" + os.path.basename(batch)[3:])
+            upscale_frames(batch, output_dir, MODEL)
+            shutil.rmtree(batch)
+            put(upscaled, output_dir)
+        put(upscaled, None)
+
+    def encode():
+        while True:
+            batch = get(upscaled)
+            if batch is None:
+                break
+
+            names = sorted(os.listdir(batch))
+            for name in names:
+                with open(os.path.join(batch, name), "rb") as f:
+                    encoder.stdin.write(f.read())
+            shutil.rmtree(batch)
+
+            frames[0] += len(names)
+            if on_progress and total:
+                on_progress(min(frames[0] / total, 1.0))
+
+        encoder.stdin.close()
+
+    def stage(target):
+        def run():
+            try:
+                target()
+            except _Stopped:
+                pass
+            except Exception as e:
+                errors.append(e)
+                failed.set()
+        thread = threading.Thread(target=run, name=f"upscale-{target.__name__}", daemon=True)
+        thread.start()
+        return thread
+
+    threads = [stage(decode), stage(upscale), stage(encode)]
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            # a stage blocked on a pipe only notices a failure once the pipe closes
+            if failed.wait(timeout=0.5):
+                decoder.kill()
+                encoder.kill()
+                break
+    finally:
+        for thread in threads:
+            thread.join()
+        decoder.wait()
+        encoder.wait()
+        decoder_drain.join()
+        encoder_drain.join()
+
+    # a broken pipe only means the encoder exited; its own error says why
+    if errors and not isinstance(errors[0], BrokenPipeError):
+        raise errors[0]
+    if decoder.returncode != 0:
+        raise RuntimeError(f"FFmpeg decode failed: {''.join(decoder_log)}")
+    if encoder.returncode != 0:
+        raise RuntimeError(f"FFmpeg encode failed: {''.join(encoder_log)}")
+    if errors:
+        raise errors[0]
+    if not frames[0]:
+        raise RuntimeError("No frames were decoded")
+
+    return frames[0]
+
+
+#=== SEGMENTS ===
+
+def split_points(keyframes: list, duration: float, segment_seconds: float = None) -> list:
+    """
+    (start, end) of the segments of a video: each starts on a keyframe and
+    is at least segment_seconds long (the last one may be shorter); end is
+    None for the last one.
+    """
+
+    segment_seconds = segment_seconds or SEGMENT_SECONDS
+    starts = [0.0]
+    for keyframe in keyframes:
+        if keyframe - starts[-1] >= segment_seconds and (not duration or keyframe < duration):
+            starts.append(keyframe)
+
+    return list(zip(starts, starts[1:] + [None]))
+
+
+def _run_segment(input_path: str, output_path: str, workdir: str, rate: str, start: float, end) -> int:
+    """One segment, in a pool process."""
+
+    os.makedirs(workdir)
+    try:
+        return upscale_segment(input_path, output_path, workdir, rate, start, end, audio=False)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _join(segment_paths: list, input_path: str, output_path: str, workdir: str):
+    """Concatenates the segments (concat demuxer, no re-encode) and adds the original audio."""
+
+    listing = os.path.join(workdir, "segments.txt")
+    with open(listing, "w") as f:
+        f.writelines(f"file '{path}'\n" for path in segment_paths)
+
+    result = subprocess.run([
+        FFMPEG_BIN, "-y", "-v", "error",
+        "-f", "concat", "-safe", "0",
+        "-i", listing,
+        "-i", input_path,
+        "-map", "0:v:0", "-map", "1:a:0?",
+        "-c", "copy",
+        "-movflags", "+faststart",
+        output_path,
+    ], capture_output=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg concat failed: {result.stderr.decode()[-500:]}")
+
+
+def upscale_video(input_path: str, output_path: str, workdir: str, keyframes: list = None,
+                  on_progress=None, parallelism: int = None, segment_seconds: float = None) -> int:
+    """
+    Upscales input_path into output_path, using workdir for temp files.
+    keyframes are the video's keyframe times, where it may be split; without
+    them it is upscaled as one segment. on_progress(fraction) follows the
+    upscaled frames (per finished segment when there are several).
+    Returns the number of frames upscaled.
+    """
+
+    parallelism = parallelism or PARALLELISM
+
+    info = probe(input_path)
+    video = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), None)
+    if video is None:
+        raise ValueError("No video stream found")
+
+    rate = frame_rate(video)
+    duration = float(info.get("format", {}).get("duration") or 0)
+    total = int(duration * Fraction(rate)) or int(video.get("nb_frames") or 0)
+
+    segments = [(0.0, None)]
+    if parallelism > 1 and keyframes:
+        segments = split_points(keyframes, duration, segment_seconds)
+
+    if len(segments) == 1:
+        frames = upscale_segment(input_path, output_path, workdir, rate, total=total, on_progress=on_progress)
+        logger.info(f"[UPSCALE] {frames} frames upscaled in batches of {BATCH_FRAMES}")
+        return frames
+
+    segment_paths = [os.path.join(workdir, f"segment_{i:05d}.mp4") for i in range(len(segments))]
+    frames = 0
+
+    # spawn: the worker process has threads and open connections a fork would copy
+    with ProcessPoolExecutor(max_workers=parallelism, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {
+            pool.submit(
+                _run_segment, input_path, segment_paths[i],
+                os.path.join(workdir, f"segment_{i:05d}"), rate, start, end
+            ): i
+            for i, (start, end) in enumerate(segments)
+        }
+
+        try:
+            for future in as_completed(futures):
+                frames += future.result()
+                if on_progress and total:
+                    on_progress(min(frames / total, 1.0))
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+    _join(segment_paths, input_path, output_path, workdir)
+
+    for path in segment_paths:
+        os.remove(path)
+
+    logger.info(
+        f"[UPSCALE] {frames} frames upscaled in {len(segments)} segments, "
+        f"{min(parallelism, len(segments))} at once"
+    )
+    return frames
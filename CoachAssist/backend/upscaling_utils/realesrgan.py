@@ -1,7 +1,10 @@
 import subprocess
 import os
+import logging
 import platform
 
+logger = logging.getLogger(__name__)
+
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 SYSTEM = platform.system().lower()
 
@@ -20,6 +23,10 @@ elif SYSTEM == "linux":
 else:
     raise RuntimeError(f"Unsupported OS: {SYSTEM}")
 
+# another build or a stand-in (bench_upscale_parallel.py --stand-in)
+REALSRCAN_DIR = os.getenv("REALESRGAN_DIR", REALSRCAN_DIR)
+REALSRCAN_BIN = os.getenv("REALESRGAN_BIN", REALSRCAN_BIN)
+
 
 
 
@@ -37,7 +44,8 @@ def upscale_frames(input_dir: str, output_dir: str, model: str = "realesrgan-x4p
         "-m", os.path.join(REALSRCAN_DIR, "models")
     ]
 
-    print("Running command:", " ".join(cmd))
+    # once per frame batch of the upscale pipeline (upscale_pipeline.py)
+    logger.debug("Running command: " + " ".join(cmd))
 
     result = subprocess.run(
         cmd,
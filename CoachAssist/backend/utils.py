@@ -20,6 +20,8 @@ from datetime import datetime, timedelta
 import smtplib #Import by Wences Jacob Lorenzo
 from email.message import EmailMessage #Import by Wences Jacob Lorenzo
 
+from backend.password_hashing import BCRYPT_ROUNDS
+
 #=== LOAD ENVIRONMENT VARIABLES ===
 
 # Loads values from .env file into environment
@@ -47,10 +49,13 @@ def hash_password(password: str) -> str:
     Hashes a plain-text password using bcrypt.
 
     - Automatically salts password
+    - Uses the BCRYPT_ROUNDS cost factor
     - Returns encoded string for database storage
+
+    Blocking; request handlers use password_hashing.hash_password_async.
     """
 
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 def verify_password(password: str, hashed: str) -> bool:
     """
@@ -68,17 +73,27 @@ def verify_password(password: str, hashed: str) -> bool:
 
 #=== JWT TOKEN HANDLING ===
 
-def create_token(username: str):
+def create_token(username: str, user_id: int = None, email: str = None, token_version: int = None):
     """
     Creates a signed JWT for authenticated users.
 
     Payload includes:
     - sub: subject (username)
     - exp: expiration timestamp
+
+    When user_id is given the token also carries:
+    - uid: user id
+    - email: user email
+    - ver: the user's token_version (bumped to revoke all their tokens)
+    so require_user can authenticate it without loading the user row.
     """
 
     expiration = datetime.utcnow() + timedelta(hours=TOKEN_EXPIRE_HOURS)
     payload = {"sub": username, "exp": expiration}
+
+    if user_id is not None:
+        payload.update({"uid": user_id, "email": email, "ver": token_version or 0})
+
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str):
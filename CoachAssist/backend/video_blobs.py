@@ -0,0 +1,209 @@
+"""
+video_blobs.py
+
+Content-hash deduplication of uploaded game film.
+
+Uploads are hashed (SHA-256) while they stream in. video_blobs maps
+(team_id, content_hash) to the stored file, and videos.blob_id points at it:
+- the first upload of a file stores it and registers the blob
+- an identical upload to the same team gets a new videos row pointing at
+  the existing file; conversion and storage are skipped
+- ref_count counts the videos rows sharing a blob; deleting a video
+  releases its reference and the file is removed with the last one
+
+The hash is of the bytes the user uploaded (before any conversion), so a
+.mov uploaded twice is only converted once.
+
+A video pointed at an existing copy also gets that copy's HLS ladder
+(hls_ladder.py), previews (video_previews.py) and keyframe index
+(clip_engine.py), if they have been built.
+
+Clips are cached the same way, under clip_key(): a hash of the source
+file and the clip's time range rounded to the millisecond (clip_range),
+so the same range cut twice (several coaches clipping the same play, each
+from their own copy of a deduplicated upload) is stored once:
+- a clip request whose key the team already has gets a new videos row
+  pointing at the stored clip at once (insert_blob_video), no job
+- a cut clip registers itself like an upload (register_blob), so deleting
+  one coach's clip only releases their reference
+
+Videos without a blob_id (uploaded before deduplication, clips cut before
+the clip cache, upscales) own their file outright.
+"""
+
+import hashlib
+
+#=== HASHING ===
+
+def content_hasher():
+    return hashlib.sha256()
+
+
+#=== CLIP CACHE ===
+
+def clip_range(start: float, end: float) -> tuple:
+    """The range a clip is cut and cached at (millisecond precision)."""
+
+    return round(float(start), 3), round(float(end), 3)
+
+
+def clip_key(source_path: str, start: float, end: float) -> str:
+    """
+    Key of the clip [start, end] of the stored file at source_path, in the
+    same table (and hash format) as uploaded files.
+    """
+
+    start, end = clip_range(start, end)
+    return hashlib.sha256(f"clip:{source_path}:{start:.3f}:{end:.3f}".encode()).hexdigest()
+
+
+#=== SQL ===
+
+# Points a video at the team's existing copy of a file, taking a reference.
+# One statement, so the count and the video row cannot disagree after a crash.
+_REFERENCE_SQL = """
+    WITH blob AS (
+        UPDATE video_blobs
+        SET ref_count = ref_count + 1
+        WHERE team_id = %s AND content_hash = %s
+        RETURNING id, storage_path
+    )
+    UPDATE videos
+    SET blob_id = blob.id,
+        storage_path = blob.storage_path,
+        (hls_path, preview_path, keyframes) = (
+            SELECT shared.hls_path, shared.preview_path, shared.keyframes FROM videos shared
+            WHERE shared.storage_path = blob.storage_path
+            ORDER BY (shared.hls_path IS NULL), (shared.preview_path IS NULL)
+            LIMIT 1
+        )
+    FROM blob
+    WHERE videos.id = %s
+    RETURNING blob.id, blob.storage_path
+"""
+
+# Registers the file a video was just stored as, or references the one
+# stored first by a concurrent identical upload (inserted = false)
+_REGISTER_SQL = """
+    WITH blob AS (
+        INSERT INTO video_blobs (team_id, content_hash, storage_path, size_bytes, ref_count)
+        VALUES (%s, %s, %s, %s, 1)
+        ON CONFLICT (team_id, content_hash)
+        DO UPDATE SET ref_count = video_blobs.ref_count + 1
+        RETURNING id, storage_path, (xmax = 0) AS inserted
+    )
+    UPDATE videos
+    SET blob_id = blob.id,
+        storage_path = blob.storage_path,
+        (hls_path, preview_path, keyframes) = (
+            SELECT shared.hls_path, shared.preview_path, shared.keyframes FROM videos shared
+            WHERE shared.storage_path = blob.storage_path
+            ORDER BY (shared.hls_path IS NULL), (shared.preview_path IS NULL)
+            LIMIT 1
+        )
+    FROM blob
+    WHERE videos.id = %s
+    RETURNING blob.id, blob.storage_path, blob.inserted
+"""
+
+# New video row of the team's copy of a file (a cached clip), taking a reference
+_INSERT_VIDEO_SQL = """
+    WITH blob AS (
+        UPDATE video_blobs
+        SET ref_count = ref_count + 1
+        WHERE team_id = %s AND content_hash = %s
+        RETURNING id, storage_path
+    )
+    INSERT INTO videos (
+        user_id, team_id, match_id,
+        provider, storage_path, filename, blob_id, keyframes
+    )
+    SELECT %s, %s, %s, 'firebase', blob.storage_path, %s, blob.id, (
+        SELECT shared.keyframes FROM videos shared
+        WHERE shared.storage_path = blob.storage_path AND shared.keyframes IS NOT NULL
+        LIMIT 1
+    )
+    FROM blob
+    RETURNING id, storage_path
+"""
+
+_RELEASE_SQL = """
+    UPDATE video_blobs
+    SET ref_count = ref_count - 1
+    WHERE id = %s
+    RETURNING ref_count, storage_path
+"""
+
+# Only removes the row if nobody took a new reference in the meantime
+_DELETE_UNUSED_SQL = """
+    DELETE FROM video_blobs
+    WHERE id = %s AND ref_count <= 0
+    RETURNING storage_path
+"""
+
+
+#=== SYNC (psycopg2) ===
+
+def reference_blob(cur, team_id: int, content_hash: str, video_id: int):
+    """
+    Points the video at the team's copy of a file (storage_path, blob_id).
+    Returns {"id", "storage_path"}, or None when the team does not have it.
+    """
+
+    cur.execute(_REFERENCE_SQL, (team_id, content_hash, video_id))
+    return cur.fetchone()
+
+
+def register_blob(cur, team_id: int, content_hash: str, storage_path: str, size: int, video_id: int) -> dict:
+    """
+    Registers the file just stored at storage_path and points the video at it.
+    Returns {"id", "storage_path", "inserted"}; when inserted is False an
+    identical file was stored first, the video now points at that one and
+    the caller should delete its own copy.
+    """
+
+    cur.execute(_REGISTER_SQL, (team_id, content_hash, storage_path, size, video_id))
+    return cur.fetchone()
+
+
+def insert_blob_video(cur, team_id: int, content_hash: str, user_id: int, match_id: int, filename: str):
+    """
+    Adds a video of the team's copy of a file for the user (a cached clip).
+    Returns {"id", "storage_path"} of the new video, or None when the team
+    does not have the file.
+    """
+
+    cur.execute(_INSERT_VIDEO_SQL, (team_id, content_hash, user_id, team_id, match_id, filename))
+    return cur.fetchone()
+
+
+def release_blob(cur, blob_id: int):
+    """
+    Drops one reference. Returns the storage path to delete once the last
+    reference is gone, otherwise None.
+    """
+
+    cur.execute(_RELEASE_SQL, (blob_id,))
+    row = cur.fetchone()
+    if row is None or row["ref_count"] > 0:
+        return None
+
+    cur.execute(_DELETE_UNUSED_SQL, (blob_id,))
+    row = cur.fetchone()
+    return row["storage_path"] if row else None
+
+
+#=== ASYNC (psycopg 3) ===
+
+async def reference_blob_async(db, team_id: int, content_hash: str, video_id: int):
+    """reference_blob() for an async connection."""
+
+    cur = await db.execute(_REFERENCE_SQL, (team_id, content_hash, video_id))
+    return await cur.fetchone()
+
+
+async def register_blob_async(db, team_id: int, content_hash: str, storage_path: str, size: int, video_id: int) -> dict:
+    """register_blob() for an async connection."""
+
+    cur = await db.execute(_REGISTER_SQL, (team_id, content_hash, storage_path, size, video_id))
+    return await cur.fetchone()
@@ -0,0 +1,148 @@
+"""
+video_previews.py
+
+Poster frame and scrubbing thumbnails of stored game film, built by the
+"preview" job (media_jobs.py) right after an upload is stored.
+
+One ffmpeg pass decodes the video once and writes:
+- poster.jpg: one frame PREVIEW_POSTER_SECONDS in (10% of the video by
+  default, at most 30s, past the usual black lead-in), at most 720p tall
+- sprite_000.jpg, ...: a frame every PREVIEW_INTERVAL seconds, scaled to
+  PREVIEW_THUMB_WIDTH and tiled PREVIEW_SPRITE_COLUMNS x _ROWS per sheet
+- thumbnails.vtt: WebVTT index of the sprites, one cue per thumbnail
+  ("sprite_000.jpg#xywh=x,y,w,h"), written from the same layout
+
+Everything is stored under "<file>_previews/" and videos.preview_path
+points there. list_videos returns a signed URL of the poster and the API
+URL of the WebVTT index, which the API serves with signed sprite links
+(render_thumbnails), the same way as the HLS playlists.
+"""
+
+import os
+import math
+import logging
+
+from backend.metrics import external_call
+from backend.ingest_planner import FFMPEG_BIN, probe, run_ffmpeg
+from backend.media_storage import sign_url, cached
+
+logger = logging.getLogger(__name__)
+
+INTERVAL = float(os.getenv("PREVIEW_INTERVAL", "5"))
+THUMB_WIDTH = int(os.getenv("PREVIEW_THUMB_WIDTH", "160"))
+COLUMNS = int(os.getenv("PREVIEW_SPRITE_COLUMNS", "10"))
+ROWS = int(os.getenv("PREVIEW_SPRITE_ROWS", "10"))
+POSTER_SECONDS = os.getenv("PREVIEW_POSTER_SECONDS")
+POSTER_MAX_HEIGHT = 720
+
+POSTER = "poster.jpg"
+THUMBNAILS = "thumbnails.vtt"
+
+
+def preview_prefix(storage_path: str) -> str:
+    return os.path.splitext(storage_path)[0] + "_previews"
+
+
+def _even(value: float) -> int:
+    return max(2, int(round(value / 2)) * 2)
+
+
+#=== BUILD ===
+
+def _vtt_time(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+
+def write_thumbnail_index(path: str, duration: float, thumb_width: int, thumb_height: int):
+    """WebVTT cues for the sprite layout produced by build_previews()."""
+
+    per_sheet = COLUMNS * ROWS
+    lines = ["WEBVTT", ""]
+
+    for i in range(max(1, math.ceil(duration / INTERVAL))):
+        start = i * INTERVAL
+        end = min(start + INTERVAL, duration) if duration else start + INTERVAL
+        sheet, slot = divmod(i, per_sheet)
+        x = (slot % COLUMNS) * thumb_width
+        y = (slot // COLUMNS) * thumb_height
+
+        lines += [
+            f"{_vtt_time(start)} --> {_vtt_time(end)}",
+            f"sprite_{sheet:03d}.jpg#xywh={x},{y},{thumb_width},{thumb_height}",
+            "",
+        ]
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+
+
+def build_previews(input_path: str, output_dir: str, on_progress=None) -> dict:
+    """
+    Writes the poster, the sprite sheets and their WebVTT index into
+    output_dir. on_progress(fraction) follows the decode.
+    """
+
+    info = probe(input_path)
+    video = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), None)
+    if video is None:
+        raise ValueError("No video stream found")
+
+    duration = float(info.get("format", {}).get("duration") or 0)
+    width = int(video.get("width") or 16)
+    height = int(video.get("height") or 9)
+
+    thumb_height = _even(THUMB_WIDTH * height / width)
+    poster_height = _even(min(height, POSTER_MAX_HEIGHT))
+    poster_at = float(POSTER_SECONDS) if POSTER_SECONDS else min(duration * 0.1, 30)
+    if duration:
+        poster_at = min(poster_at, duration * 0.9)
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # one decode feeds both outputs
+    graph = ";".join([
+        "[0:v]split=2[p][t]",
+        f"[p]trim=start={poster_at:.3f},setpts=PTS-STARTPTS,scale=-2:{poster_height}[poster]",
+        f"[t]fps=1/{INTERVAL:g},scale={THUMB_WIDTH}:{thumb_height},tile={COLUMNS}x{ROWS}[sprites]",
+    ])
+
+    run_ffmpeg([
+        FFMPEG_BIN, "-y",
+        "-i", input_path,
+        "-progress", "pipe:1", "-nostats",
+        "-filter_complex", graph,
+        "-map", "[poster]", "-frames:v", "1", "-q:v", "3",
+        os.path.join(output_dir, POSTER),
+        "-map", "[sprites]", "-q:v", "5", "-start_number", "0",
+        os.path.join(output_dir, "sprite_%03d.jpg"),
+    ], duration, on_progress)
+
+    write_thumbnail_index(os.path.join(output_dir, THUMBNAILS), duration, THUMB_WIDTH, thumb_height)
+
+    return {"duration": duration, "thumb_width": THUMB_WIDTH, "thumb_height": thumb_height}
+
+
+#=== SERVE ===
+
+def render_thumbnails(bucket, prefix: str) -> str:
+    """The stored WebVTT index, with every sprite linked as a signed URL."""
+
+    def build():
+        with external_call("firebase", "download"):
+            text = bucket.blob(f"{prefix}/{THUMBNAILS}").download_as_text()
+
+        signed = {}
+        lines = []
+        for line in text.splitlines():
+            if line.startswith("sprite_"):
+                sprite, _, fragment = line.partition("#")
+                if sprite not in signed:
+                    signed[sprite] = sign_url(bucket, f"{prefix}/{sprite}")
+                line = f"{signed[sprite]}#{fragment}"
+            lines.append(line)
+
+        return "\n".join(lines) + "\n"
+
+    return cached(("thumbnails", prefix), build)
@@ -2,6 +2,7 @@ import firebase_admin
 from firebase_admin import credentials, storage
 import uuid
 from datetime import timedelta
+from backend.metrics import external_call
 firebaseProjId = "coachassist-81c87"
 # Initialize once
 cred = credentials.Certificate("backend/firebase_key.json")
@@ -25,16 +26,18 @@ def upload_video_to_firebase(file_obj, user_id: int, match_id: int):
 
     file_obj.file.seek(0)
 
-    blob.upload_from_file(
-        file_obj.file,
-        content_type=file_obj.content_type,
-        timeout=120
-    )
-
-    signed_url = blob.generate_signed_url(
-        expiration=timedelta(hours=2),
-        method="GET"
-    )
+    with external_call("firebase", "upload_video"):
+        blob.upload_from_file(
+            file_obj.file,
+            content_type=file_obj.content_type,
+            timeout=120
+        )
+
+    with external_call("firebase", "sign_url"):
+        signed_url = blob.generate_signed_url(
+            expiration=timedelta(hours=2),
+            method="GET"
+        )
 
     return unique_name, signed_url
 
@@ -0,0 +1,131 @@
+"""
+multipart_stream.py
+
+Reads one file out of a multipart/form-data request body as it arrives.
+
+FastAPI's UploadFile parses the whole body (spooling anything over 1 MB to
+disk) before the route runs. MultipartFileReader parses request.stream()
+itself, so the route sees the file's name before its content and can
+forward the content chunk by chunk.
+
+Usage:
+    reader = MultipartFileReader(request, field="file")
+    filename = await reader.open()
+    async for chunk in reader.chunks():
+        ...
+"""
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartFileReader:
+    """
+    Streams the first file part named `field` of a multipart request.
+    Other parts are skipped.
+    """
+
+    def __init__(self, request: Request, field: str = "file"):
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+        self.field = field.encode()
+        self.filename = None
+        self.content_type = None
+
+        self._body = request.stream()
+        self._eof = False
+        self._pending = []          # file bytes parsed but not yet handed out
+        self._in_file = False
+        self._file_done = False
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+
+        self._parser = MultipartParser(params[b"boundary"], callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    #=== PARSER CALLBACKS ===
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        if self.filename is not None:
+            return
+
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") == self.field and b"filename" in options:
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+            self._in_file = True
+
+    def _on_part_data(self, data, start, end):
+        if self._in_file:
+            self._pending.append(bytes(data[start:end]))
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
+
+    #=== READING ===
+
+    async def _feed(self) -> bool:
+        """Parses the next piece of the body. Returns False at the end of it."""
+
+        if self._eof:
+            return False
+
+        try:
+            data = await self._body.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            self._parser.finalize()
+            return False
+
+        if data:
+            self._parser.write(data)
+        return True
+
+    async def open(self) -> str:
+        """Reads up to the file part's headers and returns its filename."""
+
+        while self.filename is None:
+            if not await self._feed():
+                raise HTTPException(status_code=400, detail="No file uploaded")
+        return self.filename
+
+    async def chunks(self):
+        """Yields the file's content as it arrives (call open() first)."""
+
+        while True:
+            if self._pending:
+                data = b"".join(self._pending)
+                self._pending.clear()
+                yield data
+
+            if self._file_done:
+                return
+
+            if not await self._feed() and not self._pending:
+                raise HTTPException(status_code=400, detail="Upload ended before the file was complete")
@@ -22,6 +22,8 @@ from firebase_admin import credentials, storage
 from fastapi import HTTPException
 import uuid
 
+from backend.metrics import external_call
+
 # FIREBASE INITIALIZATION
 
 firebaseProjId = "coachassist-81c87"
@@ -98,13 +100,15 @@ def upload_photo_to_firebase(file_obj, user_id: int):
     blob = bucket.blob(unique_name)
 
     # Upload file
-    blob.upload_from_file(
-        file_obj.file,
-        content_type=file_obj.content_type
-    )
+    with external_call("firebase", "upload_photo"):
+        blob.upload_from_file(
+            file_obj.file,
+            content_type=file_obj.content_type
+        )
 
     # Make file public (non-expiring URL)
-    blob.make_public()
+    with external_call("firebase", "make_public"):
+        blob.make_public()
 
     print("✅ Upload Success")
     print("Public URL:", blob.public_url)
@@ -128,7 +132,8 @@ def delete_photo_from_firebase(storage_path: str):
 
     try:
         blob = bucket.blob(storage_path)
-        blob.delete()
+        with external_call("firebase", "delete"):
+            blob.delete()
         print("✅ Image deleted successfully")
     except Exception as e:
         print("⚠️ Failed to delete image:", str(e))
@@ -0,0 +1,254 @@
+"""
+resumable_upload.py
+
+Client for Google Cloud Storage resumable upload sessions
+(blob.create_resumable_upload_session()).
+
+Features:
+- One keep-alive connection (requests.Session) per upload instead of a new
+  connection per chunk
+- Adaptive chunk size: starts at UPLOAD_MIN_CHUNK_KB and grows (or
+  shrinks) so each chunk takes about UPLOAD_TARGET_CHUNK_SECONDS at the
+  observed throughput, up to UPLOAD_MAX_CHUNK_MB
+- Honors the `Range` header of 308 responses: bytes the server did not
+  commit stay buffered and are sent again
+- Retries a failed chunk with exponential backoff, after asking the
+  server how much it already has
+- Fails (UploadError) once the server keeps answering without committing
+  anything: MAX_RETRIES such answers in a row
+- Works for streams of unknown length (intermediate chunks are sent as
+  `bytes a-b/*`, the last one declares the total size)
+
+Every chunk but the last must be a multiple of 256 KiB.
+
+Usage:
+    upload = ResumableUpload(session_url)
+    for data in source:
+        if upload.write(data):
+            upload.flush()
+    upload.finish()
+"""
+
+import os
+import re
+import time
+import logging
+import requests
+
+from backend.metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ALIGNMENT = 256 * 1024
+
+MIN_CHUNK_SIZE = int(os.getenv("UPLOAD_MIN_CHUNK_KB", "1024")) * 1024
+MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_MB", "32")) * 1024 * 1024
+TARGET_CHUNK_SECONDS = float(os.getenv("UPLOAD_TARGET_CHUNK_SECONDS", "2"))
+MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "6"))
+RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", "0.5"))    # seconds, doubled per retry
+REQUEST_TIMEOUT = float(os.getenv("UPLOAD_REQUEST_TIMEOUT", "120"))
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+_RANGE = re.compile(r"bytes=0-(\d+)")
+
+
+def _align(size: int) -> int:
+    return max(CHUNK_ALIGNMENT, size - size % CHUNK_ALIGNMENT)
+
+
+class UploadError(Exception):
+    pass
+
+
+class ResumableUpload:
+    """
+    Uploads a byte stream to a resumable session URL.
+
+    - write(data): buffers data, returns True once a full chunk is ready
+      (does no I/O, so it is safe to call from the event loop)
+    - flush(): uploads every full chunk buffered so far
+    - finish(): uploads the rest and completes the upload
+    - offset: bytes the server has committed
+    - on_progress(offset): optional callback after every committed chunk
+    """
+
+    def __init__(self, session_url: str, content_type: str = "video/mp4",
+                 total_size: int = None, on_progress=None,
+                 min_chunk_size: int = MIN_CHUNK_SIZE, max_chunk_size: int = MAX_CHUNK_SIZE):
+        self.session_url = session_url
+        self.content_type = content_type
+        self.total_size = total_size
+        self.on_progress = on_progress
+
+        self.min_chunk_size = _align(min_chunk_size)
+        self.max_chunk_size = max(_align(max_chunk_size), self.min_chunk_size)
+        self.chunk_size = self.min_chunk_size
+
+        self.offset = 0             # bytes the server has committed
+        self.requests = 0
+        self.retries = 0
+        self._stalls = 0            # answers in a row that committed nothing
+        self._buffer = bytearray()  # data from `offset` onwards
+        self._session = requests.Session()
+
+    #=== PUBLIC API ===
+
+    def write(self, data: bytes) -> bool:
+        self._buffer += data
+        return len(self._buffer) >= self.chunk_size
+
+    def flush(self):
+        while len(self._buffer) >= self.chunk_size:
+            self._send(self.chunk_size, final=False)
+
+    def finish(self) -> int:
+        """
+        Uploads what is left and returns the total size. Raises UploadError
+        when the server stops committing data.
+        """
+
+        try:
+            self.flush()
+            while True:
+                if self._send(len(self._buffer), final=True):
+                    return self.offset
+        finally:
+            self._session.close()
+
+    def close(self):
+        self._session.close()
+
+    #=== CHUNKS ===
+
+    def _send(self, size: int, final: bool) -> bool:
+        """
+        Sends the first `size` buffered bytes and drops what the server
+        committed. Returns True once the upload is complete.
+        """
+
+        data = bytes(self._buffer[:size])
+        total = self.offset + len(self._buffer) if final else self.total_size
+
+        if data:
+            content_range = f"bytes {self.offset}-{self.offset + len(data) - 1}/{total or '*'}"
+        else:
+            content_range = f"bytes */{total}"
+
+        before = self.offset
+        started = time.perf_counter()
+        response = self._request(data, content_range, total)
+        elapsed = time.perf_counter() - started
+
+        if response.status_code in (200, 201):
+            self._commit(self.offset + len(self._buffer))
+            return True
+
+        self._commit(self._committed(response))
+        self._adapt(self.offset - before, elapsed)
+        self._check_progress(before)
+        return False
+
+    def _request(self, data: bytes, content_range: str, total):
+        """PUTs one chunk, retrying transient failures with backoff."""
+
+        headers = {"Content-Type": self.content_type, "Content-Range": content_range}
+
+        for attempt in range(MAX_RETRIES + 1):
+            error = None
+            try:
+                self.requests += 1
+                with external_call("firebase", "upload_chunk"):
+                    response = self._session.put(
+                        self.session_url, data=data, headers=headers, timeout=REQUEST_TIMEOUT
+                    )
+                if response.status_code in (200, 201, 308):
+                    return response
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise UploadError(f"Upload failed: {response.status_code} {response.text[:200]}")
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+
+            if attempt == MAX_RETRIES:
+                raise UploadError(f"Upload failed after {MAX_RETRIES} retries: {error}")
+
+            self.retries += 1
+            delay = RETRY_BACKOFF * 2 ** attempt
+            logger.warning(f"[UPLOAD] Chunk {content_range} failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+            # The failed request may have been partly committed: resume from the server's offset
+            status = self._query_status(total)
+            if status is not None:
+                if status.status_code in (200, 201):
+                    return status
+                sent_until = self.offset + len(data)
+                self._commit(self._committed(status))
+                data = bytes(self._buffer[:max(sent_until - self.offset, 0)])
+                if not data and total is None:
+                    return status       # the whole chunk made it before the failure
+                if data:
+                    end = self.offset + len(data) - 1
+                    headers["Content-Range"] = f"bytes {self.offset}-{end}/{total or '*'}"
+                else:
+                    headers["Content-Range"] = f"bytes */{total}"
+
+    def _check_progress(self, before: int):
+        """Backs off after an answer that committed nothing; fails after MAX_RETRIES of them."""
+
+        if self.offset > before:
+            self._stalls = 0
+            return
+
+        if self._stalls == MAX_RETRIES:
+            raise UploadError(f"Upload made no progress at offset {self.offset} after {MAX_RETRIES} retries")
+
+        delay = RETRY_BACKOFF * 2 ** self._stalls
+        self._stalls += 1
+        self.retries += 1
+        logger.warning(f"[UPLOAD] Server committed nothing past {self.offset}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+    def _query_status(self, total):
+        """Asks the server how many bytes it has (PUT with an empty body)."""
+
+        try:
+            self.requests += 1
+            response = self._session.put(
+                self.session_url,
+                headers={"Content-Range": f"bytes */{total or '*'}"},
+                timeout=REQUEST_TIMEOUT,
+            )
+        except requests.RequestException:
+            return None
+
+        return response if response.status_code in (200, 201, 308) else None
+
+    def _committed(self, response) -> int:
+        """Committed offset from a 308 response (no Range header: nothing yet)."""
+
+        match = _RANGE.match(response.headers.get("Range", ""))
+        committed = int(match.group(1)) + 1 if match else 0
+
+        if committed < self.offset:
+            raise UploadError(f"Server lost committed data ({committed} < {self.offset})")
+        return committed
+
+    def _commit(self, committed: int):
+        if committed > self.offset:
+            del self._buffer[:committed - self.offset]
+            self.offset = committed
+            if self.on_progress:
+                self.on_progress(self.offset)
+
+    def _adapt(self, sent: int, elapsed: float):
+        """Sizes the next chunk to take about TARGET_CHUNK_SECONDS."""
+
+        if sent <= 0 or elapsed <= 0:
+            return
+
+        wanted = sent / elapsed * TARGET_CHUNK_SECONDS
+        # At most double per step, so one fast chunk does not overshoot
+        wanted = min(wanted, self.chunk_size * 2)
+        self.chunk_size = min(max(_align(int(wanted)), self.min_chunk_size), self.max_chunk_size)
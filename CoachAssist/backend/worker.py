@@ -0,0 +1,344 @@
+"""
+worker.py
+
+Standalone worker for media jobs (upload conversion, HLS renditions,
+previews, clipping, upscaling),
+so the heavy work runs on its own nodes instead of inside the API.
+
+Run it from the CoachAssist directory:
+    python -m backend.worker
+    python -m backend.worker --concurrency upload=2,clip=4,upscale=0
+
+Behaviour:
+- Per-type concurrency caps: WORKER_UPLOAD_CONCURRENCY (2),
+  WORKER_CLIP_CONCURRENCY (4), WORKER_CLIP_BATCH_CONCURRENCY (1, each batch
+  runs CLIP_CUT_CONCURRENCY cuts itself), WORKER_UPSCALE_CONCURRENCY (1),
+  WORKER_HLS_CONCURRENCY (1), WORKER_PREVIEW_CONCURRENCY (1), or --concurrency. A cap of 0 leaves that type to other nodes.
+- Jobs are claimed with FOR UPDATE SKIP LOCKED (see job_queue.py) and run
+  in one thread each; ffmpeg and Real-ESRGAN run as subprocesses
+- A heartbeat thread renews the leases of running jobs every third of
+  JOB_LEASE_SECONDS. A crashed worker's jobs are picked up again by
+  another one once their lease runs out.
+- Failed attempts are retried with backoff up to JOB_MAX_ATTEMPTS
+- Idle workers LISTEN on the media_jobs channel and also poll every
+  WORKER_POLL_INTERVAL seconds (for retries whose backoff ended)
+- SIGTERM / SIGINT: stop claiming, give running jobs up to
+  WORKER_SHUTDOWN_GRACE seconds, then exit (unfinished jobs are retried
+  elsewhere when their lease expires)
+- WORKER_METRICS_PORT: serve this process's Prometheus metrics on that port
+
+Setting JOB_WORKER_IN_API=1 runs a Worker thread inside the API process
+instead (single-machine development), see main.py.
+"""
+
+import os
+import time
+import uuid
+import select
+import signal
+import socket
+import logging
+import argparse
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv("backend/.env")
+
+from backend.database import open_connection, get_connection, open_dedicated_connection
+from backend.job_progress import ProgressReporter
+from backend.job_queue import (
+    CHANNEL, JOB_TABLES, LEASE_SECONDS, JobFailed,
+    claim_job, heartbeat, release_job, retry_or_fail, reap_expired, queue_depth,
+)
+from backend.media_jobs import HANDLERS
+from backend.metrics import track_job, set_queue_depth
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = {
+    "upload": int(os.getenv("WORKER_UPLOAD_CONCURRENCY", "2")),
+    "clip": int(os.getenv("WORKER_CLIP_CONCURRENCY", "4")),
+    "clip_batch": int(os.getenv("WORKER_CLIP_BATCH_CONCURRENCY", "1")),
+    "upscale": int(os.getenv("WORKER_UPSCALE_CONCURRENCY", "1")),
+    "hls": int(os.getenv("WORKER_HLS_CONCURRENCY", "1")),
+    "preview": int(os.getenv("WORKER_PREVIEW_CONCURRENCY", "1")),
+}
+
+POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "5"))
+SHUTDOWN_GRACE = float(os.getenv("WORKER_SHUTDOWN_GRACE", "300"))
+
+
+class Worker:
+    """
+    Claims and runs media jobs until stop() is called.
+
+    Usage:
+        worker = Worker({"upload": 2, "clip": 4, "upscale": 1})
+        worker.run()        # blocks; call worker.stop() from another thread
+    """
+
+    def __init__(self, concurrency: dict = None, worker_id: str = None,
+                 lease_seconds: float = LEASE_SECONDS, poll_interval: float = POLL_INTERVAL):
+        self.concurrency = dict(DEFAULT_CONCURRENCY if concurrency is None else concurrency)
+        for job_type in self.concurrency:
+            if job_type not in HANDLERS:
+                raise ValueError(f"Unknown job type: {job_type}")
+
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+        self._running = {job_type: {} for job_type in self.concurrency}   # type -> {job_id: thread}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._slot_freed = threading.Event()
+
+    #=== LIFECYCLE ===
+
+    def stop(self):
+        """Stops claiming new jobs; run() returns once running jobs finish."""
+        self._stopping.set()
+
+    def running(self) -> int:
+        with self._lock:
+            return sum(len(jobs) for jobs in self._running.values())
+
+    def run(self, grace: float = SHUTDOWN_GRACE):
+        logger.info(f"[WORKER] {self.worker_id} starting with caps {self.concurrency}")
+
+        threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+        listener = self._listen()
+        last_poll = 0.0
+        try:
+            while not self._stopping.is_set():
+                now = time.monotonic()
+                if self._slot_freed.is_set() or now - last_poll >= self.poll_interval or self._notified(listener):
+                    self._slot_freed.clear()
+                    if now - last_poll >= self.poll_interval:
+                        self._housekeeping()
+                        last_poll = now
+                    self._claim_all()
+
+                listener = self._wait(listener, 1.0)
+        finally:
+            if listener is not None:
+                listener.close()
+
+        # let running jobs finish
+        deadline = time.monotonic() + grace
+        while self.running() and time.monotonic() < deadline:
+            time.sleep(0.5)
+        if self.running():
+            logger.warning(f"[WORKER] Exiting with {self.running()} job(s) still running; they will be retried")
+        logger.info(f"[WORKER] {self.worker_id} stopped")
+
+    #=== CLAIMING ===
+
+    def _free_slots(self, job_type) -> int:
+        with self._lock:
+            return self.concurrency[job_type] - len(self._running[job_type])
+
+    def _claim_all(self):
+        db = open_connection()
+        cur = db.cursor()
+        try:
+            for job_type in self.concurrency:
+                while self._free_slots(job_type) > 0 and not self._stopping.is_set():
+                    job = claim_job(cur, job_type, self.worker_id, self.lease_seconds)
+                    db.commit()
+                    if not job:
+                        break
+                    self._start(job)
+        except Exception as e:
+            logger.error(f"[WORKER] Claiming jobs failed: {e}", exc_info=True)
+            try:
+                db.rollback()
+            except Exception:
+                pass
+        finally:
+            cur.close()
+            db.close()
+
+    def _start(self, job):
+        thread = threading.Thread(
+            target=self._run_job, args=(job,),
+            name=f"job-{job['job_type']}-{job['id']}", daemon=True
+        )
+        with self._lock:
+            self._running[job["job_type"]][job["id"]] = thread
+        logger.info(f"[WORKER] Claimed {job['job_type']} job {job['id']} (attempt {job['attempts']}/{job['max_attempts']})")
+        thread.start()
+
+    def _run_job(self, job):
+        job_type = job["job_type"]
+        try:
+            with get_connection() as db, track_job(job_type) as tracked:
+                cur = db.cursor()
+                reporter = ProgressReporter(JOB_TABLES[job_type], job["id"], job["user_id"], cur, db)
+                try:
+                    # handlers raise if their final "done" write fails, so a
+                    # job whose work was not committed is retried, not released
+                    HANDLERS[job_type](job, cur, db, reporter)
+                    release_job(cur, job, self.worker_id)
+                    db.commit()
+                    tracked.done()
+                except Exception as e:
+                    logger.error(f"[WORKER] {job_type} job {job['id']} failed: {e}", exc_info=True)
+                    self._failed(job, cur, db, reporter, e)
+                finally:
+                    cur.close()
+        except Exception as e:
+            # no connection: the lease will expire and the job will be claimed again
+            logger.error(f"[WORKER] Could not run {job_type} job {job['id']}: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._running[job_type].pop(job["id"], None)
+            self._slot_freed.set()
+
+    def _failed(self, job, cur, db, reporter, error):
+        try:
+            db.rollback()
+            state = retry_or_fail(
+                cur, job, self.worker_id, str(error),
+                permanent=isinstance(error, JobFailed)
+            )
+            db.commit()
+        except Exception as e:
+            # the lease will expire and the job will be claimed again
+            logger.error(f"[WORKER] Could not record failure of job {job['id']}: {e}", exc_info=True)
+            return
+
+        if state is None:
+            logger.warning(f"[WORKER] Lost the lease on job {job['id']} before it failed")
+            return
+        reporter.record(state["status"], state["progress"], state["step"])
+
+    #=== HEARTBEATS / HOUSEKEEPING ===
+
+    def _heartbeat_loop(self):
+        # keeps going during the shutdown grace period; dies with the process
+        interval = self.lease_seconds / 3
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                held = {}
+                for job_type, jobs in self._running.items():
+                    held.setdefault(JOB_TABLES[job_type], []).extend(jobs)
+            if not any(held.values()):
+                continue
+
+            try:
+                db = open_connection()
+                cur = db.cursor()
+                try:
+                    for table, job_ids in held.items():
+                        if not job_ids:
+                            continue
+                        kept = heartbeat(cur, table, job_ids, self.worker_id, self.lease_seconds)
+                        for job_id in set(job_ids) - kept:
+                            logger.warning(f"[WORKER] Lease on {table} job {job_id} was lost")
+                    db.commit()
+                finally:
+                    cur.close()
+                    db.close()
+            except Exception as e:
+                logger.error(f"[WORKER] Heartbeat failed: {e}", exc_info=True)
+
+    def _housekeeping(self):
+        try:
+            db = open_connection()
+            cur = db.cursor()
+            try:
+                reaped = reap_expired(cur)
+                depth = queue_depth(cur)
+                db.commit()
+            finally:
+                cur.close()
+                db.close()
+        except Exception as e:
+            logger.error(f"[WORKER] Housekeeping failed: {e}", exc_info=True)
+            return
+
+        if reaped:
+            logger.warning(f"[WORKER] Failed {reaped} job(s) whose last attempt stopped responding")
+        for job_type, queued in depth.items():
+            set_queue_depth(job_type, queued)
+
+    #=== NOTIFICATIONS ===
+
+    def _listen(self):
+        try:
+            conn = open_dedicated_connection()
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            return conn
+        except Exception as e:
+            logger.warning(f"[WORKER] LISTEN unavailable, polling only: {e}")
+            return None
+
+    def _notified(self, listener) -> bool:
+        if listener is None or not listener.notifies:
+            return False
+        listener.notifies.clear()
+        return True
+
+    def _wait(self, listener, timeout):
+        """Waits up to `timeout` for a notification; reconnects a broken listener."""
+
+        if listener is None:
+            self._stopping.wait(timeout)
+            return self._listen()
+
+        try:
+            if select.select([listener], [], [], timeout)[0]:
+                listener.poll()
+            return listener
+        except Exception as e:
+            logger.warning(f"[WORKER] Listener connection lost: {e}")
+            try:
+                listener.close()
+            except Exception:
+                pass
+            return None
+
+
+def parse_concurrency(value: str) -> dict:
+    """'upload=2,clip=4' -> {"upload": 2, "clip": 4, "upscale": <default>}"""
+
+    concurrency = dict(DEFAULT_CONCURRENCY)
+    for part in filter(None, value.split(",")):
+        job_type, _, cap = part.partition("=")
+        concurrency[job_type.strip()] = int(cap)
+    return concurrency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CoachAssist media job worker")
+    parser.add_argument("--concurrency", default="",
+                        help="per-type caps, e.g. upload=2,clip=4,upscale=1")
+    parser.add_argument("--worker-id", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    metrics_port = os.getenv("WORKER_METRICS_PORT")
+    if metrics_port:
+        from prometheus_client import start_http_server
+        start_http_server(int(metrics_port))
+
+    worker = Worker(parse_concurrency(args.concurrency), worker_id=args.worker_id)
+
+    def shutdown(signum, frame):
+        logger.info(f"[WORKER] Received signal {signum}, finishing running jobs")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import React, { useState, useEffect, useRef, useCallback } from "react";
 import "../styles/clip_modal.css";
+import useJobProgress from "../hooks/useJobProgress";
+import useThumbnails from "../hooks/useThumbnails";
 
 export default function ClipVideoModal({
     video,
+    teamId,
+    matchId,
     onSave,
     onDiscard
 }) {
@@ -13,12 +17,22 @@ export default function ClipVideoModal({
     const [isSaving, setIsSaving] = useState(false);
 
     const [jobId, setJobId] = useState(null);
-    const [progress, setProgress] = useState(0);
-    const [step, setStep] = useState("");
-    const [status, setStatus] = useState(null);
+
+    // pushed over the shared job event stream (no polling)
+    const job = useJobProgress(
+        "upload_jobs",
+        jobId,
+        jobId ? `/teams/${teamId}/matches/${matchId}/videos/upload-status/${jobId}` : null
+    );
+    const progress = job?.progress ?? 0;
+    const step = job?.step ?? (jobId ? "queued" : "");
+    const status = job?.status ?? (jobId ? "queued" : null);
 
     const [dragging, setDragging] = useState(null);
 
+    // sprite thumbnails, so dragging does not seek the video on every move
+    const thumbnailAt = useThumbnails(video.thumbnails_url);
+
     const previewRef = useRef(null);
     const trackRef = useRef(null);
 
@@ -112,46 +126,25 @@ export default function ClipVideoModal({
     }, [dragging, startTime, endTime, duration, positionFromEvent]);
 
     /* ───────────────────────── video scrub preview ───────────────────────── */
+    // with thumbnails, the video only seeks once the thumb is released
+    const seekWhileDragging = dragging !== null && thumbnailAt(0) === null;
+
     useEffect(() => {
-        if (previewRef.current && duration > 0) {
+        if (previewRef.current && duration > 0 && (dragging === null || seekWhileDragging)) {
             previewRef.current.currentTime = startTime;
         }
-    }, [startTime, duration]);
+    }, [startTime, duration, dragging, seekWhileDragging]);
 
-    /* ───────────────────────── polling ───────────────────────── */
-    useEffect(() => {
-        if (!jobId) return;
-
-        const interval = setInterval(async () => {
-            try {
-                const res = await fetch(`/api/upload-status/${jobId}`);
-                if (!res.ok) return;
-
-                const data = await res.json();
-
-                setProgress(data.progress);
-                setStep(data.step);
-                setStatus(data.status);
-
-                if (data.status === "done") {
-                    clearInterval(interval);
-                    setIsSaving(false);
-                    return;
-                }
-
-                if (data.status === "failed") {
-                    clearInterval(interval);
-                    setIsSaving(false);
-                }
-            } catch (err) {
-                console.error(err);
-                clearInterval(interval);
-                setIsSaving(false);
-            }
-        }, 1000);
+    const dragThumbnail = dragging
+        ? thumbnailAt(dragging === "start" ? startTime : endTime)
+        : null;
 
-        return () => clearInterval(interval);
-    }, [jobId]);
+    /* ───────────────────────── job progress ───────────────────────── */
+    useEffect(() => {
+        if (status === "done" || status === "failed") {
+            setIsSaving(false);
+        }
+    }, [status]);
 
     /* ───────────────────────── inputs (unchanged UX) ───────────────────────── */
     const handleStartInput = (raw) => {
@@ -175,12 +168,17 @@ export default function ClipVideoModal({
         try {
             const res = await onSave(startTime, endTime);
 
+            // served from the clip cache, nothing to wait for
+            if (res?.cached) {
+                setIsSaving(false);
+                return;
+            }
+
             if (!res?.job_id) {
                 throw new Error("Missing job_id");
             }
 
             setJobId(res.job_id);
-            setStatus("queued");
 
         } catch (err) {
             console.error(err);
@@ -206,6 +204,7 @@ export default function ClipVideoModal({
                     <video
                         ref={previewRef}
                         src={video.playback_url}
+                        poster={video.poster_url || undefined}
                         controls
                         className="clip-preview-video"
                     />
@@ -222,6 +221,19 @@ export default function ClipVideoModal({
                     </div>
 
                     <div className="clip-track" ref={trackRef}>
+                        {dragThumbnail && (
+                            <div
+                                className="clip-scrub-thumbnail"
+                                style={{
+                                    left: `${pct(dragging === "start" ? startTime : endTime)}%`,
+                                    width: dragThumbnail.w,
+                                    height: dragThumbnail.h,
+                                    backgroundImage: `url("${dragThumbnail.url}")`,
+                                    backgroundPosition: `-${dragThumbnail.x}px -${dragThumbnail.y}px`
+                                }}
+                            />
+                        )}
+
                         <div
                             className="clip-range-fill"
                             style={{
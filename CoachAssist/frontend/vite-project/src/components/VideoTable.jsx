@@ -10,6 +10,7 @@ export default function VideoTable({
     handleUpscaleVideo,
     upscaleJobs = {},
     clipJobs = {}, 
+    streamJobs = {},
     handleUpscaleClick
 }) {
     const [expandedId, setExpandedId] = useState(null);
@@ -24,7 +25,13 @@ export default function VideoTable({
             downloading: "Downloading",
             clipping: "Clipping",
             uploading: "Uploading",
+            storing: "Storing",
+            remuxing: "Remuxing",
+            transcoding_audio: "Converting audio",
+            encoding: "Encoding",
             saving: "Finalizing",
+            segmenting: "Preparing stream",
+            extracting_previews: "Extracting previews",
             extracting_frames: "Extracting",
             upscaling_frames: "Upscaling",
             rebuilding_video: "Rebuilding",
@@ -61,11 +68,31 @@ export default function VideoTable({
                             clipJob.status !== "done" &&
                             clipJob.status !== "failed";
 
+                        // ── STREAMING RENDITIONS (HLS) ──────────
+                        const streamJob = streamJobs[video.id];
+                        const isPreparingStream =
+                            streamJob &&
+                            streamJob.status !== "done" &&
+                            streamJob.status !== "failed";
+
                         return (
                             <React.Fragment key={video.id}>
                                 <div className="table-row analysis-video-row">
                                     <div className="cell col-video-name">
+                                        {video.poster_url && (
+                                            <img
+                                                src={video.poster_url}
+                                                alt=""
+                                                loading="lazy"
+                                                className="video-table-poster"
+                                            />
+                                        )}
                                         {video.filename}
+                                        {isPreparingStream && (
+                                            <div style={{ fontSize: "0.75em", opacity: 0.7 }}>
+                                                Preparing stream ({streamJob?.progress ?? 0}%)
+                                            </div>
+                                        )}
                                     </div>
                                     <div className="cell col-video-action">
                                         <button
@@ -150,6 +150,12 @@ export const AuthProvider = ({ children }) => {
     localStorage.removeItem("token");
   };
 
+  // Swap in a token re-issued by the backend (e.g. after a password change)
+  const updateToken = (newToken) => {
+    localStorage.setItem("token", newToken);
+    setToken(newToken);
+  };
+
   const refreshProfile = () => {
     if (token) {
       setLoading(true);
@@ -168,6 +174,7 @@ export const AuthProvider = ({ children }) => {
         logout,
         loading,
         refreshProfile,
+        updateToken,
       }}
     >
       {!loading && children}
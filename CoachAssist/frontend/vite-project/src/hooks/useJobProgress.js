@@ -0,0 +1,160 @@
+import { useState, useEffect } from "react";
+
+// Live job progress pushed by the backend (GET /jobs/events, Server-Sent Events).
+//
+// One stream per tab carries every upload / clip / upscale job of the user.
+// It is opened by the first subscriber and closed after the last one leaves.
+// The stream is read with fetch (EventSource cannot send the Bearer token).
+//
+// Events are { table, id, job_type, video_id, team_id, match_id, status, progress, step }.
+// A "snapshot" (all active jobs) arrives on every (re)connect.
+
+const subscribers = new Set(); // { onJob, onSnapshot }
+const latest = new Map();      // "table:id" -> last event, so late subscribers catch up
+const MAX_REMEMBERED = 200;
+
+let controller = null;
+let retryDelay = 1000;
+
+const jobKey = (table, id) => `${table}:${id}`;
+
+function remember(job) {
+    const key = jobKey(job.table, job.id);
+    latest.delete(key);
+    latest.set(key, job);
+    if (latest.size > MAX_REMEMBERED) {
+        latest.delete(latest.keys().next().value);
+    }
+}
+
+function handleMessage(raw) {
+    let event = "message";
+    const data = [];
+
+    raw.split("\n").forEach(line => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data.push(line.slice(5).trim());
+    });
+
+    if (data.length === 0) return; // keepalive comment
+
+    const payload = JSON.parse(data.join("\n"));
+
+    if (event === "snapshot") {
+        payload.forEach(remember);
+        subscribers.forEach(sub => sub.onSnapshot?.(payload));
+    } else if (event === "job") {
+        remember(payload);
+        subscribers.forEach(sub => sub.onJob?.(payload));
+    }
+}
+
+async function connect() {
+    const token = localStorage.getItem("token");
+    if (!token) return;
+
+    const current = new AbortController();
+    controller = current;
+
+    try {
+        const res = await fetch("/jobs/events", {
+            headers: { Authorization: `Bearer ${token}` },
+            signal: current.signal
+        });
+
+        if (!res.ok) throw new Error(`job events: HTTP ${res.status}`);
+
+        retryDelay = 1000;
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+
+            let end;
+            while ((end = buffer.indexOf("\n\n")) !== -1) {
+                handleMessage(buffer.slice(0, end));
+                buffer = buffer.slice(end + 2);
+            }
+        }
+    } catch (err) {
+        if (current.signal.aborted) return;
+        console.error("Job events stream error:", err);
+    }
+
+    // stream ended: reconnect (with backoff) while someone still listens
+    if (controller === current && subscribers.size > 0) {
+        setTimeout(() => {
+            if (controller === current && subscribers.size > 0) connect();
+        }, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+    }
+}
+
+// Low-level subscription; returns the unsubscribe function.
+// onJob(job) for every change, onSnapshot(jobs) on every (re)connect.
+export function subscribeToJobs({ onJob, onSnapshot }) {
+    const sub = { onJob, onSnapshot };
+    subscribers.add(sub);
+
+    if (!controller) connect();
+
+    return () => {
+        subscribers.delete(sub);
+        if (subscribers.size === 0 && controller) {
+            controller.abort();
+            controller = null;
+        }
+    };
+}
+
+// Last known state of a job, if the stream has seen it
+export function lastJobState(table, jobId) {
+    return latest.get(jobKey(table, jobId)) || null;
+}
+
+// Follows one job. Returns its latest { status, progress, step, ... } or null.
+// statusUrl (optional) is fetched when a resync no longer lists the job,
+// i.e. it finished while the stream was disconnected.
+export default function useJobProgress(table, jobId, statusUrl = null) {
+    const [job, setJob] = useState(() => (jobId ? lastJobState(table, jobId) : null));
+
+    useEffect(() => {
+        if (!jobId) {
+            setJob(null);
+            return;
+        }
+
+        setJob(lastJobState(table, jobId));
+
+        const refresh = async () => {
+            if (!statusUrl) return;
+            try {
+                const res = await fetch(statusUrl, {
+                    headers: { Authorization: `Bearer ${localStorage.getItem("token")}` }
+                });
+                if (res.ok) setJob({ table, id: jobId, ...(await res.json()) });
+            } catch (err) {
+                console.error("Job status error:", err);
+            }
+        };
+
+        return subscribeToJobs({
+            onJob: (event) => {
+                if (event.table === table && event.id === jobId) setJob(event);
+            },
+            onSnapshot: (jobs) => {
+                const active = jobs.find(j => j.table === table && j.id === jobId);
+                if (active) setJob(active);
+                else refresh();
+            }
+        });
+    }, [table, jobId, statusUrl]);
+
+    return job;
+}
@@ -0,0 +1,66 @@
+import { useState, useEffect, useCallback } from "react";
+
+// Scrubbing thumbnails of a video (thumbnails_url from list_videos).
+//
+// The backend serves a WebVTT index of sprite sheets (see
+// backend/video_previews.py); each cue covers a few seconds and points at
+// one tile: "https://...sprite_000.jpg#xywh=x,y,w,h".
+//
+// thumbnailAt(seconds) returns { url, x, y, w, h } for that time, or null
+// while loading / when the video has no thumbnails yet.
+
+function parseTime(text) {
+    const parts = text.trim().split(":").map(Number);
+    return parts.reduce((total, part) => total * 60 + part, 0);
+}
+
+function parseVtt(text) {
+    const cues = [];
+    const lines = text.split("\n");
+
+    for (let i = 0; i < lines.length; i++) {
+        if (!lines[i].includes("-->")) continue;
+
+        const [start, end] = lines[i].split("-->").map(parseTime);
+        const [url, fragment = ""] = (lines[i + 1] || "").split("#xywh=");
+        const [x, y, w, h] = fragment.split(",").map(Number);
+
+        if (url && !isNaN(h)) cues.push({ start, end, url, x, y, w, h });
+    }
+
+    return cues;
+}
+
+export default function useThumbnails(thumbnailsUrl) {
+    const [cues, setCues] = useState([]);
+
+    useEffect(() => {
+        setCues([]);
+        if (!thumbnailsUrl) return;
+
+        const controller = new AbortController();
+
+        fetch(thumbnailsUrl, { signal: controller.signal })
+            .then(res => (res.ok ? res.text() : ""))
+            .then(text => setCues(parseVtt(text)))
+            .catch(err => {
+                if (err.name !== "AbortError") console.error("Thumbnails error:", err);
+            });
+
+        return () => controller.abort();
+    }, [thumbnailsUrl]);
+
+    const thumbnailAt = useCallback((seconds) => {
+        if (cues.length === 0) return null;
+
+        // cues are evenly spaced: jump to the slot, then correct for rounding
+        const step = cues[0].end - cues[0].start || 1;
+        let i = Math.min(Math.max(Math.floor(seconds / step), 0), cues.length - 1);
+        while (i > 0 && cues[i].start > seconds) i--;
+        while (i < cues.length - 1 && cues[i].end <= seconds) i++;
+
+        return cues[i];
+    }, [cues]);
+
+    return thumbnailAt;
+}
@@ -1,4 +1,7 @@
 import { useState, useRef, useEffect } from "react";
+import { subscribeToJobs } from "./useJobProgress";
+
+const FINISHED = ["done", "failed"];
 
 export default function useVideos(teamId, matchId) {
     const [videoList, setVideoList] = useState([]);
@@ -6,9 +9,13 @@ export default function useVideos(teamId, matchId) {
     const [videoName, setVideoName] = useState("");
     const [loadingVideos, setLoadingVideos] = useState(true); // videos being fetched
     const videoRef = useRef(null);
-    const [activeUploadJobId, setActiveUploadJobId] = useState(null); // track which upload job is currently active for polling
-    const [uploadJobs, setUploadJobs] = useState({}); // videos being uploaded
-    const [upscaleJobs, setUpscaleJobs] = useState({}); // videos being upscaled
+    const [activeUploadJobId, setActiveUploadJobId] = useState(null); // track which upload job is currently active
+    const [uploadJobs, setUploadJobs] = useState({}); // videos being uploaded, by job id
+    const [upscaleJobs, setUpscaleJobs] = useState({}); // videos being upscaled, by video id
+    const [clipJobs, setClipJobs] = useState({}); // clips being cut, by source video id
+    const [streamJobs, setStreamJobs] = useState({}); // HLS renditions being built, by video id
+    const uploadJobsRef = useRef({});
+    const upscaleJobsRef = useRef({});
     const isUploading = activeUploadJobId && uploadJobs?.[activeUploadJobId]?.status !== "done";
     // Clip modal state – holds the video object being clipped, or null
     const [clipTarget, setClipTarget] = useState(null);
@@ -68,6 +75,86 @@ export default function useVideos(teamId, matchId) {
         }
     }, [teamId, matchId]);
 
+    useEffect(() => { uploadJobsRef.current = uploadJobs; }, [uploadJobs]);
+    useEffect(() => { upscaleJobsRef.current = upscaleJobs; }, [upscaleJobs]);
+
+    // ----------------------------
+    // Live job progress: one server-sent event stream for all of the
+    // user's jobs (see useJobProgress.js), filtered to this match
+    // ----------------------------
+    const applyJob = (job) => {
+        if (job.table === "upscale_jobs") {
+            setUpscaleJobs(prev => ({ ...prev, [job.video_id]: job }));
+        } else if (job.job_type === "clip" || job.job_type === "clip_batch") {
+            setClipJobs(prev => ({ ...prev, [job.video_id]: job }));
+        } else if (job.job_type === "hls") {
+            setStreamJobs(prev => ({ ...prev, [job.video_id]: job }));
+        } else if (job.job_type === "preview") {
+            // no progress shown; the list refresh on "done" picks up the poster
+        } else {
+            setUploadJobs(prev => ({ ...prev, [job.id]: job }));
+        }
+    };
+
+    // one-off status read for a job that finished while the stream was down
+    const refreshJob = async (job, url) => {
+        try {
+            const res = await fetch(url, {
+                headers: {
+                    Authorization: `Bearer ${token}`
+                }
+            });
+            if (res.ok) applyJob({ ...job, ...(await res.json()) });
+        } catch (err) {
+            console.error("Job status error:", err);
+        }
+    };
+
+    useEffect(() => {
+        if (!token || !teamId || !matchId) return;
+
+        const inMatch = (job) =>
+            job.team_id === Number(teamId) && job.match_id === Number(matchId);
+
+        let connected = false;
+
+        return subscribeToJobs({
+            onJob: (job) => {
+                if (!inMatch(job)) return;
+
+                applyJob(job);
+
+                // new file, clip or upscaled copy is committed: refresh the list
+                if (job.status === "done") {
+                    fetchVideos();
+                }
+            },
+            onSnapshot: (jobs) => {
+                jobs.filter(inMatch).forEach(applyJob);
+
+                // first snapshot: the list was just fetched on mount
+                if (!connected) {
+                    connected = true;
+                    return;
+                }
+
+                // reconnected: anything no longer active finished meanwhile
+                const active = new Set(jobs.map(job => `${job.table}:${job.id}`));
+                const base = `/teams/${teamId}/matches/${matchId}/videos`;
+
+                Object.values(uploadJobsRef.current)
+                    .filter(job => !FINISHED.includes(job.status) && !active.has(`upload_jobs:${job.id}`))
+                    .forEach(job => refreshJob(job, `${base}/upload-status/${job.id}`));
+
+                Object.values(upscaleJobsRef.current)
+                    .filter(job => !FINISHED.includes(job.status) && !active.has(`upscale_jobs:${job.id}`))
+                    .forEach(job => refreshJob(job, `${base}/${job.id}/upscale-status`));
+
+                fetchVideos();
+            }
+        });
+    }, [teamId, matchId]);
+
     const handleVideoUpload = async (event) => {
         const file = event.target.files[0];
         if (!file) return alert("No file selected.");
@@ -112,7 +199,8 @@ export default function useVideos(teamId, matchId) {
             // ----------------------------
             // Add placeholder video only
             // ----------------------------
-            setVideoList(prev => [
+            // (the job's "done" event may already have refreshed the list)
+            setVideoList(prev => prev.some(v => v.id === newVideo.id) ? prev : [
                 {
                     ...newVideo,
                     playback_url: null // explicitly indicate "not ready yet"
@@ -125,11 +213,14 @@ export default function useVideos(teamId, matchId) {
             setVideoName(newVideo.filename);
             
             // ----------------------------
-            // Start polling using jobId ONLY
-            // (job is source of truth)
+            // Follow the job (job is source of truth); its progress
+            // arrives on the job event stream
             // ----------------------------
             setActiveUploadJobId(jobId);
-            startUploadPolling(jobId);
+            setUploadJobs(prev => ({
+                ...prev,
+                [jobId]: prev[jobId] || { id: jobId, table: "upload_jobs", status: "queued", progress: 0, step: "queued" }
+            }));
 
             // optional refresh (safe but not required immediately)
             //await fetchVideos();
@@ -141,45 +232,6 @@ export default function useVideos(teamId, matchId) {
         }
     };
 
-    const startPolling = (videoId, jobId) => {
-    const interval = setInterval(async () => {
-        try {
-            const res = await fetch(
-                `/teams/${teamId}/matches/${matchId}/videos/${jobId}/upscale-status`,
-                {
-                    headers: {
-                        Authorization: `Bearer ${token}`
-                    }
-                }
-            );
-
-            if (!res.ok) return;
-
-            const job = await res.json();
-
-            // Update job state
-            setUpscaleJobs(prev => ({
-                ...prev,
-                [videoId]: job
-            }));
-
-            // Stop polling when done
-            if (job.status === "done" || job.status === "failed") {
-                clearInterval(interval);
-
-                // Refresh videos when done
-                if (job.status === "done") {
-                    fetchVideos();
-                }
-            }
-
-        } catch (err) {
-            console.error("Polling error:", err);
-            clearInterval(interval);
-        }
-    }, 2000);
-    };
-
     const handleDeleteVideo = async (videoId) => {
         try {
             const res = await fetch(
@@ -205,49 +257,6 @@ export default function useVideos(teamId, matchId) {
         }
     };
 
-    const startUploadPolling = (jobId) => {
-        const interval = setInterval(async () => {
-            try {
-                const res = await fetch(
-                    `/teams/${teamId}/matches/${matchId}/videos/upload-status/${jobId}`,
-                    {
-                        headers: {
-                            Authorization: `Bearer ${token}`
-                        }
-                    }
-                );
-
-                // IMPORTANT: stop polling on failure
-                if (!res.ok) {
-                    clearInterval(interval);
-                    console.error("Upload job not found:", jobId);
-                    return;
-                }
-
-                const job = await res.json();
-
-                setUploadJobs(prev => ({
-                    ...prev,
-                    [jobId]: job
-                }));
-
-                // stop conditions
-                if (job.status === "done" || job.status === "failed") {
-                    clearInterval(interval);
-
-                    if (job.status === "done") {
-                        // refresh final video list once backend commit is complete
-                        fetchVideos();
-                    }
-                }
-
-            } catch (err) {
-                console.error("Upload polling error:", err);
-                clearInterval(interval);
-            }
-        }, 1000);
-    };
-
     const handleClipVideo = async (start, end) => {
         if (!token) {
             alert("You must be logged in.");
@@ -286,7 +295,12 @@ export default function useVideos(teamId, matchId) {
                 return;
             }
 
-            return data; // { status, job_id }
+            // the same range was clipped before: the clip is already in the list
+            if (data.cached) {
+                fetchVideos();
+            }
+
+            return data; // { status, job_id } or { status: "done", video_id, cached }
 
         } catch (err) {
             alert("Clip error: " + err);
@@ -371,10 +385,13 @@ export default function useVideos(teamId, matchId) {
 
         if (!data || !data.job_id) return;
 
-        const jobId = data.job_id;
-
-        // Start polling this job
-        startPolling(videoId, jobId);
+        // progress arrives on the job event stream
+        setUpscaleJobs(prev => ({
+            ...prev,
+            [videoId]: prev[videoId]?.id === data.job_id
+                ? prev[videoId]
+                : { id: data.job_id, table: "upscale_jobs", video_id: videoId, status: "queued", progress: 0, step: "queued" }
+        }));
 
     } catch (err) {
         console.error(err);
@@ -390,6 +407,8 @@ export default function useVideos(teamId, matchId) {
        
         uploadJobs,
         upscaleJobs,
+        clipJobs,
+        streamJobs,
         activeUploadJobId,
         clipTarget,
         setVideoSrc,
@@ -10,6 +10,9 @@ import VideoAnnotationOverlay from "../components/Drawboard/VideoAnnotationOverl
 import useVideos from "../hooks/useVideos";
 import usePlayerInsights from "../hooks/usePlayerInsights";
 
+const CAN_PLAY_HLS = typeof document !== "undefined" &&
+    document.createElement("video").canPlayType("application/vnd.apple.mpegurl") !== "";
+
 // Helper to convert time to seconds for sorting
 const timeToSeconds = (t) => {
     if (!t) return 0;
@@ -377,7 +380,7 @@ const [gameMetrics, setGameMetrics] = useState({});
     const {
         videoList, videoSrc, videoName, videoRef,
         uploading, clipTarget,
-        uploadJobs, upscaleJobs,
+        uploadJobs, upscaleJobs, clipJobs, streamJobs,
         isUploading, activeUploadJobId,
         setVideoSrc, setVideoName,
         handleVideoUpload, handleDeleteVideo,
@@ -575,6 +578,9 @@ const [gameMetrics, setGameMetrics] = useState({});
         ? videoList.find((v) => v.playback_url === videoSrc)
         : null;
 
+    // adaptive-bitrate stream where the browser plays HLS natively, the MP4 otherwise
+    const playerSrc = currentVideo?.hls_url && CAN_PLAY_HLS ? currentVideo.hls_url : videoSrc;
+
     return (
         <div className="analyze-game-container">
             {/* Header */}
@@ -716,7 +722,8 @@ const [gameMetrics, setGameMetrics] = useState({});
                         {videoSrc ? (
                             <video
                                 ref={videoRef}
-                                src={videoSrc}
+                                src={playerSrc}
+                                poster={currentVideo?.poster_url || undefined}
                                 controls
                                 className="video-player"
                             />
@@ -784,6 +791,8 @@ const [gameMetrics, setGameMetrics] = useState({});
                             handleUpscaleVideo={handleUpscaleVideo}
                             handleUpscaleClick={handleUpscaleClick}
                             upscaleJobs={upscaleJobs}
+                            clipJobs={clipJobs}
+                            streamJobs={streamJobs}
                         />
                     ) : activeTab === "Game State" && gameView === "state" ? (
 
@@ -1185,6 +1194,8 @@ const [gameMetrics, setGameMetrics] = useState({});
                 {clipTarget && (
                     <ClipVideoModal
                         video={clipTarget}
+                        teamId={teamId}
+                        matchId={matchId}
                         onSave={handleClipVideo}
                         onDiscard={closeClipModal}
                     />
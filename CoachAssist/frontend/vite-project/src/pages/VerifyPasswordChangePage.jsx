@@ -6,7 +6,7 @@ import { useAuth } from "../context/AuthContext";
 
 export default function VerifyPasswordChangePage() {
   const navigate = useNavigate();
-  const { token } = useAuth(); //Get authenticated token to protect requests
+  const { token, updateToken } = useAuth(); //Get authenticated token to protect requests
 
   //Form state
   const [code, setCode] = useState(""); //Verification code
@@ -46,6 +46,11 @@ export default function VerifyPasswordChangePage() {
         return;
       }
 
+      //Older sessions are revoked by the password change; keep this one signed in
+      if (data.token) {
+        updateToken(data.token);
+      }
+
       //On success, return to profile page
       navigate("/profile");
     } catch (err) {
@@ -12,6 +12,7 @@ export default defineConfig({
       "/players": "http://127.0.0.1:8000",
       "/videos": "http://127.0.0.1:8000",
       "/drawboards": "http://127.0.0.1:8000",
+      "/jobs": "http://127.0.0.1:8000",
     },
   },
 });